@@ -58,6 +58,39 @@ def create_app():
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=1)
     app.config['JWT_REFRESH_TOKEN_EXPIRES'] = timedelta(days=30)
     
+    # Leaderboard ranking backend: 'redis', 'memory' or 'sql' (default: redis when REDIS_URL is set)
+    app.config['LEADERBOARD_BACKEND'] = os.environ.get('LEADERBOARD_BACKEND')
+    # 'memory' boards are per-process; they are rebuilt from SQL after this many seconds
+    app.config['MEMORY_LEADERBOARD_TTL'] = float(os.environ.get('MEMORY_LEADERBOARD_TTL', 30))
+    # 'memory' is only used when this confirms a single-process server (and no -w > 1 is seen)
+    app.config['LEADERBOARD_MEMORY_SINGLE_PROCESS'] = os.environ.get('LEADERBOARD_MEMORY_SINGLE_PROCESS', 'false').lower() == 'true'
+    # Redis boards are rebuilt from SQL after this many seconds, repairing deltas missed mid-rebuild
+    app.config['REDIS_LEADERBOARD_TTL'] = float(os.environ.get('REDIS_LEADERBOARD_TTL', 300))
+    # Each live leaderboard stream holds a worker thread. Unless set, a worker takes its --threads
+    # less LEADERBOARD_STREAM_THREAD_HEADROOM streams (8 - 2 = 6 with the Dockerfile/render.yaml settings)
+    stream_cap = os.environ.get('LEADERBOARD_STREAM_MAX_PER_WORKER')
+    app.config['LEADERBOARD_STREAM_MAX_PER_WORKER'] = int(stream_cap) if stream_cap else None
+    app.config['LEADERBOARD_STREAM_THREAD_HEADROOM'] = int(os.environ.get('LEADERBOARD_STREAM_THREAD_HEADROOM', 2))
+    # Streams are recycled after this many seconds; stream tokens last this long plus a reconnect window
+    app.config['LEADERBOARD_STREAM_LIFETIME'] = int(os.environ.get('LEADERBOARD_STREAM_LIFETIME', 300))
+    
+    # Group-commit window for challenge submits in ms (0 writes each submit in its own transaction)
+    app.config['SUBMIT_GROUP_COMMIT_MS'] = float(os.environ.get('SUBMIT_GROUP_COMMIT_MS', 0))
+    app.config['SUBMIT_GROUP_COMMIT_MAX_BATCH'] = int(os.environ.get('SUBMIT_GROUP_COMMIT_MAX_BATCH', 200))
+    # Seconds a queued submit waits for its batch before committing on its own
+    app.config['SUBMIT_GROUP_COMMIT_TIMEOUT'] = float(os.environ.get('SUBMIT_GROUP_COMMIT_TIMEOUT', 10))
+    
+    # Challenges can be joined and played for this many days after creation
+    app.config['CHALLENGE_OPEN_DAYS'] = float(os.environ.get('CHALLENGE_OPEN_DAYS', 7))
+    # Unsubmitted practice sessions kept per user; older ones are dropped when a new one is served
+    app.config['PRACTICE_OPEN_ATTEMPTS'] = int(os.environ.get('PRACTICE_OPEN_ATTEMPTS', 5))
+    
+    # Practice sessions per user per month that count towards the leaderboard
+    app.config['PRACTICE_CREDITED_SESSIONS'] = int(os.environ.get('PRACTICE_CREDITED_SESSIONS', 30))
+    
+    # Estimated text+options similarity at which a new question counts as a near-duplicate
+    app.config['QUESTION_DUPLICATE_THRESHOLD'] = float(os.environ.get('QUESTION_DUPLICATE_THRESHOLD', 0.8))
+    
     # MongoDB/Redis configuration for logging
     mongodb_url = os.environ.get('MONGO_URI', 'mongodb://localhost:27017/')
     redis_url = os.environ.get('REDIS_URL', None)
@@ -82,12 +115,14 @@ def create_app():
     
     # Initialize MongoDB or Redis for logging
     global mongo_client
+    app.redis_client = None  # Shared by cache version counters when Redis is configured
     try:
         if redis_url and redis_url.startswith('redis://'):
             # Use Redis for logging instead of MongoDB on free tier
             import redis
             redis_client = redis.from_url(redis_url)
             app.mongo_db = redis_client  # Use Redis client as logging backend
+            app.redis_client = redis_client
             print("✅ Connected to Redis for logging")
         else:
             # Use MongoDB for logging
@@ -1,8 +1,15 @@
 from .user import User
 from .quiz_question import QuizQuestion
+from .question_lsh_band import QuestionLSHBand
 from .challenge import Challenge
+from .challenge_attempt import ChallengeAttempt
+from .challenge_question import ChallengeQuestion
+from .practice_attempt import PracticeAttempt
 from .quiz_result import QuizResult
 from .leaderboard import Leaderboard
+from .leaderboard_snapshot import LeaderboardSnapshot
+from .segment_leaderboard import SegmentLeaderboard
 from .admin import Admin
+from .cache_version import CacheVersion
 
-__all__ = ['User', 'QuizQuestion', 'Challenge', 'QuizResult', 'Leaderboard', 'Admin']
+__all__ = ['User', 'QuizQuestion', 'QuestionLSHBand', 'Challenge', 'ChallengeAttempt', 'ChallengeQuestion', 'PracticeAttempt', 'QuizResult', 'Leaderboard', 'LeaderboardSnapshot', 'SegmentLeaderboard', 'Admin', 'CacheVersion']
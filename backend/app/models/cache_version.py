@@ -0,0 +1,15 @@
+from app import db
+from datetime import datetime
+
+class CacheVersion(db.Model):
+    """Shared cache version counter for deployments without Redis"""
+    name = db.Column(db.String(100), primary_key=True)  # namespace:version:key
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'version': self.version,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -1,5 +1,6 @@
 from app import db
 from datetime import datetime
+from sqlalchemy import Index, text
 import random
 import string
 
@@ -15,6 +16,15 @@ class Challenge(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
     
+    # Partial indexes over active challenges back the newest-first listing,
+    # with and without an exam_type filter
+    __table_args__ = (
+        Index('ix_challenge_active_id', 'id',
+              postgresql_where=text('is_active = true'), sqlite_where=text('is_active = 1')),
+        Index('ix_challenge_active_exam_type', 'exam_type', 'id',
+              postgresql_where=text('is_active = true'), sqlite_where=text('is_active = 1')),
+    )
+    
     def __init__(self, **kwargs):
         super(Challenge, self).__init__(**kwargs)
         if not self.code:
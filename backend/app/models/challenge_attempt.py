@@ -0,0 +1,46 @@
+from app import db
+from datetime import datetime
+from sqlalchemy import Index
+
+# One character per served question: the correct option index in base 36
+_KEY_DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+class ChallengeAttempt(db.Model):
+    """Question set served by one play of a challenge, scored on submit"""
+    id = db.Column(db.Integer, primary_key=True)
+    challenge_id = db.Column(db.Integer, db.ForeignKey('challenge.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    question_ids = db.Column(db.JSON, nullable=False)  # in the order served
+    answer_key = db.Column(db.Text, nullable=False)  # see encode_answer_key
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    submitted_at = db.Column(db.DateTime, nullable=True)
+    
+    __table_args__ = (
+        Index('ix_challenge_attempt_user_challenge', 'user_id', 'challenge_id', 'created_at'),
+    )
+    
+    @staticmethod
+    def encode_answer_key(answers):
+        """One digit per answer index; raises ValueError for an index the key cannot hold"""
+        digits = []
+        for position, answer in enumerate(answers):
+            if isinstance(answer, bool) or not isinstance(answer, int) or not 0 <= answer < len(_KEY_DIGITS):
+                raise ValueError(
+                    f"Answer {answer!r} at position {position} is not an option index between 0 and {len(_KEY_DIGITS) - 1}"
+                )
+            digits.append(_KEY_DIGITS[answer])
+        return ''.join(digits)
+    
+    @staticmethod
+    def decode_answer_key(answer_key):
+        return [_KEY_DIGITS.index(digit) for digit in answer_key]
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'challenge_id': self.challenge_id,
+            'user_id': self.user_id,
+            'question_ids': self.question_ids,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'submitted_at': self.submitted_at.isoformat() if self.submitted_at else None
+        }
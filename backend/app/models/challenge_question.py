@@ -0,0 +1,23 @@
+from app import db
+from sqlalchemy import UniqueConstraint, Index
+
+class ChallengeQuestion(db.Model):
+    """Ordered question roster fixed when a challenge is created"""
+    id = db.Column(db.Integer, primary_key=True)
+    challenge_id = db.Column(db.Integer, db.ForeignKey('challenge.id', ondelete='CASCADE'), nullable=False)
+    question_id = db.Column(db.Integer, db.ForeignKey('quiz_question.id', ondelete='CASCADE'), nullable=False)
+    position = db.Column(db.Integer, nullable=False)
+    
+    # The unique index also serves the roster join, read in position order;
+    # question_id is indexed for the cascade when a question is deleted
+    __table_args__ = (
+        UniqueConstraint('challenge_id', 'position', name='unique_challenge_question_position'),
+        Index('ix_challenge_question_question', 'question_id'),
+    )
+    
+    def to_dict(self):
+        return {
+            'challenge_id': self.challenge_id,
+            'question_id': self.question_id,
+            'position': self.position
+        }
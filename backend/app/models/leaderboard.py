@@ -1,5 +1,6 @@
 from app import db
 from datetime import datetime
+from sqlalchemy import UniqueConstraint
 
 class Leaderboard(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -10,6 +11,11 @@ class Leaderboard(db.Model):
     challenges_completed = db.Column(db.Integer, default=0)
     last_updated = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # One row per user per month, so submits can upsert atomically
+    __table_args__ = (
+        UniqueConstraint('user_id', 'month', 'year', name='unique_user_month_leaderboard'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
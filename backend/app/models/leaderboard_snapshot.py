@@ -0,0 +1,34 @@
+from app import db
+from datetime import datetime
+from sqlalchemy import UniqueConstraint, Index
+
+class LeaderboardSnapshot(db.Model):
+    """Read-only archive of a finished month's leaderboard with precomputed ranks"""
+    id = db.Column(db.Integer, primary_key=True)
+    period = db.Column(db.Integer, nullable=False)  # yyyymm
+    rank = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    username = db.Column(db.String(80), nullable=False)  # as of the rollover
+    total_score = db.Column(db.Integer, nullable=False, default=0)
+    challenges_completed = db.Column(db.Integer, nullable=False, default=0)
+    last_updated = db.Column(db.DateTime)
+    frozen_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Pages are rank ranges within a period; "me" lookups hit (period, user_id)
+    __table_args__ = (
+        UniqueConstraint('period', 'user_id', name='unique_snapshot_period_user'),
+        Index('ix_leaderboard_snapshot_period_rank', 'period', 'rank'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'period': self.period,
+            'rank': self.rank,
+            'user_id': self.user_id,
+            'username': self.username,
+            'total_score': self.total_score,
+            'challenges_completed': self.challenges_completed,
+            'last_updated': self.last_updated.isoformat() if self.last_updated else None,
+            'frozen_at': self.frozen_at.isoformat() if self.frozen_at else None
+        }
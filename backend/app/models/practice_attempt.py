@@ -0,0 +1,25 @@
+from app import db
+from datetime import datetime
+from sqlalchemy import Index
+
+class PracticeAttempt(db.Model):
+    """Question set served for one practice session, scored once on check or submit"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    question_ids = db.Column(db.JSON, nullable=False)  # in the order served
+    answer_key = db.Column(db.Text, nullable=False)  # see ChallengeAttempt.encode_answer_key
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    submitted_at = db.Column(db.DateTime, nullable=True)
+    
+    __table_args__ = (
+        Index('ix_practice_attempt_user_created', 'user_id', 'created_at'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'question_ids': self.question_ids,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'submitted_at': self.submitted_at.isoformat() if self.submitted_at else None
+        }
@@ -0,0 +1,16 @@
+from app import db
+from sqlalchemy import Index
+
+class QuestionLSHBand(db.Model):
+    """One LSH band bucket of a question's MinHash signature"""
+    id = db.Column(db.Integer, primary_key=True)
+    question_id = db.Column(db.Integer, db.ForeignKey('quiz_question.id', ondelete='CASCADE'), nullable=False)
+    band = db.Column(db.SmallInteger, nullable=False)
+    bucket = db.Column(db.BigInteger, nullable=False)
+    
+    # Candidate lookups probe (band, bucket); question_id is indexed for the
+    # cascade and for replacing a question's bands after an edit
+    __table_args__ = (
+        Index('ix_question_lsh_band_bucket', 'band', 'bucket'),
+        Index('ix_question_lsh_band_question', 'question_id'),
+    )
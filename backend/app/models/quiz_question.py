@@ -1,4 +1,5 @@
 from app import db
+import sqlalchemy as sa
 
 class QuizQuestion(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -10,6 +11,19 @@ class QuizQuestion(db.Model):
     hint = db.Column(db.Text, nullable=True)  # Optional hint for tough questions
     is_active = db.Column(db.Boolean, nullable=False, default=True)  # For soft delete
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+    # MinHash of text + options, kept by question_dedupe; deferred so pool reads skip it
+    minhash = sa.orm.deferred(db.Column(db.Text, nullable=True))
+    
+    lsh_bands = db.relationship('QuestionLSHBand', cascade='all, delete-orphan', lazy='select')
+    
+    # Play and practice select active questions by exam type and difficulty;
+    # the trailing id serves the id-ordered pools and index-only sampling.
+    # Admin lists questions newest first.
+    __table_args__ = (
+        sa.Index('ix_quiz_question_active_exam_difficulty', 'exam_type', 'difficulty', 'id',
+                 postgresql_where=sa.text('is_active = true'), sqlite_where=sa.text('is_active = 1')),
+        sa.Index('ix_quiz_question_created_at', 'created_at', 'id'),
+    )
     
     def to_dict(self):
         return {
@@ -1,11 +1,19 @@
 from app import db
 from datetime import datetime
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import UniqueConstraint, Index
+from sqlalchemy.orm import validates
+
+
+def period_key(when=None):
+    """Return the yyyymm bucket used to index results by calendar month"""
+    when = when or datetime.utcnow()
+    return when.year * 100 + when.month
+
 
 class QuizResult(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    challenge_id = db.Column(db.Integer, db.ForeignKey('challenge.id'), nullable=False)
+    challenge_id = db.Column(db.Integer, db.ForeignKey('challenge.id'), nullable=True)  # None for practice results
     score = db.Column(db.Integer, nullable=False)
     total_questions = db.Column(db.Integer, nullable=False)
     correct_answers = db.Column(db.Integer, nullable=False)
@@ -13,9 +21,23 @@ class QuizResult(db.Model):
     time_taken = db.Column(db.Integer, nullable=False)  # in seconds
     submitted_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    period = db.Column(db.Integer, nullable=True)  # yyyymm of submitted_at, kept in sync below
     
     # Ensure one result per user per challenge
-    __table_args__ = (UniqueConstraint('user_id', 'challenge_id', name='unique_user_challenge_result'),)
+    __table_args__ = (
+        UniqueConstraint('user_id', 'challenge_id', name='unique_user_challenge_result'),
+        Index('ix_quiz_result_period_user', 'period', 'user_id'),
+    )
+    
+    def __init__(self, **kwargs):
+        super(QuizResult, self).__init__(**kwargs)
+        if self.submitted_at is None:
+            self.submitted_at = datetime.utcnow()
+    
+    @validates('submitted_at')
+    def _sync_period(self, key, value):
+        self.period = period_key(value) if value else None
+        return value
     
     def to_dict(self):
         return {
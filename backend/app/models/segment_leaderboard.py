@@ -0,0 +1,35 @@
+from app import db
+from datetime import datetime
+from sqlalchemy import UniqueConstraint, Index
+
+# Segment difficulty covering every difficulty of an exam type
+ALL_DIFFICULTIES = '*'
+
+class SegmentLeaderboard(db.Model):
+    """Monthly totals per exam type (and difficulty), maintained on challenge submit"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    exam_type = db.Column(db.String(50), nullable=False)
+    difficulty = db.Column(db.String(20), nullable=False, default=ALL_DIFFICULTIES)
+    period = db.Column(db.Integer, nullable=False)  # yyyymm
+    total_score = db.Column(db.Integer, default=0)
+    challenges_completed = db.Column(db.Integer, default=0)
+    last_updated = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # A segment board is one range read on (exam_type, difficulty, period) in score order
+    __table_args__ = (
+        UniqueConstraint('exam_type', 'difficulty', 'period', 'user_id', name='unique_segment_period_user'),
+        Index('ix_segment_leaderboard_board', 'exam_type', 'difficulty', 'period', 'total_score', 'user_id'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'exam_type': self.exam_type,
+            'difficulty': self.difficulty,
+            'period': self.period,
+            'total_score': self.total_score,
+            'challenges_completed': self.challenges_completed,
+            'last_updated': self.last_updated.isoformat() if self.last_updated else None
+        }
@@ -1,4 +1,4 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db, limiter
 from app.models import User, QuizQuestion, Challenge, QuizResult
@@ -6,6 +6,9 @@ from datetime import datetime
 import re
 import os
 from app.services.pdf_extractor import get_extractor
+from app.services.question_dedupe import DuplicateDetector
+from app.services.question_pool import invalidate_question_caches
+from app.services.question_search import question_listing, search_questions, search_terms
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -48,13 +51,53 @@ def get_questions():
     # Only return active questions by default
     include_inactive = request.args.get('include_inactive', 'false').lower() == 'true'
     
-    if include_inactive:
-        questions = QuizQuestion.query.all()
-    else:
-        questions = QuizQuestion.query.filter_by(is_active=True).all()
+    questions = question_listing(include_inactive).all()
     
     return jsonify({'questions': [q.to_dict() for q in questions]}), 200
 
+@admin_bp.route('/questions/search', methods=['GET'])
+@jwt_required()
+def search_question_bank():
+    """
+    Full-text search over question text and hints, best match first.
+    
+    Query params: q (every word matched as a prefix), exam_type,
+    difficulty, include_inactive, limit and offset.
+    """
+    current_user_id = get_jwt_identity()
+    
+    if not isinstance(current_user_id, str) or not current_user_id.startswith('admin_'):
+        return jsonify({'error': 'Admin access required'}), 403
+    
+    query = request.args.get('q', '').strip()
+    if not search_terms(query):
+        return jsonify({'error': 'q must contain at least one word'}), 400
+    
+    try:
+        limit = int(request.args.get('limit', 50))
+        offset = int(request.args.get('offset', 0))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'limit and offset must be integers'}), 400
+    if not 1 <= limit <= 100 or offset < 0:
+        return jsonify({'error': 'limit must be between 1 and 100 and offset must not be negative'}), 400
+    
+    # One extra row tells whether another page exists
+    questions = search_questions(
+        query,
+        exam_type=request.args.get('exam_type'),
+        difficulty=request.args.get('difficulty'),
+        include_inactive=request.args.get('include_inactive', 'false').lower() == 'true',
+        limit=limit + 1,
+        offset=offset
+    )
+    
+    return jsonify({
+        'questions': [q.to_dict() for q in questions[:limit]],
+        'limit': limit,
+        'offset': offset,
+        'has_more': len(questions) > limit
+    }), 200
+
 @admin_bp.route('/questions', methods=['POST'])
 @jwt_required()
 def create_question():
@@ -73,10 +116,19 @@ def create_question():
         exam_type=data.get('exam_type')
     )
     
+    # Hand-written questions are saved regardless; the admin decides what to do with a match
+    detector = DuplicateDetector(current_app.config['QUESTION_DUPLICATE_THRESHOLD'])
+    signature, duplicate = detector.find(question.text, question.options)
+    detector.add(question, signature)
+    
     db.session.add(question)
     db.session.commit()
+    invalidate_question_caches()
     
-    return jsonify({'question': question.to_dict()}), 201
+    response = {'question': question.to_dict()}
+    if duplicate:
+        response['near_duplicate_of'] = {'question_id': duplicate.question_id, 'similarity': round(duplicate.similarity, 3)}
+    return jsonify(response), 201
 
 @admin_bp.route('/questions/<int:question_id>', methods=['PUT'])
 @jwt_required()
@@ -96,6 +148,7 @@ def update_question(question_id):
     question.exam_type = data.get('exam_type', question.exam_type)
     
     db.session.commit()
+    invalidate_question_caches()
     
     return jsonify({'question': question.to_dict()}), 200
 
@@ -110,6 +163,7 @@ def delete_question(question_id):
     question = QuizQuestion.query.get_or_404(question_id)
     db.session.delete(question)
     db.session.commit()
+    invalidate_question_caches()
     
     return jsonify({'message': 'Question deleted successfully'}), 200
 
@@ -193,9 +247,18 @@ def upload_pdf():
             extractor = get_extractor()
             questions_extracted = extractor.extract_questions_from_text(text, exam_type, difficulty_mode)
             
-            # Save extracted questions to database
+            # Save extracted questions to database, skipping near-duplicates of the bank
+            # and of earlier questions in this PDF unless the admin allows them
+            allow_duplicates = request.form.get('allow_duplicates', 'false').lower() == 'true'
+            detector = DuplicateDetector(current_app.config['QUESTION_DUPLICATE_THRESHOLD'])
             saved_questions = []
+            duplicates = []
             for q_data in questions_extracted:
+                signature, duplicate = detector.find(q_data['question'], q_data['options'])
+                if duplicate and not allow_duplicates:
+                    duplicates.append((q_data, duplicate))
+                    continue
+                
                 question = QuizQuestion(
                     text=q_data['question'],
                     options=q_data['options'],
@@ -204,10 +267,14 @@ def upload_pdf():
                     exam_type=q_data['exam_type'],
                     hint=q_data.get('hint')
                 )
+                detector.add(question, signature)
                 db.session.add(question)
                 saved_questions.append(q_data)
             
             db.session.commit()
+            invalidate_question_caches()
+            if duplicates:
+                current_app.logger.info(f"🧬 Skipped {len(duplicates)} near-duplicate questions from {file.filename}")
             
             # Log the upload in MongoDB
             from app import mongo_client
@@ -219,6 +286,7 @@ def upload_pdf():
                 'file_size': os.path.getsize(filepath),
                 'status': 'processed',
                 'questions_extracted': len(saved_questions),
+                'duplicates_skipped': len(duplicates),
                 'exam_type': exam_type
             }
             
@@ -252,7 +320,15 @@ def upload_pdf():
                     'total_saved': len(saved_questions),
                     'exam_type': exam_type,
                     'difficulty_mode': difficulty_mode
-                }
+                },
+                'duplicates_skipped': [
+                    {
+                        'question': q_data['question'],
+                        'duplicate_of': duplicate.question_id,
+                        'similarity': round(duplicate.similarity, 3)
+                    }
+                    for q_data, duplicate in duplicates
+                ]
             }), 200
             
         except Exception as e:
@@ -309,6 +385,7 @@ def delete_bulk_questions():
         # For now, we'll just handle the questions table
         
         db.session.commit()
+        invalidate_question_caches()
         
         return jsonify({
             'message': f'Successfully deleted {success_count} questions',
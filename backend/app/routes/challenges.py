@@ -1,9 +1,19 @@
 from flask import Blueprint, jsonify, request, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
-from app.models import Challenge, QuizQuestion, QuizResult, User
-from datetime import datetime
-import random
+from app.models import Challenge, QuizResult
+from app.services.idempotency import idempotent
+from app.services.challenge_cache import get_challenge, get_challenge_by_code
+from app.services.challenge_roster import build_roster, is_open, open_since, questions_for_user, submittable_since
+from app.services.question_pool import questions_json
+from app.services.question_availability import available_questions, challenge_tiers, resolve_tier
+from app.services.challenge_attempts import (
+    AttemptError, create_attempt, has_completed, resolve_attempt, score_attempt
+)
+from app.services.submission_pipeline import Submission, record_submission
+from app.services.scoring import MAX_SCORED_QUESTIONS, ScoringError
+from app.services.leaderboard_ranking import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, encode_cursor_payload, decode_cursor_payload
+from app.utils.json_utils import spliced_json_response
 import logging
 
 challenges_bp = Blueprint('challenges', __name__)
@@ -39,19 +49,43 @@ def create_challenge():
                 'error': f'You already have an active challenge named "{challenge_name}". Please choose a different name.'
             }), 409
         
+        exam_type = data.get('exam_type')
+        difficulty = data.get('difficulty')
+        if not exam_type or not difficulty:
+            return jsonify({'error': 'Exam type and difficulty are required'}), 400
+        
+        try:
+            question_count = int(data.get('question_count', 10))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'question_count must be a number'}), 400
+        if not 1 <= question_count <= MAX_SCORED_QUESTIONS:
+            return jsonify({'error': f'question_count must be between 1 and {MAX_SCORED_QUESTIONS}'}), 400
+        
+        # Refuse challenges that no fallback tier can fill
+        if resolve_tier(challenge_tiers(exam_type, difficulty), needed=question_count) is None:
+            available = available_questions()
+            current_app.logger.warning(f"🚫 Challenge needs {question_count} questions, only {available} available")
+            return jsonify({
+                'error': f'Not enough questions available for this challenge ({available} available, {question_count} requested). Please choose fewer questions.'
+            }), 400
+        
         challenge = Challenge(
             name=challenge_name,
-            exam_type=data.get('exam_type'),
-            difficulty=data.get('difficulty'),
-            question_count=data.get('question_count', 10),
+            exam_type=exam_type,
+            difficulty=difficulty,
+            question_count=question_count,
             time_limit=data.get('time_limit', 30),
             created_by=int(current_user_id)
         )
         
         db.session.add(challenge)
+        db.session.flush()
+        
+        # Resolve the question set once; every participant plays this roster
+        roster = build_roster(challenge)
         db.session.commit()
         
-        current_app.logger.info(f"✅ Challenge created successfully: ID={challenge.id}, Code={challenge.code}")
+        current_app.logger.info(f"✅ Challenge created successfully: ID={challenge.id}, Code={challenge.code}, questions={len(roster)}")
         return jsonify({'challenge': challenge.to_dict()}), 201
         
     except Exception as e:
@@ -62,53 +96,59 @@ def create_challenge():
 @challenges_bp.route('/active', methods=['GET'])
 @jwt_required()
 def get_active_challenges():
-    current_user_id = get_jwt_identity()
+    """
+    Open challenges the caller has not completed, newest first.
     
-    current_app.logger.info(f"📋 Active challenges request from user: {current_user_id}")
-    
-    # Skip admin users
-    if isinstance(current_user_id, str) and current_user_id.startswith('admin_'):
-        challenges = Challenge.query.filter_by(is_active=True).all()
-        current_app.logger.info(f"👑 Admin user: returning {len(challenges)} active challenges")
-        return jsonify({'challenges': [c.to_dict() for c in challenges]}), 200
-    
-    # Get all active challenges first
-    all_active_challenges = Challenge.query.filter_by(is_active=True).all()
-    current_app.logger.info(f"🏆 Found {len(all_active_challenges)} total active challenges")
-    
-    # Get challenges user hasn't completed
-    completed_challenge_ids = db.session.query(QuizResult.challenge_id).filter_by(
-        user_id=int(current_user_id)
-    ).subquery()
-    
-    completed_ids = [row[0] for row in db.session.query(QuizResult.challenge_id).filter_by(
-        user_id=int(current_user_id)
-    ).all()]
-    
-    current_app.logger.info(f"✅ User {current_user_id} has completed challenges: {completed_ids}")
+    Query params: limit, cursor (from next_cursor), exam_type.
+    """
+    current_user_id = get_jwt_identity()
+    exam_type = request.args.get('exam_type')
     
-    active_challenges = Challenge.query.filter(
-        Challenge.is_active == True,
-        ~Challenge.id.in_(completed_challenge_ids)
-    ).all()
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'limit must be an integer'}), 400
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        return jsonify({'error': f'limit must be between 1 and {MAX_PAGE_SIZE}'}), 400
+    
+    query = Challenge.query.filter(Challenge.is_active == True, Challenge.created_at >= open_since())
+    if exam_type:
+        query = query.filter(Challenge.exam_type == exam_type)
+    
+    # Admins see every active challenge; users only those without a result
+    if not (isinstance(current_user_id, str) and current_user_id.startswith('admin_')):
+        completed = db.session.query(QuizResult.id).filter(
+            QuizResult.user_id == int(current_user_id),
+            QuizResult.challenge_id == Challenge.id
+        )
+        query = query.filter(~completed.exists())
     
-    # Log details about filtered challenges
-    user_created_challenges = [c for c in all_active_challenges if c.created_by == int(current_user_id)]
-    current_app.logger.info(f"👤 User {current_user_id} has created {len(user_created_challenges)} challenges")
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            query = query.filter(Challenge.id < int(decode_cursor_payload(cursor)['i']))
+        except (ValueError, KeyError, TypeError) as e:
+            return jsonify({'error': f'Invalid cursor: {e}'}), 400
     
-    for challenge in user_created_challenges:
-        in_active_list = challenge in active_challenges
-        current_app.logger.info(f"   Challenge '{challenge.name}' (ID={challenge.id}) - In active list: {in_active_list}")
+    challenges = query.order_by(Challenge.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(challenges) > limit:
+        challenges = challenges[:limit]
+        next_cursor = encode_cursor_payload({'i': challenges[-1].id})
     
-    current_app.logger.info(f"📤 Returning {len(active_challenges)} active challenges to user {current_user_id}")
-    return jsonify({'challenges': [c.to_dict() for c in active_challenges]}), 200
+    current_app.logger.info(f"📤 Returning {len(challenges)} active challenges to user {current_user_id}")
+    return jsonify({
+        'challenges': [c.to_dict() for c in challenges],
+        'limit': limit,
+        'next_cursor': next_cursor
+    }), 200
 
 @challenges_bp.route('/join/<code>', methods=['POST'])
 @jwt_required()
 def join_challenge(code):
-    challenge = Challenge.query.filter_by(code=code.upper(), is_active=True).first()
-    if not challenge:
-        return jsonify({'error': 'Challenge not found or inactive'}), 404
+    challenge = get_challenge_by_code(code)
+    if not challenge or not is_open(challenge):
+        return jsonify({'error': 'Challenge not found or no longer open'}), 404
     
     return jsonify({'challenge': challenge.to_dict(), 'message': 'Successfully joined challenge'}), 200
 
@@ -118,70 +158,44 @@ def get_challenge_questions(challenge_id):
     current_user_id = get_jwt_identity()
     current_app.logger.info(f"🎮 Challenge play request: Challenge={challenge_id}, User={current_user_id}")
     
-    challenge = Challenge.query.get_or_404(challenge_id)
+    challenge = get_challenge(challenge_id)
+    if challenge is None:
+        return jsonify({'error': 'Challenge not found'}), 404
     current_app.logger.info(f"✅ Challenge found: {challenge.name} (exam_type={challenge.exam_type}, difficulty={challenge.difficulty}, question_count={challenge.question_count})")
     
-    # Get questions based on challenge criteria with multiple fallback strategies
-    questions = QuizQuestion.query.filter_by(
-        exam_type=challenge.exam_type,
-        difficulty=challenge.difficulty,
-        is_active=True
-    ).all()
+    is_admin = isinstance(current_user_id, str) and current_user_id.startswith('admin_')
     
-    current_app.logger.info(f"📋 Found {len(questions)} questions for exam_type={challenge.exam_type}, difficulty={challenge.difficulty}")
+    if not is_admin and not is_open(challenge):
+        return jsonify({'error': 'This challenge is no longer open'}), 410
     
-    if not questions:
-        current_app.logger.warning(f"❌ No questions found for exact challenge criteria!")
-        
-        # Fallback 1: Try any difficulty for this exam_type
-        fallback_questions = QuizQuestion.query.filter_by(
-            exam_type=challenge.exam_type,
-            is_active=True
-        ).all()
-        current_app.logger.info(f"🔄 Fallback 1: Found {len(fallback_questions)} questions for exam_type={challenge.exam_type} (any difficulty)")
-        
-        if fallback_questions:
-            questions = fallback_questions
-            current_app.logger.info(f"✅ Using exam_type fallback questions")
-        else:
-            # Fallback 2: Try similar exam types (CBSE 11 -> CBSE 12, etc.)
-            similar_exam_types = []
-            if 'CBSE' in challenge.exam_type:
-                similar_exam_types = ['CBSE 11', 'CBSE 12']
-            elif 'JEE' in challenge.exam_type:
-                similar_exam_types = ['JEE Main', 'JEE Advanced']
-            else:
-                similar_exam_types = ['General', 'Science', 'Math']
-            
-            similar_questions = QuizQuestion.query.filter(
-                QuizQuestion.exam_type.in_(similar_exam_types),
-                QuizQuestion.is_active == True
-            ).all()
-            current_app.logger.info(f"🔄 Fallback 2: Found {len(similar_questions)} questions for similar exam types {similar_exam_types}")
-            
-            if similar_questions:
-                questions = similar_questions
-                current_app.logger.info(f"✅ Using similar exam type questions")
-            else:
-                # Fallback 3: Get any active questions
-                any_questions = QuizQuestion.query.filter_by(is_active=True).limit(20).all()
-                current_app.logger.info(f"🆘 Fallback 3 (Last resort): Using {len(any_questions)} random active questions")
-                questions = any_questions
+    # One scored play per user: submit reveals the answer key and the order below is stable
+    if not is_admin and has_completed(challenge_id, int(current_user_id)):
+        return jsonify({'error': 'You have already completed this challenge'}), 409
     
-    # Shuffle and take required number
-    import random
-    random.shuffle(questions)
-    selected_questions = questions[:challenge.question_count]
+    # Same roster for everyone; each user gets their own stable order
+    selected_questions = questions_for_user(challenge, current_user_id)
     
-    current_app.logger.info(f"🎯 Returning {len(selected_questions)} questions for challenge play")
-    
-    return jsonify({
-        'questions': [q.to_dict() for q in selected_questions], 
-        'challenge': challenge.to_dict()
-    }), 200
+    # Record exactly what was served so submit scores against the same set
+    attempt_id = None
+    if not is_admin and selected_questions:
+        try:
+            attempt_id = create_attempt(challenge_id, int(current_user_id), selected_questions).id
+        except ValueError as e:
+            current_app.logger.error(f"❌ Challenge {challenge_id} has a question with an invalid answer: {str(e)}")
+            return jsonify({'error': 'This challenge has a question with an invalid answer'}), 500
+    
+    current_app.logger.info(f"🎯 Returning {len(selected_questions)} questions for challenge play (attempt={attempt_id})")
+    
+    # Cached, answer-free question JSON is spliced in as-is
+    return spliced_json_response({
+        'questions': questions_json(selected_questions),
+        'challenge': challenge.to_dict(),
+        'attempt_id': attempt_id
+    })
 
 @challenges_bp.route('/<int:challenge_id>/submit', methods=['POST'])
 @jwt_required()
+@idempotent('challenge_submit')
 def submit_challenge(challenge_id):
     data = request.get_json()
     current_user_id = get_jwt_identity()
@@ -194,123 +208,51 @@ def submit_challenge(challenge_id):
         return jsonify({'error': 'Admins cannot submit challenges'}), 403
     
     try:
-        challenge = Challenge.query.get_or_404(challenge_id)
+        challenge = get_challenge(challenge_id)
+        if challenge is None:
+            return jsonify({'error': 'Challenge not found'}), 404
+        # Plays served before the challenge closed can still be submitted for a while
+        if not is_open(challenge, since=submittable_since()):
+            return jsonify({'error': 'This challenge is no longer open'}), 410
         current_app.logger.info(f"✅ Challenge found: {challenge.name} (ID={challenge_id})")
         
         answers = data.get('answers', {})
-    
-        # Calculate score using same logic as play endpoint
-        # Get the same questions that were shown to the user during play
-        questions = QuizQuestion.query.filter_by(
-            exam_type=challenge.exam_type,
-            difficulty=challenge.difficulty,
-            is_active=True
-        ).all()
-        
-        # Apply same fallback logic as in play endpoint
-        if not questions:
-            fallback_questions = QuizQuestion.query.filter_by(
-                exam_type=challenge.exam_type,
-                is_active=True
-            ).all()
-            
-            if fallback_questions:
-                questions = fallback_questions
-            else:
-                # Similar exam types fallback
-                similar_exam_types = []
-                if 'CBSE' in challenge.exam_type:
-                    similar_exam_types = ['CBSE 11', 'CBSE 12']
-                elif 'JEE' in challenge.exam_type:
-                    similar_exam_types = ['JEE Main', 'JEE Advanced']
-                else:
-                    similar_exam_types = ['General', 'Science', 'Math']
-                
-                similar_questions = QuizQuestion.query.filter(
-                    QuizQuestion.exam_type.in_(similar_exam_types),
-                    QuizQuestion.is_active == True
-                ).all()
-                
-                if similar_questions:
-                    questions = similar_questions
-                else:
-                    questions = QuizQuestion.query.filter_by(is_active=True).all()
-        
-        # Shuffle and take the same number that would be shown during play
-        import random
-        random.shuffle(questions)
-        questions = questions[:challenge.question_count]
-        
-        current_app.logger.info(f"🧮 Found {len(questions)} questions for exam_type={challenge.exam_type}, difficulty={challenge.difficulty}")
         
-        correct_answers = 0
-        wrong_answers = 0
-        unanswered = 0
-        
-        for question in questions:
-            user_answer = answers.get(str(question.id))
-            if user_answer is not None:
-                if user_answer == question.answer:
-                    correct_answers += 1
-                    current_app.logger.debug(f"✅ Q{question.id}: Correct (user={user_answer}, correct={question.answer})")
-                else:
-                    wrong_answers += 1
-                    current_app.logger.debug(f"❌ Q{question.id}: Wrong (user={user_answer}, correct={question.answer})")
-            else:
-                unanswered += 1
-                current_app.logger.debug(f"⚪ Q{question.id}: Unanswered")
+        # Score against the question set recorded when this attempt was played
+        attempt_id = data.get('attempt_id')
+        try:
+            attempt_id = int(attempt_id) if attempt_id is not None else None
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid attempt ID'}), 400
+        try:
+            attempt = resolve_attempt(challenge_id, int(current_user_id), attempt_id)
+        except AttemptError as e:
+            current_app.logger.warning(f"❌ Invalid attempt for submission: {str(e)}")
+            return jsonify({'error': str(e)}), e.status_code
         
-        score = max(0, (correct_answers * 4) - (wrong_answers * 1))
+        try:
+            scorecard = score_attempt(attempt, answers)
+        except ScoringError as e:
+            return jsonify({'error': str(e)}), 400
         time_taken = data.get('time_taken', 0)
         
-        current_app.logger.info(f"📊 Score calculation: Correct={correct_answers}, Wrong={wrong_answers}, Unanswered={unanswered}, Score={score}")
-    
-        # Check for existing result
-        existing_result = QuizResult.query.filter_by(
-            user_id=int(current_user_id),
-            challenge_id=challenge_id
-        ).first()
-        
-        if existing_result:
-            current_app.logger.info(f"🔄 Updating existing result: Old score={existing_result.score}, New score={score}")
-            # Update existing result
-            existing_result.score = score
-            existing_result.total_questions = len(questions)
-            existing_result.correct_answers = correct_answers
-            existing_result.wrong_answers = wrong_answers
-            existing_result.time_taken = time_taken
-            existing_result.submitted_at = datetime.utcnow()
-            result = existing_result
-            message = 'Challenge updated successfully - your latest attempt has been recorded'
-        else:
-            current_app.logger.info(f"✨ Creating new quiz result for user {current_user_id}")
-            # Create new result
-            result = QuizResult(
-                user_id=int(current_user_id),
-                challenge_id=challenge_id,
-                score=score,
-                total_questions=len(questions),
-                correct_answers=correct_answers,
-                wrong_answers=wrong_answers,
-                time_taken=time_taken
-            )
-            db.session.add(result)
-            message = 'Challenge submitted successfully'
-        
-        # Commit the result first
-        db.session.commit()
-        current_app.logger.info(f"💾 Quiz result saved to database: Result ID={result.id}")
-        
-        # Update leaderboard data (force refresh for this user)
-        try:
-            update_user_leaderboard_stats(int(current_user_id))
-            current_app.logger.info(f"🏆 Leaderboard stats updated for user {current_user_id}")
-        except Exception as e:
-            current_app.logger.error(f"⚠️ Failed to update leaderboard: {str(e)}")
+        current_app.logger.info(f"📊 Score calculation: Correct={scorecard.correct_answers}, Wrong={scorecard.wrong_answers}, Unanswered={scorecard.unanswered}, Score={scorecard.score}")
+    
+        # Claims the attempt and writes the result and leaderboard deltas in
+        # one transaction, batched with concurrent submits when group commit is on
+        outcome = record_submission(Submission(
+            attempt, challenge, scorecard.score, scorecard.correct_answers, scorecard.wrong_answers, time_taken
+        ))
+        if not outcome.claimed:
+            return jsonify({'error': 'This attempt has already been submitted'}), 409
+        current_app.logger.info(f"💾 Quiz result and leaderboard saved: Result ID={outcome.result['id']}")
         
+        # Answers are only revealed once the attempt is submitted; no further
+        # attempt can be played or submitted after this (see resolve_attempt)
         return jsonify({
-            'result': result.to_dict(),
-            'message': message
+            'result': outcome.result,
+            'message': outcome.message,
+            'answer_key': {str(question_id): answer for question_id, answer in zip(attempt.question_ids, attempt.answers)}
         }), 200
         
     except Exception as e:
@@ -348,48 +290,3 @@ def get_completed_challenges():
     
     return jsonify({'challenges': completed_challenges}), 200
 
-
-def update_user_leaderboard_stats(user_id):
-    """Update leaderboard stats for a specific user after challenge completion"""
-    from app.models import Leaderboard
-    from sqlalchemy import func
-    
-    current_month = datetime.now().month
-    current_year = datetime.now().year
-    
-    # Calculate user's monthly stats
-    monthly_results = QuizResult.query.filter(
-        QuizResult.user_id == user_id,
-        func.extract('month', QuizResult.submitted_at) == current_month,
-        func.extract('year', QuizResult.submitted_at) == current_year
-    ).all()
-    
-    total_score = sum(result.score for result in monthly_results)
-    challenges_completed = len(monthly_results)
-    
-    current_app.logger.info(f"📊 User {user_id} monthly stats: Score={total_score}, Completed={challenges_completed}")
-    
-    # Update or create leaderboard entry
-    leaderboard_entry = Leaderboard.query.filter_by(
-        user_id=user_id,
-        month=current_month,
-        year=current_year
-    ).first()
-    
-    if leaderboard_entry:
-        leaderboard_entry.total_score = total_score
-        leaderboard_entry.challenges_completed = challenges_completed
-        leaderboard_entry.last_updated = datetime.utcnow()
-        current_app.logger.info(f"🔄 Updated leaderboard entry for user {user_id}")
-    else:
-        leaderboard_entry = Leaderboard(
-            user_id=user_id,
-            month=current_month,
-            year=current_year,
-            total_score=total_score,
-            challenges_completed=challenges_completed
-        )
-        db.session.add(leaderboard_entry)
-        current_app.logger.info(f"✨ Created new leaderboard entry for user {user_id}")
-    
-    db.session.commit()
@@ -3,11 +3,31 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models import Challenge, QuizResult, User, Leaderboard, Admin, QuizQuestion
 from sqlalchemy import func, desc
+from app.services.leaderboard_service import leaderboard_period, month_period_filter, reconcile_leaderboard
+from app.services.leaderboard_cache import leaderboard_cache_stats
+from app.services.leaderboard_store import get_leaderboard_store
+from app.services.question_pool import pool_cache_stats
 from datetime import datetime
 import os
 
 debug_bp = Blueprint('debug', __name__)
 
+
+def _parse_period_args(source):
+    """Read optional month/year values, defaulting to the current leaderboard period"""
+    current_month, current_year = leaderboard_period()
+    try:
+        month = int(source.get('month', current_month))
+        year = int(source.get('year', current_year))
+    except (TypeError, ValueError):
+        return None, None, 'month and year must be integers'
+    
+    if not 1 <= month <= 12:
+        return None, None, 'month must be between 1 and 12'
+    
+    return month, year, None
+
+
 @debug_bp.route('/database/status', methods=['GET'])
 def get_database_status():
     """Check database status and table existence (no auth required)"""
@@ -124,13 +144,11 @@ def get_user_debug_data(user_id):
         leaderboard_entries = Leaderboard.query.filter_by(user_id=user_id).all()
         
         # Calculate current month stats
-        current_month = datetime.now().month
-        current_year = datetime.now().year
+        current_month, current_year = leaderboard_period()
         
         monthly_results = QuizResult.query.filter(
-            QuizResult.user_id == user_id,
-            func.extract('month', QuizResult.submitted_at) == current_month,
-            func.extract('year', QuizResult.submitted_at) == current_year
+            month_period_filter(current_month, current_year),
+            QuizResult.user_id == user_id
         ).all()
         
         calculated_monthly_score = sum(result.score for result in monthly_results)
@@ -235,44 +253,22 @@ def check_database_consistency():
         total_results = QuizResult.query.count()
         total_leaderboard_entries = Leaderboard.query.count()
         
-        # Check for orphaned records
+        # Check for orphaned records; practice results have no challenge by design
         orphaned_results = db.session.query(QuizResult).outerjoin(
             Challenge, QuizResult.challenge_id == Challenge.id
-        ).filter(Challenge.id.is_(None)).count()
+        ).filter(QuizResult.challenge_id.isnot(None), Challenge.id.is_(None)).count()
         
         orphaned_leaderboard = db.session.query(Leaderboard).outerjoin(
             User, Leaderboard.user_id == User.id
         ).filter(User.id.is_(None)).count()
         
-        # Check current month leaderboard accuracy
-        current_month = datetime.now().month
-        current_year = datetime.now().year
+        # Check leaderboard accuracy for the requested month (defaults to current)
+        month, year, period_error = _parse_period_args(request.args)
+        if period_error:
+            return jsonify({'error': period_error}), 400
         
-        inconsistent_leaderboards = []
-        leaderboard_entries = Leaderboard.query.filter_by(
-            month=current_month, year=current_year
-        ).all()
-        
-        for entry in leaderboard_entries:
-            # Recalculate user's monthly stats
-            monthly_results = QuizResult.query.filter(
-                QuizResult.user_id == entry.user_id,
-                func.extract('month', QuizResult.submitted_at) == current_month,
-                func.extract('year', QuizResult.submitted_at) == current_year
-            ).all()
-            
-            calculated_score = sum(r.score for r in monthly_results)
-            calculated_completed = len(monthly_results)
-            
-            if (entry.total_score != calculated_score or 
-                entry.challenges_completed != calculated_completed):
-                inconsistent_leaderboards.append({
-                    'user_id': entry.user_id,
-                    'stored_score': entry.total_score,
-                    'calculated_score': calculated_score,
-                    'stored_completed': entry.challenges_completed,
-                    'calculated_completed': calculated_completed
-                })
+        reconciliation = reconcile_leaderboard(month, year, apply=False)
+        inconsistent_leaderboards = reconciliation['inconsistencies']
         
         consistency_data = {
             'totals': {
@@ -286,9 +282,10 @@ def check_database_consistency():
                 'leaderboard_entries_without_user': orphaned_leaderboard
             },
             'leaderboard_inconsistencies': inconsistent_leaderboards,
+            'duplicate_leaderboard_entries': reconciliation['duplicate_entries'],
             'current_period': {
-                'month': current_month,
-                'year': current_year
+                'month': month,
+                'year': year
             },
             'recommendations': []
         }
@@ -309,6 +306,11 @@ def check_database_consistency():
                 f"Fix {len(inconsistent_leaderboards)} inconsistent leaderboard entries"
             )
         
+        if reconciliation['duplicate_entries']:
+            consistency_data['recommendations'].append(
+                f"Remove {reconciliation['duplicate_entries']} duplicate leaderboard entries"
+            )
+        
         current_app.logger.info(f"✅ Consistency check completed")
         return jsonify(consistency_data), 200
         
@@ -329,61 +331,21 @@ def fix_leaderboard_inconsistencies():
     try:
         current_app.logger.info("🔧 Starting leaderboard fix")
         
-        current_month = datetime.now().month
-        current_year = datetime.now().year
-        
-        # Get all users with quiz results this month
-        users_with_results = db.session.query(QuizResult.user_id).filter(
-            func.extract('month', QuizResult.submitted_at) == current_month,
-            func.extract('year', QuizResult.submitted_at) == current_year
-        ).distinct().all()
-        
-        fixed_count = 0
-        created_count = 0
-        
-        for (user_id,) in users_with_results:
-            # Recalculate user's monthly stats
-            monthly_results = QuizResult.query.filter(
-                QuizResult.user_id == user_id,
-                func.extract('month', QuizResult.submitted_at) == current_month,
-                func.extract('year', QuizResult.submitted_at) == current_year
-            ).all()
-            
-            calculated_score = sum(r.score for r in monthly_results)
-            calculated_completed = len(monthly_results)
-            
-            # Find or create leaderboard entry
-            entry = Leaderboard.query.filter_by(
-                user_id=user_id,
-                month=current_month,
-                year=current_year
-            ).first()
-            
-            if entry:
-                if (entry.total_score != calculated_score or 
-                    entry.challenges_completed != calculated_completed):
-                    entry.total_score = calculated_score
-                    entry.challenges_completed = calculated_completed
-                    entry.last_updated = datetime.utcnow()
-                    fixed_count += 1
-            else:
-                entry = Leaderboard(
-                    user_id=user_id,
-                    month=current_month,
-                    year=current_year,
-                    total_score=calculated_score,
-                    challenges_completed=calculated_completed
-                )
-                db.session.add(entry)
-                created_count += 1
-        
-        db.session.commit()
-        
-        current_app.logger.info(f"✅ Leaderboard fix completed: {fixed_count} fixed, {created_count} created")
+        # Month/year may come from the JSON body or the query string
+        month, year, period_error = _parse_period_args(request.get_json(silent=True) or request.args)
+        if period_error:
+            return jsonify({'error': period_error}), 400
+        
+        summary = reconcile_leaderboard(month, year, apply=True)
+        
+        current_app.logger.info(f"✅ Leaderboard fix completed: {summary['fixed_entries']} fixed, {summary['created_entries']} created")
         return jsonify({
             'message': 'Leaderboard inconsistencies fixed',
-            'fixed_entries': fixed_count,
-            'created_entries': created_count
+            'month': month,
+            'year': year,
+            'fixed_entries': summary['fixed_entries'],
+            'created_entries': summary['created_entries'],
+            'removed_entries': summary['removed_entries']
         }), 200
         
     except Exception as e:
@@ -391,6 +353,23 @@ def fix_leaderboard_inconsistencies():
         db.session.rollback()
         return jsonify({'error': f'Failed to fix leaderboard: {str(e)}'}), 500
 
+@debug_bp.route('/cache/stats', methods=['GET'])
+@jwt_required()
+def get_cache_stats():
+    """Hit/miss statistics for the in-process response caches"""
+    current_user_id = get_jwt_identity()
+    
+    # Only allow admins
+    if not (isinstance(current_user_id, str) and current_user_id.startswith('admin_')):
+        return jsonify({'error': 'Admin access required'}), 403
+    
+    return jsonify({
+        'leaderboard_responses': leaderboard_cache_stats(),
+        'question_pool': pool_cache_stats(),
+        'shared_versions': bool(getattr(current_app, 'redis_client', None)),
+        'leaderboard_backend': getattr(get_leaderboard_store(), 'name', 'sql')
+    }), 200
+
 @debug_bp.route('/extraction/logs', methods=['GET'])
 @jwt_required()
 def get_extraction_logs():
@@ -717,8 +696,7 @@ def get_user_results_forensic(user_id):
             stats['avg_score'] = stats['total_score'] / stats['challenges_completed'] if stats['challenges_completed'] > 0 else 0
         
         # Get current leaderboard entry
-        current_month = datetime.now().month
-        current_year = datetime.now().year
+        current_month, current_year = leaderboard_period()
         current_leaderboard = Leaderboard.query.filter_by(
             user_id=user_id,
             month=current_month,
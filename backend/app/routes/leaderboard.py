@@ -1,13 +1,162 @@
-from flask import Blueprint, jsonify, request, current_app
+from flask import Blueprint, Response, jsonify, request, current_app, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
-from app.models import Leaderboard, User, QuizResult, Challenge
-from sqlalchemy import func, desc
-from datetime import datetime
+from app.models import Leaderboard, LeaderboardSnapshot, SegmentLeaderboard, User, QuizResult, Challenge
+from app.models.segment_leaderboard import ALL_DIFFICULTIES
+from app.services.leaderboard_service import leaderboard_period, ensure_store_board, store_board_name, is_period_archived
+from app.services.leaderboard_ranking import RankedBoard, SortedSetBoard, SnapshotBoard, InvalidCursor, parse_page_args
+from app.services.leaderboard_cache import cached_leaderboard_response, global_board_key, challenge_board_key, segment_board_key
+from app.services.leaderboard_events import (
+    broker, challenge_channel, global_channel, issue_stream_token, max_streams_per_worker, read_stream_token,
+    stream_lifetime, stream_slots, stream_token_ttl
+)
+from app.services.challenge_cache import get_challenge
+import json
 import logging
+import queue
+import time
 
 leaderboard_bp = Blueprint('leaderboard', __name__)
 
+
+def _caller_user_id(current_user_id):
+    """Return the numeric user id of the caller, or None for admins"""
+    if isinstance(current_user_id, str) and current_user_id.startswith('admin_'):
+        return None
+    return int(current_user_id)
+
+
+def _global_board(month, year):
+    """
+    Monthly board: total score desc, lower user id wins ties.
+    
+    Months not yet archived are ranked by the sorted-set store when one is
+    configured, so rank lookups are a ZREVRANK; without a store they use
+    keyset queries on the Leaderboard table, where a rank lookup counts the
+    rows ahead (O(rank)). Archived months are read from snapshots instead.
+    """
+    query = db.session.query(
+        Leaderboard.id,
+        Leaderboard.user_id,
+        User.username,
+        Leaderboard.total_score,
+        Leaderboard.challenges_completed,
+        Leaderboard.last_updated
+    ).join(User, User.id == Leaderboard.user_id).filter(
+        Leaderboard.month == month,
+        Leaderboard.year == year
+    )
+    
+    store = ensure_store_board(month, year)
+    if store is None:
+        return RankedBoard(query, Leaderboard.total_score, [Leaderboard.user_id], Leaderboard.user_id)
+    
+    def load_rows(user_ids):
+        return {row.user_id: row for row in query.filter(Leaderboard.user_id.in_(user_ids)).all()}
+    
+    return SortedSetBoard(store, store_board_name(month, year), load_rows)
+
+
+def _format_global_entry(rank, row):
+    return {
+        'id': row.id,
+        'user_id': row.user_id,
+        'username': row.username,
+        'total_score': row.total_score,
+        'challenges_completed': row.challenges_completed,
+        'last_updated': row.last_updated.isoformat() if row.last_updated else None,
+        'rank': rank
+    }
+
+
+def _snapshot_board(month, year):
+    """Archived month: rows and ranks frozen at rollover"""
+    query = LeaderboardSnapshot.query.filter(LeaderboardSnapshot.period == year * 100 + month)
+    return SnapshotBoard(query, LeaderboardSnapshot.rank, LeaderboardSnapshot.user_id)
+
+
+def _segment_board(exam_type, difficulty, month, year):
+    """Exam-type board (optionally one difficulty): one range read on the segment index"""
+    query = db.session.query(
+        SegmentLeaderboard.id,
+        SegmentLeaderboard.user_id,
+        User.username,
+        SegmentLeaderboard.total_score,
+        SegmentLeaderboard.challenges_completed,
+        SegmentLeaderboard.last_updated
+    ).join(User, User.id == SegmentLeaderboard.user_id).filter(
+        SegmentLeaderboard.exam_type == exam_type,
+        SegmentLeaderboard.difficulty == difficulty,
+        SegmentLeaderboard.period == year * 100 + month
+    )
+    return RankedBoard(query, SegmentLeaderboard.total_score, [SegmentLeaderboard.user_id], SegmentLeaderboard.user_id)
+
+
+def _parse_period(value):
+    """Parse a YYYY-MM period argument into (month, year); returns (None, None) if malformed"""
+    try:
+        year, month = (int(part) for part in value.split('-'))
+    except (ValueError, AttributeError):
+        return None, None
+    if len(value) != 7 or not 1 <= month <= 12:
+        return None, None
+    return month, year
+
+
+def _challenge_board(challenge_id):
+    """Per-challenge board: score desc, earlier submission wins ties"""
+    query = db.session.query(
+        QuizResult.user_id,
+        User.username,
+        QuizResult.score,
+        QuizResult.correct_answers,
+        QuizResult.wrong_answers,
+        QuizResult.submitted_at
+    ).join(User, User.id == QuizResult.user_id).filter(
+        QuizResult.challenge_id == challenge_id
+    )
+    return RankedBoard(query, QuizResult.score, [QuizResult.submitted_at, QuizResult.user_id], QuizResult.user_id)
+
+
+def _format_challenge_entry(rank, row):
+    return {
+        'id': rank,
+        'rank': rank,
+        'user_id': row.user_id,
+        'username': row.username,
+        'score': row.score,
+        'correct_answers': row.correct_answers,
+        'wrong_answers': row.wrong_answers,
+        'submitted_at': row.submitted_at.isoformat() if row.submitted_at else None
+    }
+
+
+def _ranked_response(board, options, user_id, format_entry):
+    """Build the paginated payload, plus the caller's rank and neighbours when asked"""
+    page, next_cursor = board.page(options['limit'], options['cursor'])
+    payload = {
+        'leaderboard': [format_entry(rank, row) for rank, row in page],
+        'next_cursor': next_cursor,
+        'limit': options['limit']
+    }
+    
+    if options['me']:
+        me = board.entry_for(user_id) if user_id is not None else None
+        payload['me'] = None
+        if me:
+            rank, me_row = me
+            payload['me'] = format_entry(rank, me_row)
+            if options['around']:
+                payload['around'] = [format_entry(r, row) for r, row in board.around(me_row, rank, options['around'])]
+    
+    return payload
+
+
+def _cache_variant(options, user_id):
+    """Cache key part for a request: page options, plus the caller when personalised"""
+    return (options['limit'], options['cursor'], options['around'], user_id if options['me'] else None)
+
+
 # Handle CORS preflight explicitly to avoid redirects and auth checks
 @leaderboard_bp.route('', methods=['OPTIONS'], strict_slashes=False)
 @leaderboard_bp.route('/', methods=['OPTIONS'], strict_slashes=False)
@@ -32,143 +181,80 @@ def get_leaderboard():
             current_app.logger.error(f"❌ Invalid challenge_id: {challenge_id}")
             return jsonify({'error': 'Invalid challenge ID'}), 400
     
+    options, options_error = parse_page_args(request.args)
+    if options_error:
+        return jsonify({'error': options_error}), 400
+    
     try:
         if leaderboard_type == 'challenge' and challenge_id:
             # Challenge-specific leaderboard
             current_app.logger.info(f"🎯 Getting challenge leaderboard for challenge {challenge_id}")
             
             # First verify the challenge exists
-            challenge = Challenge.query.get(challenge_id)
+            challenge = get_challenge(challenge_id)
             if not challenge:
                 current_app.logger.error(f"❌ Challenge {challenge_id} not found")
                 return jsonify({'error': 'Challenge not found'}), 404
-                
-            current_app.logger.info(f"✅ Challenge found: {challenge.name}")
-            
-            # Get individual results for this specific challenge (not aggregated)
-            results = db.session.query(
-                QuizResult.user_id,
-                User.username,
-                QuizResult.score,
-                QuizResult.correct_answers,
-                QuizResult.wrong_answers,
-                QuizResult.submitted_at
-            ).join(User).filter(
-                QuizResult.challenge_id == challenge_id
-            ).order_by(
-                desc(QuizResult.score),
-                QuizResult.submitted_at.asc()  # Earlier submission wins ties
-            ).all()
             
-            current_app.logger.info(f"📊 Found {len(results)} results for challenge {challenge_id}")
-            
-            leaderboard = []
-            for i, result in enumerate(results, 1):
-                leaderboard.append({
-                    'id': i,
-                    'user_id': result.user_id,
-                    'username': result.username,
-                    'score': result.score,
-                    'correct_answers': result.correct_answers,
-                    'wrong_answers': result.wrong_answers,
-                    'submitted_at': result.submitted_at.isoformat() if result.submitted_at else None
-                })
-        else:
-            # Global leaderboard (monthly)
-            current_month = datetime.now().month
-            current_year = datetime.now().year
-            
-            current_app.logger.info(f"🌍 Getting global leaderboard for {current_month}/{current_year}")
-            
-            # Always refresh leaderboard entries to ensure real-time data
-            current_app.logger.info(f"🔄 Refreshing leaderboard entries for current month")
-            users = User.query.all()
-            current_app.logger.info(f"👥 Found {len(users)} users to process")
+            user_id = _caller_user_id(current_user_id)
+            return cached_leaderboard_response(
+                challenge_board_key(challenge_id),
+                _cache_variant(options, user_id),
+                lambda: _ranked_response(
+                    _challenge_board(challenge_id), options,
+                    user_id, _format_challenge_entry
+                )
+            )
+        elif leaderboard_type == 'exam':
+            # Segmented leaderboard (monthly, per exam type and optionally difficulty)
+            exam_type = request.args.get('exam_type')
+            difficulty = request.args.get('difficulty') or ALL_DIFFICULTIES
+            if not exam_type:
+                return jsonify({'error': 'exam_type is required for exam leaderboards'}), 400
             
-            if not users:
-                # No users exist, return empty leaderboard
-                current_app.logger.warning(f"⚠️ No users found in database")
-                return jsonify({'leaderboard': []}), 200
+            month, year = leaderboard_period()
+            if request.args.get('period'):
+                month, year = _parse_period(request.args['period'])
+                if month is None:
+                    return jsonify({'error': 'period must be formatted as YYYY-MM'}), 400
             
-            # Clear existing entries for current month to refresh data
-            try:
-                existing_entries = Leaderboard.query.filter(
-                    Leaderboard.month == current_month,
-                    Leaderboard.year == current_year
-                ).all()
-                for entry in existing_entries:
-                    db.session.delete(entry)
-                current_app.logger.info(f"🗑️ Cleared {len(existing_entries)} existing leaderboard entries")
-            except Exception as clear_error:
-                current_app.logger.error(f"❌ Failed to clear existing entries: {clear_error}")
+            current_app.logger.info(f"📚 Getting {exam_type}/{difficulty} leaderboard for {month}/{year}")
             
-            # Create fresh leaderboard entries for current month
-            for user in users:
-                # Calculate total score and challenges completed for current month
-                monthly_results = QuizResult.query.filter(
-                    QuizResult.user_id == user.id,
-                    func.extract('month', QuizResult.submitted_at) == current_month,
-                    func.extract('year', QuizResult.submitted_at) == current_year
-                ).all()
-                
-                total_score = sum(result.score for result in monthly_results)
-                challenges_completed = len(monthly_results)
-                
-                current_app.logger.debug(f"📄 User {user.username}: score={total_score}, completed={challenges_completed}")
-                
-                leaderboard_entry = Leaderboard(
-                    user_id=user.id,
-                    month=current_month,
-                    year=current_year,
-                    total_score=total_score,
-                    challenges_completed=challenges_completed
+            user_id = _caller_user_id(current_user_id)
+            return cached_leaderboard_response(
+                segment_board_key(exam_type, difficulty, month, year),
+                _cache_variant(options, user_id),
+                lambda: _ranked_response(
+                    _segment_board(exam_type, difficulty, month, year), options,
+                    user_id, _format_global_entry
                 )
-                db.session.add(leaderboard_entry)
-            
-            try:
-                db.session.commit()
-                current_app.logger.info(f"✅ Created fresh leaderboard entries for {len(users)} users")
-            except Exception as commit_error:
-                current_app.logger.error(f"❌ Failed to commit leaderboard entries: {commit_error}")
-                db.session.rollback()
-                # Fall back to empty leaderboard rather than crashing
-                return jsonify({'leaderboard': [], 'error': 'Failed to create leaderboard entries'}), 200
+            )
+        else:
+            # Global leaderboard (monthly) - rows are maintained on submit,
+            # so this is a single indexed read with no side effects.
+            # ?period=YYYY-MM selects a past month, served from its snapshot
+            # once it has been rolled over.
+            month, year = leaderboard_period()
+            if request.args.get('period'):
+                month, year = _parse_period(request.args['period'])
+                if month is None:
+                    return jsonify({'error': 'period must be formatted as YYYY-MM'}), 400
             
-            # Join with users and sort by score
-            try:
-                results = db.session.query(
-                    Leaderboard,
-                    User.username
-                ).join(User).filter(
-                    Leaderboard.month == current_month,
-                    Leaderboard.year == current_year
-                ).order_by(desc(Leaderboard.total_score)).all()
-                
-                current_app.logger.info(f"📉 Retrieved {len(results)} leaderboard results")
-                
-            except Exception as query_error:
-                current_app.logger.error(f"❌ Failed to query leaderboard results: {query_error}")
-                return jsonify({'leaderboard': [], 'error': 'Failed to retrieve leaderboard data'}), 200
+            current_app.logger.info(f"🌍 Getting global leaderboard for {month}/{year}")
             
-            leaderboard = []
-            for i, (entry, username) in enumerate(results, 1):
-                try:
-                    leaderboard.append({
-                        'id': entry.id,
-                        'user_id': entry.user_id,
-                        'username': username,
-                        'total_score': entry.total_score,
-                        'challenges_completed': entry.challenges_completed,
-                        'last_updated': entry.last_updated.isoformat() if entry.last_updated else None,
-                        'rank': i
-                    })
-                except Exception as format_error:
-                    current_app.logger.error(f"❌ Error formatting leaderboard entry: {format_error}")
-                    continue
-        
-        current_app.logger.info(f"✅ Leaderboard retrieved successfully: {len(leaderboard)} entries")
-        return jsonify({'leaderboard': leaderboard}), 200
-        
+            archived = (month, year) != leaderboard_period() and is_period_archived(month, year)
+            user_id = _caller_user_id(current_user_id)
+            return cached_leaderboard_response(
+                global_board_key(month, year),
+                _cache_variant(options, user_id),
+                lambda: _ranked_response(
+                    _snapshot_board(month, year) if archived else _global_board(month, year), options,
+                    user_id, _format_global_entry
+                )
+            )
+    
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         current_app.logger.error(f"❌ Leaderboard error: {str(e)}")
         return jsonify({'error': f'Failed to fetch leaderboard: {str(e)}'}), 500
@@ -186,39 +272,96 @@ def get_challenge_leaderboard(challenge_id):
     
     current_app.logger.info(f"🎯 Specific challenge leaderboard request: challenge_id={challenge_id}, user={current_user_id}")
     
+    options, options_error = parse_page_args(request.args)
+    if options_error:
+        return jsonify({'error': options_error}), 400
+    
     try:
-        # Get all results for this challenge
-        results = db.session.query(
-        QuizResult.user_id,
-        User.username,
-        QuizResult.score,
-        QuizResult.correct_answers,
-        QuizResult.wrong_answers,
-        QuizResult.submitted_at
-    ).join(User).filter(
-        QuizResult.challenge_id == challenge_id
-    ).order_by(
-        desc(QuizResult.score),
-        QuizResult.submitted_at.asc()  # Earlier submission wins in case of tie
-        ).all()
-        
-        current_app.logger.info(f"📊 Found {len(results)} results for specific challenge {challenge_id}")
-        
-        leaderboard = []
-        for i, result in enumerate(results, 1):
-            leaderboard.append({
-                'id': i,
-                'user_id': result.user_id,
-                'username': result.username,
-                'score': result.score,
-                'correct_answers': result.correct_answers,
-                'wrong_answers': result.wrong_answers,
-                'submitted_at': result.submitted_at.isoformat() if result.submitted_at else None
-            })
-        
-        current_app.logger.info(f"✅ Challenge leaderboard retrieved: {len(leaderboard)} entries")
-        return jsonify({'leaderboard': leaderboard}), 200
-        
+        user_id = _caller_user_id(current_user_id)
+        return cached_leaderboard_response(
+            challenge_board_key(challenge_id),
+            _cache_variant(options, user_id),
+            lambda: _ranked_response(
+                _challenge_board(challenge_id), options,
+                user_id, _format_challenge_entry
+            )
+        )
+    
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         current_app.logger.error(f"❌ Challenge leaderboard error: {str(e)}")
         return jsonify({'error': f'Failed to fetch challenge leaderboard: {str(e)}'}), 500
+
+
+@leaderboard_bp.route('/stream-token', methods=['POST'])
+@jwt_required()
+def leaderboard_stream_token():
+    """Short-lived token for opening the leaderboard stream with EventSource"""
+    return jsonify({
+        'token': issue_stream_token(get_jwt_identity()),
+        'expires_in': stream_token_ttl()
+    }), 200
+
+
+@leaderboard_bp.route('/stream', methods=['GET'])
+def stream_leaderboard():
+    """
+    Server-Sent Events stream of live board changes.
+    
+    With challenge_id the stream carries `challenge_result` events for that
+    challenge, otherwise `global_score` events for the current month. Clients
+    apply them to the board they already hold; `resync` asks for a refetch.
+    EventSource cannot set headers, so the caller passes ?token= from
+    POST /stream-token instead of its JWT; the token stays valid for the
+    reconnect after a stream is recycled. A worker already holding its
+    share of streams answers 503 and the client retries later.
+    """
+    identity = read_stream_token(request.args.get('token', ''))
+    if identity is None:
+        return jsonify({'error': 'Invalid or expired stream token'}), 401
+    
+    challenge_id = request.args.get('challenge_id')
+    if challenge_id:
+        try:
+            channel = challenge_channel(int(challenge_id))
+        except (ValueError, TypeError):
+            return jsonify({'error': 'Invalid challenge ID'}), 400
+    else:
+        channel = global_channel(*leaderboard_period())
+    
+    # Streams are recycled periodically; EventSource reconnects on its own
+    keepalive = current_app.config.get('LEADERBOARD_STREAM_KEEPALIVE', 15)
+    lifetime = stream_lifetime()
+    max_streams = max_streams_per_worker()
+    if not stream_slots.acquire(max_streams):
+        current_app.logger.warning(f"⚠️ Leaderboard stream refused: {max_streams} streams already open in this worker")
+        response = jsonify({'error': 'Too many live leaderboard streams, retry shortly'})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+    
+    subscription = broker.subscribe(channel)
+    current_app.logger.info(f"📡 Leaderboard stream opened: {channel}, user={identity}")
+    
+    def events():
+        try:
+            yield 'retry: 3000\n\n'
+            deadline = time.monotonic() + lifetime
+            while time.monotonic() < deadline:
+                try:
+                    event = subscription.get(timeout=keepalive)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+        finally:
+            broker.unsubscribe(channel, subscription)
+    
+    response = Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # Runs however the stream ends, even if the generator never started
+    response.call_on_close(stream_slots.release)
+    return response
@@ -2,12 +2,34 @@ from flask import Blueprint, jsonify, request, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models import QuizQuestion
+from app.services.question_availability import resolve_tier
+from app.services.question_pool import question_pool, question_pool_ids, question_records, questions_json
+from app.services.question_sampling import sample_question_ids
+from app.services.leaderboard_ranking import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, encode_cursor_payload, decode_cursor_payload
+from app.services.idempotency import idempotent
+from app.services.challenge_attempts import AttemptError
+from app.services.practice_attempts import (
+    claim_practice_attempt, create_practice_attempt, practice_questions, resolve_practice_attempt, score_practice_attempt
+)
+from app.services.scoring import ScoringError
+from app.utils.json_utils import spliced_json_response
+import bisect
 
 quizzes_bp = Blueprint('quizzes', __name__)
 
 @quizzes_bp.route('/questions', methods=['GET'])
 @jwt_required()
 def get_questions():
+    """
+    Active practice questions, without answers.
+    
+    Query params: exam_type, difficulty, and either sample (N random
+    questions) or limit and cursor (from next_cursor) to page by id.
+    Questions on an open challenge's roster are left out. Each sampled set
+    served to a user is recorded as a practice session; answers are scored
+    against it by passing its attempt_id to POST /practice/check or
+    /practice/submit. Cursor pages are for browsing and record nothing.
+    """
     current_user_id = get_jwt_identity()
     exam_type = request.args.get('exam_type')
     difficulty = request.args.get('difficulty')
@@ -15,86 +37,192 @@ def get_questions():
     current_app.logger.info(f"🎮 Practice questions request: User={current_user_id}, exam_type={exam_type}, difficulty={difficulty}")
     
     try:
-        query = QuizQuestion.query
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+        sample = request.args.get('sample')
+        sample = int(sample) if sample is not None else None
+    except (TypeError, ValueError):
+        return jsonify({'error': 'limit and sample must be integers'}), 400
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        return jsonify({'error': f'limit must be between 1 and {MAX_PAGE_SIZE}'}), 400
+    if sample is not None and not 1 <= sample <= MAX_PAGE_SIZE:
+        return jsonify({'error': f'sample must be between 1 and {MAX_PAGE_SIZE}'}), 400
+    
+    after_id = None
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            after_id = int(decode_cursor_payload(cursor)['i'])
+        except (ValueError, KeyError, TypeError) as e:
+            return jsonify({'error': f'Invalid cursor: {e}'}), 400
+    
+    try:
+        requested = {}
         if exam_type:
-            query = query.filter_by(exam_type=exam_type)
+            requested['exam_type'] = exam_type
         if difficulty:
-            query = query.filter_by(difficulty=difficulty)
+            requested['difficulty'] = difficulty
         
-        questions = query.all()
-        current_app.logger.info(f"📋 Found {len(questions)} questions for exam_type={exam_type}, difficulty={difficulty}")
+        # Pick the fallback tier from the cached availability matrix, then read only that pool
+        tiers = [('exact', requested)]
+        if exam_type and difficulty:
+            tiers.append(('exam_type', {'exam_type': exam_type}))
+        tiers.append(('any', {}))
+        tier = resolve_tier(tiers)
+        if tier is None:
+            return spliced_json_response({'questions': [], 'limit': limit, 'next_cursor': None, 'attempt_id': None})
         
-        if not questions:
-            current_app.logger.warning(f"⚠️ No questions found for exact criteria, trying fallback...")
-            # Fallback 1: Try just exam_type
-            fallback_questions = QuizQuestion.query.filter_by(exam_type=exam_type).all() if exam_type else []
-            current_app.logger.info(f"🔄 Fallback exam_type only: Found {len(fallback_questions)} questions")
-            
-            if fallback_questions:
-                questions = fallback_questions
-                current_app.logger.info("✅ Using exam_type fallback questions")
-            else:
-                # Fallback 2: Get any questions (last resort)
-                any_questions = QuizQuestion.query.limit(20).all()
-                current_app.logger.info(f"🆘 Last resort: Found {len(any_questions)} random questions")
-                questions = any_questions
+        name, criteria, available = tier
+        if name != 'exact':
+            current_app.logger.warning(f"⚠️ No questions found for exam_type={exam_type}, difficulty={difficulty}, using '{name}' tier")
+        
+        next_cursor = None
+        if sample is not None:
+            # Oversample so the set stays full after roster questions are dropped
+            sampled = question_records(sample_question_ids(sample * 2, population=available, **criteria))
+            questions = practice_questions(sampled)[:sample]
+        else:
+            pool = question_pool(**criteria)
+            start = bisect.bisect_right(question_pool_ids(**criteria), after_id) if after_id is not None else 0
+            page = pool[start:start + limit]
+            questions = practice_questions(page)
+            if start + limit < len(pool):
+                next_cursor = encode_cursor_payload({'i': page[-1].id})
+        
+        # Record the sampled session; checks and submits are scored against it
+        attempt_id = None
+        if sample is not None and questions and not (isinstance(current_user_id, str) and current_user_id.startswith('admin_')):
+            attempt_id = create_practice_attempt(int(current_user_id), questions).id
+        
+        current_app.logger.info(f"📋 Returning {len(questions)} questions for exam_type={exam_type}, difficulty={difficulty}")
         
-        return jsonify({'questions': [q.to_dict() for q in questions]}), 200
+        return spliced_json_response({
+            'questions': questions_json(questions),
+            'limit': sample if sample is not None else limit,
+            'next_cursor': next_cursor,
+            'attempt_id': attempt_id
+        })
         
     except Exception as e:
         current_app.logger.error(f"❌ Practice questions error: {str(e)}")
         return jsonify({'error': f'Failed to load questions: {str(e)}'}), 500
 
+@quizzes_bp.route('/practice/check', methods=['POST'])
+@jwt_required()
+def check_practice():
+    """
+    Score a practice session without submitting it.
+    
+    Body: attempt_id (from GET /questions) and answers ({question_id:
+    option index}); served questions without an answer count as
+    unanswered. Returns the totals only: the session stays open for
+    /practice/submit, so the answer key is not revealed here.
+    """
+    data = request.get_json() or {}
+    current_user_id = get_jwt_identity()
+    
+    if isinstance(current_user_id, str) and current_user_id.startswith('admin_'):
+        return jsonify({'error': 'Admins do not have practice sessions'}), 403
+    
+    try:
+        attempt_id = int(data.get('attempt_id'))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid attempt ID'}), 400
+    try:
+        attempt = resolve_practice_attempt(int(current_user_id), attempt_id)
+        scorecard, _ = score_practice_attempt(attempt, data.get('answers'))
+    except AttemptError as e:
+        return jsonify({'error': str(e)}), e.status_code
+    except ScoringError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify(scorecard._asdict()), 200
+
 @quizzes_bp.route('/practice/submit', methods=['POST'])
 @jwt_required()
+@idempotent('practice_submit')
 def submit_practice():
-    from app.models import QuizResult, Leaderboard
+    """
+    Score a practice session and add it to the monthly leaderboard.
+    
+    Body: attempt_id (from GET /questions), answers and time_taken. Each
+    session is submitted once; a repeat gets 409. Only the first
+    PRACTICE_CREDITED_SESSIONS sessions a month are added to the
+    leaderboard; later ones are scored but not recorded (credited: false).
+    """
+    from app.models import QuizResult
+    from app.models.quiz_result import period_key
+    from app.services.leaderboard_service import record_result_change, leaderboard_period
+    from app.services.leaderboard_cache import invalidate_boards
+    from app.services.leaderboard_events import publish_global_score
     from datetime import datetime
-    import random
     
-    data = request.get_json()
+    data = request.get_json() or {}
     current_user_id = get_jwt_identity()
     
     if isinstance(current_user_id, str) and current_user_id.startswith('admin_'):
         return jsonify({'error': 'Admins cannot submit practice results'}), 403
     
-    # Create a practice result entry
-    result = QuizResult(
-        user_id=int(current_user_id),
-        challenge_id=None,  # Practice mode, no specific challenge
-        score=data.get('score', 0),
-        total_questions=data.get('total', 0),
-        correct_answers=data.get('correct_answers', 0),
-        wrong_answers=data.get('wrong_answers', 0),
-        time_taken=data.get('time_taken', 0)
-    )
-    
-    db.session.add(result)
-    
-    # Update leaderboard for current month
-    current_month = datetime.now().month
-    current_year = datetime.now().year
-    
-    leaderboard_entry = Leaderboard.query.filter_by(
-        user_id=int(current_user_id),
-        month=current_month,
-        year=current_year
-    ).first()
-    
-    if leaderboard_entry:
-        leaderboard_entry.total_score += data.get('score', 0)
-        leaderboard_entry.challenges_completed += 1
-        leaderboard_entry.last_updated = datetime.utcnow()
+    # Score against the set recorded when the session was served; client totals are ignored
+    try:
+        attempt_id = int(data.get('attempt_id'))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid attempt ID'}), 400
+    try:
+        attempt = resolve_practice_attempt(int(current_user_id), attempt_id)
+        scorecard, answer_key = score_practice_attempt(attempt, data.get('answers'))
+    except AttemptError as e:
+        return jsonify({'error': str(e)}), e.status_code
+    except ScoringError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        # Claimed in the same transaction as the result, so a session is credited at most once
+        if not claim_practice_attempt(attempt):
+            db.session.rollback()
+            return jsonify({'error': 'This practice session has already been submitted'}), 409
+        
+        submitted_at = datetime.utcnow()
+        credited_sessions = QuizResult.query.filter(
+            QuizResult.period == period_key(submitted_at),
+            QuizResult.user_id == int(current_user_id),
+            QuizResult.challenge_id.is_(None)
+        ).count()
+        
+        result = None
+        if credited_sessions < current_app.config['PRACTICE_CREDITED_SESSIONS']:
+            # Create a practice result entry
+            result = QuizResult(
+                user_id=int(current_user_id),
+                challenge_id=None,  # Practice mode, no specific challenge
+                score=scorecard.score,
+                total_questions=scorecard.total_questions,
+                correct_answers=scorecard.correct_answers,
+                wrong_answers=scorecard.wrong_answers,
+                time_taken=data.get('time_taken', 0),
+                submitted_at=submitted_at
+            )
+            db.session.add(result)
+            
+            # Update leaderboard for the month of this submission
+            record_result_change(int(current_user_id), scorecard.score, submitted_at)
+        
+        db.session.commit()
+    except Exception as e:
+        current_app.logger.error(f"❌ Practice submission failed: {str(e)}")
+        db.session.rollback()
+        return jsonify({'error': f'Failed to submit practice results: {str(e)}'}), 500
+    
+    if result is not None:
+        invalidate_boards(periods=[leaderboard_period(submitted_at)])
+        publish_global_score(int(current_user_id), *leaderboard_period(submitted_at), scorecard.score)
+        message = 'Practice results submitted successfully'
     else:
-        leaderboard_entry = Leaderboard(
-            user_id=int(current_user_id),
-            month=current_month,
-            year=current_year,
-            total_score=data.get('score', 0),
-            challenges_completed=1
-        )
-        db.session.add(leaderboard_entry)
-    
-    db.session.commit()
-    
-    return jsonify({'message': 'Practice results submitted successfully'}), 200
+        message = 'Practice scored; this month\'s practice leaderboard limit is reached, so it was not added'
+    
+    return jsonify({
+        **scorecard._asdict(),
+        'message': message,
+        'credited': result is not None,
+        'result': result.to_dict() if result is not None else None,
+        'answer_key': {str(question_id): answer for question_id, answer in answer_key.items()}
+    }), 200
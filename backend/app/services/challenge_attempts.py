@@ -0,0 +1,160 @@
+"""
+Challenge attempts
+
+A play call records the exact questions served, in order, together with a
+compact answer key. Submit scores against that record instead of
+re-selecting questions, so the score always matches what the user saw.
+Keys are also cached per process, so a submit handled by the worker that
+served the play scores without reading the database.
+
+A user gets one scored result per challenge. Submit reveals the answer key,
+and /play serves every user the same order on each call, so once a result
+exists no further attempt can be played or submitted.
+"""
+from collections import namedtuple
+from datetime import datetime
+from sqlalchemy import update
+from app import db
+from app.models import ChallengeAttempt, QuizResult
+from app.services.scoring import parse_answers, score_answers
+from app.utils.cache import LRUCache
+
+# Long enough for the longest challenge time limit plus a slow submit
+ATTEMPT_CACHE_TTL = 6 * 60 * 60
+
+AttemptKey = namedtuple('AttemptKey', ['id', 'challenge_id', 'user_id', 'question_ids', 'answers'])
+
+_attempt_keys = LRUCache(max_entries=20000, ttl=ATTEMPT_CACHE_TTL)
+
+
+class AttemptError(ValueError):
+    """Raised when a submit cannot be matched to a playable attempt"""
+    
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _key_for(attempt):
+    return AttemptKey(
+        attempt.id,
+        attempt.challenge_id,
+        attempt.user_id,
+        list(attempt.question_ids),
+        ChallengeAttempt.decode_answer_key(attempt.answer_key)
+    )
+
+
+def has_completed(challenge_id, user_id):
+    """Whether the user already has a result for the challenge"""
+    return db.session.query(QuizResult.id).filter_by(
+        user_id=user_id,
+        challenge_id=challenge_id
+    ).first() is not None
+
+
+def create_attempt(challenge_id, user_id, questions):
+    """
+    Persist the served question set and cache its answer key.
+    
+    /play serves a user the same order on every call, so a reload reuses the
+    user's open attempt when it holds the same set instead of adding a row.
+    Raises ValueError if a question's answer cannot be encoded.
+    """
+    question_ids = [question.id for question in questions]
+    answer_key = ChallengeAttempt.encode_answer_key([question.answer for question in questions])
+    
+    attempt = ChallengeAttempt.query.filter_by(
+        user_id=user_id,
+        challenge_id=challenge_id,
+        submitted_at=None
+    ).order_by(ChallengeAttempt.created_at.desc()).first()
+    if attempt is None or list(attempt.question_ids) != question_ids or attempt.answer_key != answer_key:
+        attempt = ChallengeAttempt(
+            challenge_id=challenge_id,
+            user_id=user_id,
+            question_ids=question_ids,
+            answer_key=answer_key
+        )
+        db.session.add(attempt)
+        db.session.commit()
+    
+    _attempt_keys.set(attempt.id, _key_for(attempt))
+    return attempt
+
+
+def resolve_attempt(challenge_id, user_id, attempt_id=None):
+    """
+    Return the AttemptKey a submit should be scored against.
+    
+    Clients that do not send attempt_id get their latest unsubmitted attempt
+    for the challenge. Raises AttemptError (409) once the user has a result,
+    since the answer key has been revealed by then.
+    """
+    if has_completed(challenge_id, user_id):
+        raise AttemptError('You have already completed this challenge', 409)
+    
+    if attempt_id is None:
+        attempt = ChallengeAttempt.query.filter_by(
+            user_id=user_id,
+            challenge_id=challenge_id,
+            submitted_at=None
+        ).order_by(ChallengeAttempt.created_at.desc()).first()
+        if attempt is None:
+            raise AttemptError('No active attempt for this challenge. Please reload the challenge and try again.', 409)
+        key = _key_for(attempt)
+    else:
+        key = _attempt_keys.get(attempt_id)
+        if key is None:
+            attempt = db.session.get(ChallengeAttempt, attempt_id)
+            if attempt is None:
+                raise AttemptError('Attempt not found', 404)
+            key = _key_for(attempt)
+    
+    if key.user_id != user_id or key.challenge_id != challenge_id:
+        raise AttemptError('Attempt does not belong to this challenge', 403)
+    return key
+
+
+def mark_attempt_submitted(attempt_key):
+    """
+    Claim an attempt for submission in the caller's transaction.
+    
+    A conditional UPDATE makes each attempt single-use even when two submits
+    race; returns False if it was already submitted.
+    """
+    return attempt_key.id in claim_attempts([attempt_key])
+
+
+def claim_attempts(attempt_keys):
+    """
+    Claim several attempts with one conditional UPDATE in the caller's
+    transaction; returns the set of ids that were still unsubmitted.
+    """
+    attempt_ids = [attempt_key.id for attempt_key in attempt_keys]
+    if not attempt_ids:
+        return set()
+    
+    criteria = (ChallengeAttempt.id.in_(attempt_ids), ChallengeAttempt.submitted_at.is_(None))
+    if db.session.get_bind().dialect.update_returning:
+        claimed = set(db.session.execute(
+            update(ChallengeAttempt).where(*criteria).values(submitted_at=datetime.utcnow()).returning(ChallengeAttempt.id)
+        ).scalars())
+    else:
+        claimed = {
+            attempt_id for (attempt_id,) in
+            db.session.query(ChallengeAttempt.id).filter(*criteria).with_for_update()
+        }
+        if claimed:
+            ChallengeAttempt.query.filter(ChallengeAttempt.id.in_(claimed)).update(
+                {'submitted_at': datetime.utcnow()}, synchronize_session=False
+            )
+    
+    for attempt_id in attempt_ids:
+        _attempt_keys.pop(attempt_id)
+    return claimed
+
+
+def score_attempt(attempt_key, answers):
+    """ScoreCard for submitted answers ({question_id: option}) against the attempt's key"""
+    return score_answers(attempt_key.question_ids, attempt_key.answers, parse_answers(answers))
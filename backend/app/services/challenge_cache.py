@@ -0,0 +1,121 @@
+"""
+Read-through challenge metadata cache
+
+join, play, submit and the challenge leaderboard all look challenges up by
+id or code; a class joining the same code would otherwise repeat the same
+query for every student. Entries are cached per id and per code, unknown
+codes are cached as misses for a short time to blunt brute-force joins, and
+every committed change to a Challenge bumps its version so the next read
+reloads it. Versions are shared through Redis when configured; otherwise
+the TTLs bound how long other workers can serve a stale entry.
+"""
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app import db
+from app.models import Challenge
+from app.utils.cache import LRUCache, VersionRegistry
+
+CHALLENGE_TTL_SECONDS = 60
+MISSING_TTL_SECONDS = 10
+
+_PENDING_INVALIDATIONS = 'challenge_cache_invalidations'
+_MISSING = object()
+
+challenge_versions = VersionRegistry('challenges')
+_by_id = LRUCache(max_entries=4096, ttl=CHALLENGE_TTL_SECONDS)
+_code_ids = LRUCache(max_entries=8192, ttl=CHALLENGE_TTL_SECONDS)
+
+
+class ChallengeRecord:
+    """Read-only copy of a Challenge row"""
+    
+    __slots__ = ('id', 'name', 'code', 'exam_type', 'difficulty', 'question_count',
+                 'time_limit', 'created_by', 'created_at', 'is_active')
+    
+    def __init__(self, challenge):
+        for name in self.__slots__:
+            setattr(self, name, getattr(challenge, name))
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'code': self.code,
+            'exam_type': self.exam_type,
+            'difficulty': self.difficulty,
+            'question_count': self.question_count,
+            'time_limit': self.time_limit,
+            'created_by': self.created_by,
+            'created_at': self.created_at.isoformat(),
+            'is_active': self.is_active
+        }
+
+
+def _id_key(challenge_id):
+    return ('id', challenge_id)
+
+
+def _code_key(code):
+    return ('code', code)
+
+
+def get_challenge(challenge_id):
+    """Cached ChallengeRecord for an id, or None if there is no such challenge"""
+    version = challenge_versions.get(_id_key(challenge_id))
+    record = _by_id.get((challenge_id, version))
+    if record is None:
+        challenge = db.session.get(Challenge, challenge_id)
+        record = ChallengeRecord(challenge) if challenge is not None else _MISSING
+        _by_id.set((challenge_id, version), record, ttl=None if challenge is not None else MISSING_TTL_SECONDS)
+    return None if record is _MISSING else record
+
+
+def get_challenge_by_code(code):
+    """Cached ChallengeRecord for a join code, or None; unknown codes are cached as misses"""
+    code = code.upper()
+    version = challenge_versions.get(_code_key(code))
+    challenge_id = _code_ids.get((code, version))
+    if challenge_id is None:
+        challenge_id = db.session.query(Challenge.id).filter(Challenge.code == code).scalar()
+        if challenge_id is None:
+            _code_ids.set((code, version), _MISSING, ttl=MISSING_TTL_SECONDS)
+            return None
+        _code_ids.set((code, version), challenge_id)
+    if challenge_id is _MISSING:
+        return None
+    return get_challenge(challenge_id)
+
+
+def invalidate_challenge(challenge_id=None, code=None):
+    """Retire cached entries for a challenge id and/or join code"""
+    if challenge_id is not None:
+        challenge_versions.bump(_id_key(challenge_id))
+    if code is not None:
+        challenge_versions.bump(_code_key(code.upper()))
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_challenge_changes(session, flush_context):
+    """Remember challenges written in this transaction (new ones may fill a cached miss)"""
+    changed = [
+        instance for instance in list(session.new) + list(session.dirty) + list(session.deleted)
+        if isinstance(instance, Challenge)
+    ]
+    if changed:
+        pending = session.info.setdefault(_PENDING_INVALIDATIONS, set())
+        for challenge in changed:
+            pending.add((challenge.id, challenge.code))
+            # A changed code must also retire the old one
+            for old_code in inspect(challenge).attrs.code.history.deleted:
+                pending.add((None, old_code))
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_challenge_invalidations(session):
+    for challenge_id, code in session.info.pop(_PENDING_INVALIDATIONS, ()):
+        invalidate_challenge(challenge_id, code)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_challenge_invalidations(session):
+    session.info.pop(_PENDING_INVALIDATIONS, None)
@@ -0,0 +1,106 @@
+"""
+Challenge question rosters
+
+A challenge's questions are chosen once, when it is created, and stored in
+order in ChallengeQuestion. Every participant faces the same set; each user
+sees it in their own order, a permutation seeded by (challenge, user), so
+replaying the challenge gives the same order without another query.
+Challenges created before rosters existed get theirs on first play.
+
+A challenge is open for CHALLENGE_OPEN_DAYS after it is created. After that
+it can no longer be joined or played, plays already served can still be
+submitted for ATTEMPT_CACHE_TTL, and then its roster returns to the
+practice pool.
+"""
+import random
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import ChallengeQuestion
+from app.services.challenge_attempts import ATTEMPT_CACHE_TTL
+from app.services.question_availability import challenge_tiers, resolve_tier
+from app.services.question_pool import question_records
+from app.services.question_sampling import sample_questions
+
+
+def open_since():
+    """Creation time of the oldest challenge that can still be joined and played"""
+    return datetime.utcnow() - timedelta(days=current_app.config['CHALLENGE_OPEN_DAYS'])
+
+
+def submittable_since():
+    """Creation time of the oldest challenge whose served plays can still be submitted"""
+    return open_since() - timedelta(seconds=ATTEMPT_CACHE_TTL)
+
+
+def is_open(challenge, since=None):
+    """Whether a challenge (row or cached record) is active and created after `since` (default open_since())"""
+    return bool(challenge.is_active) and challenge.created_at >= (since or open_since())
+
+
+def select_questions(exam_type, difficulty, count):
+    """
+    Random questions for a challenge from the narrowest fallback tier that
+    can fill it. The tier is picked from the availability matrix, so only
+    one sampling query runs; only the chosen rows load.
+    """
+    tiers = challenge_tiers(exam_type, difficulty)
+    tier = resolve_tier(tiers, needed=count)
+    if tier is None:
+        # Nothing can fill it (older challenges were not checked at creation):
+        # serve the narrowest tier that has anything at all
+        tier = resolve_tier(tiers)
+        if tier is None:
+            current_app.logger.warning(f"❌ No active questions available for challenge selection!")
+            return []
+    
+    name, criteria, available = tier
+    if name != 'exact':
+        current_app.logger.warning(f"🔄 Not enough questions for exam_type={exam_type}, difficulty={difficulty}; using '{name}' tier")
+    questions = sample_questions(count, population=available, **criteria)
+    current_app.logger.info(f"📋 Sampled {len(questions)} of {available} questions from '{name}' tier {criteria}")
+    return questions
+
+
+def build_roster(challenge):
+    """Choose the challenge's questions and add its roster rows to the session (no commit)"""
+    questions = select_questions(challenge.exam_type, challenge.difficulty, challenge.question_count)
+    
+    db.session.add_all([
+        ChallengeQuestion(challenge_id=challenge.id, question_id=question.id, position=position)
+        for position, question in enumerate(questions)
+    ])
+    return questions
+
+
+def _load_roster(challenge_id):
+    # Only the ordered ids come from the database; rows come from the pool cache
+    question_ids = [row.question_id for row in db.session.query(ChallengeQuestion.question_id).filter(
+        ChallengeQuestion.challenge_id == challenge_id
+    ).order_by(ChallengeQuestion.position)]
+    return question_records(question_ids)
+
+
+def roster_questions(challenge):
+    """The challenge's questions in roster order, materialising the roster if it has none"""
+    questions = _load_roster(challenge.id)
+    if questions:
+        return questions
+    
+    current_app.logger.info(f"📌 Materialising question roster for challenge {challenge.id}")
+    questions = build_roster(challenge)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another request materialised it first; use theirs
+        db.session.rollback()
+        questions = _load_roster(challenge.id)
+    return questions
+
+
+def questions_for_user(challenge, user_id):
+    """The roster in this user's order: a permutation seeded by (challenge, user)"""
+    questions = list(roster_questions(challenge))
+    random.Random(f"{challenge.id}:{user_id}").shuffle(questions)
+    return questions
@@ -0,0 +1,111 @@
+"""
+Idempotent submissions
+
+Submit endpoints accept an Idempotency-Key header. The first request with a
+key runs normally and its response is stored for a short TTL; repeats from
+the same user (timer auto-submit racing a manual submit, network retries,
+double clicks) get the stored response back after a single lookup instead
+of another scoring and leaderboard pass. A repeat that arrives while the
+first is still running gets 409. Responses live in Redis when configured,
+so every worker sees them, and in-process otherwise.
+"""
+import json
+import threading
+from functools import wraps
+from flask import current_app, jsonify, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from app.utils.cache import LRUCache
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+IDEMPOTENCY_TTL_SECONDS = 10 * 60
+MAX_KEY_LENGTH = 255
+
+_PENDING = 'pending'
+
+_local_responses = LRUCache(max_entries=10000, ttl=IDEMPOTENCY_TTL_SECONDS)
+_local_lock = threading.Lock()
+
+
+def _redis():
+    return getattr(current_app, 'redis_client', None)
+
+
+def _reserve(cache_key):
+    """Claim a key for this request; returns the stored value if someone already has it"""
+    redis_client = _redis()
+    if redis_client is not None:
+        try:
+            if redis_client.set(cache_key, _PENDING, nx=True, ex=IDEMPOTENCY_TTL_SECONDS):
+                return None
+            stored = redis_client.get(cache_key)
+            return stored.decode() if isinstance(stored, bytes) else stored
+        except Exception as e:
+            current_app.logger.warning(f"⚠️ Idempotency lookup failed, using local store: {str(e)}")
+    
+    with _local_lock:
+        stored = _local_responses.get(cache_key)
+        if stored is None:
+            _local_responses.set(cache_key, _PENDING)
+        return stored
+
+
+def _store(cache_key, value):
+    redis_client = _redis()
+    if redis_client is not None:
+        try:
+            redis_client.set(cache_key, value, ex=IDEMPOTENCY_TTL_SECONDS)
+            return
+        except Exception as e:
+            current_app.logger.warning(f"⚠️ Idempotency store failed, using local store: {str(e)}")
+    _local_responses.set(cache_key, value)
+
+
+def _release(cache_key):
+    redis_client = _redis()
+    if redis_client is not None:
+        try:
+            redis_client.delete(cache_key)
+        except Exception as e:
+            current_app.logger.warning(f"⚠️ Idempotency release failed: {str(e)}")
+    _local_responses.pop(cache_key)
+
+
+def idempotent(scope):
+    """
+    Make a JWT-protected POST view replay its response for a repeated
+    Idempotency-Key. Apply below @jwt_required().
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if not key:
+                return view(*args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return jsonify({'error': f'{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters'}), 400
+            
+            cache_key = f"idempotency:{scope}:{get_jwt_identity()}:{key}"
+            stored = _reserve(cache_key)
+            if stored == _PENDING:
+                return jsonify({'error': 'A request with this Idempotency-Key is still being processed'}), 409
+            if stored is not None:
+                status, body = json.loads(stored)
+                current_app.logger.info(f"🔁 Replaying {scope} response for idempotency key {key}")
+                response = current_app.response_class(body, status=status, mimetype='application/json')
+                response.headers['Idempotent-Replayed'] = 'true'
+                return response
+            
+            try:
+                response = make_response(view(*args, **kwargs))
+            except Exception:
+                _release(cache_key)
+                raise
+            
+            # Server errors are not final; let the retry run again
+            if response.status_code >= 500:
+                _release(cache_key)
+            else:
+                _store(cache_key, json.dumps([response.status_code, response.get_data(as_text=True)]))
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,94 @@
+"""
+Month-rollover leaderboard archive
+
+When a month ends its rows are frozen into LeaderboardSnapshot with the
+final ranks precomputed and removed from the live leaderboard table, which
+then only holds the current month. Historical boards are served straight
+from the snapshot.
+"""
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import and_, or_
+from app import db
+from app.models import Leaderboard, LeaderboardSnapshot, User
+from app.models.quiz_result import period_key
+from app.services.leaderboard_cache import invalidate_boards
+from app.services.leaderboard_service import (
+    leaderboard_period, is_period_archived, reconcile_leaderboard, store_board_name
+)
+from app.services.leaderboard_store import get_leaderboard_store
+
+
+def archive_period(month, year):
+    """
+    Freeze a finished month into LeaderboardSnapshot and clear its live rows.
+    
+    Totals are reconciled against QuizResult first, so the snapshot is exact.
+    Months that already have a snapshot are skipped; the current month is
+    refused.
+    """
+    period = year * 100 + month
+    summary = {'period': f"{year:04d}-{month:02d}", 'archived': False, 'entries': 0}
+    
+    if period >= period_key():
+        raise ValueError(f"Cannot archive {summary['period']}: the month has not finished")
+    
+    if is_period_archived(month, year):
+        summary['reason'] = 'already archived'
+        return summary
+    
+    reconcile_leaderboard(month, year, apply=True)
+    
+    rows = db.session.query(
+        Leaderboard.user_id,
+        User.username,
+        Leaderboard.total_score,
+        Leaderboard.challenges_completed,
+        Leaderboard.last_updated
+    ).join(User, User.id == Leaderboard.user_id).filter(
+        Leaderboard.month == month,
+        Leaderboard.year == year
+    ).order_by(
+        Leaderboard.total_score.desc(),
+        Leaderboard.user_id.asc()
+    ).with_for_update(of=Leaderboard).all()
+    
+    frozen_at = datetime.utcnow()
+    db.session.bulk_insert_mappings(LeaderboardSnapshot, [
+        {
+            'period': period,
+            'rank': rank,
+            'user_id': row.user_id,
+            'username': row.username,
+            'total_score': row.total_score or 0,
+            'challenges_completed': row.challenges_completed or 0,
+            'last_updated': row.last_updated,
+            'frozen_at': frozen_at
+        }
+        for rank, row in enumerate(rows, 1)
+    ])
+    Leaderboard.query.filter_by(month=month, year=year).delete(synchronize_session=False)
+    db.session.commit()
+    
+    invalidate_boards(periods=[(month, year)])
+    store = get_leaderboard_store()
+    if store is not None:
+        store.drop(store_board_name(month, year))
+    
+    summary['archived'] = True
+    summary['entries'] = len(rows)
+    current_app.logger.info(f"🗄️ Archived leaderboard {summary['period']}: {len(rows)} entries")
+    return summary
+
+
+def rollover_leaderboards():
+    """Archive every finished month still present in the live leaderboard table"""
+    month, year = leaderboard_period()
+    finished = db.session.query(Leaderboard.year, Leaderboard.month).filter(
+        or_(
+            Leaderboard.year < year,
+            and_(Leaderboard.year == year, Leaderboard.month < month)
+        )
+    ).distinct().order_by(Leaderboard.year, Leaderboard.month).all()
+    
+    return [archive_period(finished_month, finished_year) for finished_year, finished_month in finished]
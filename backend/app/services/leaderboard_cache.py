@@ -0,0 +1,80 @@
+"""
+Versioned leaderboard response cache
+
+Rendered leaderboard responses are cached per (board type, challenge_id,
+period) and request variant. Submits bump the board's version, which retires
+every cached page for that board. Responses carry a content ETag so clients
+revalidating an unchanged board get a 304 without a body.
+"""
+import hashlib
+import json
+from flask import current_app, request
+from app.utils.cache import LRUCache, VersionRegistry
+
+# Entries also expire on a short TTL so workers that did not see a bump
+# (no Redis configured) converge quickly.
+DEFAULT_TTL_SECONDS = 10
+
+leaderboard_versions = VersionRegistry('leaderboard')
+_responses = LRUCache(max_entries=1024, ttl=DEFAULT_TTL_SECONDS)
+
+
+def global_board_key(month, year):
+    return ('global', None, year * 100 + month)
+
+
+def challenge_board_key(challenge_id):
+    return ('challenge', challenge_id, None)
+
+
+def segment_board_key(exam_type, difficulty, month, year):
+    return ('segment', f"{exam_type}|{difficulty}", year * 100 + month)
+
+
+def bump_leaderboard_version(board_key):
+    """Invalidate every cached response for a board"""
+    version = leaderboard_versions.bump(board_key)
+    current_app.logger.debug(f"🔁 Leaderboard cache version bumped: {board_key} -> {version}")
+    return version
+
+
+def cached_leaderboard_response(board_key, variant, build_payload):
+    """
+    Serve a leaderboard payload from cache, building it on a miss.
+    
+    `variant` distinguishes responses for the same board (query arguments and,
+    for personalised responses, the caller). Returns a Flask response with an
+    ETag; a matching If-None-Match yields 304.
+    """
+    version = leaderboard_versions.get(board_key)
+    cache_key = (board_key, version, variant)
+    
+    cached = _responses.get(cache_key)
+    if cached is None:
+        body = json.dumps(build_payload(), separators=(',', ':'), sort_keys=True).encode()
+        etag = hashlib.sha1(body).hexdigest()[:20]
+        cached = (etag, body)
+        _responses.set(cache_key, cached, ttl=current_app.config.get('LEADERBOARD_CACHE_TTL', DEFAULT_TTL_SECONDS))
+    
+    etag, body = cached
+    response = current_app.response_class(body, status=200, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
+
+
+def leaderboard_cache_stats():
+    return _responses.stats()
+
+
+def invalidate_boards(challenge_id=None, periods=(), segments=()):
+    """
+    Bump the challenge board and every (month, year) global board touched by
+    a write, plus each (exam_type, difficulty) segment board in those months
+    """
+    if challenge_id is not None:
+        bump_leaderboard_version(challenge_board_key(challenge_id))
+    for month, year in set(periods):
+        bump_leaderboard_version(global_board_key(month, year))
+        for exam_type, difficulty in set(segments):
+            bump_leaderboard_version(segment_board_key(exam_type, difficulty, month, year))
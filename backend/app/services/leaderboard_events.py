@@ -0,0 +1,316 @@
+"""
+Live leaderboard events
+
+Submits publish small rank-change events to per-board channels; the SSE
+stream endpoint relays them to connected clients so nobody has to poll.
+Delivery is in-process by default. With Redis configured, each board has
+its own Redis pub/sub channel; a worker's listener subscribes to the boards
+its streams are watching and relays their events, so all gunicorn workers
+and nodes see every submit. Publishers check PUBSUB NUMSUB first and skip
+building an event nobody is subscribed to.
+
+Each open stream holds a gthread worker thread, so a worker serves at most
+LEADERBOARD_STREAM_MAX_PER_WORKER streams and refuses the rest with a 503.
+By default that is the worker's --threads less
+LEADERBOARD_STREAM_THREAD_HEADROOM threads kept for API traffic (6 of the
+8 threads the Dockerfile and render.yaml start). EventSource cannot send
+headers, and query strings end up in access logs, so streams authenticate
+with a short-lived stream token issued against the caller's JWT rather than
+the JWT itself. The token outlives one stream (LEADERBOARD_STREAM_LIFETIME)
+plus a reconnect window, so EventSource's own reconnect after a recycle is
+accepted; clients fetch a fresh token when a stream is refused.
+"""
+import json
+import queue
+import threading
+import time
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from app import db
+from app.models import Leaderboard, QuizResult, User
+from app.services.leaderboard_ranking import RankedBoard
+from app.services.leaderboard_store import server_thread_count
+
+REDIS_CHANNEL_PREFIX = 'leaderboard:events:'
+LISTEN_POLL_SECONDS = 1.0
+SUBSCRIBER_QUEUE_SIZE = 100
+STREAM_TOKEN_SALT = 'leaderboard-stream'
+DEFAULT_STREAM_LIFETIME = 300
+# Slack for EventSource's reconnect (retry: 3s) after a stream is recycled
+STREAM_RECONNECT_WINDOW = 60
+DEFAULT_STREAM_THREAD_HEADROOM = 2
+# Assumed when the server's thread count is unknown (dev server, gunicorn config file)
+DEFAULT_STREAM_THREADS = 8
+
+
+def challenge_channel(challenge_id):
+    return f"challenge:{challenge_id}"
+
+
+def global_channel(month, year):
+    return f"global:{year * 100 + month}"
+
+
+def redis_channel(channel):
+    return f"{REDIS_CHANNEL_PREFIX}{channel}"
+
+
+class LeaderboardBroker:
+    """Fan-out of leaderboard events to subscriber queues"""
+    
+    def __init__(self, queue_size=SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._listener = None
+    
+    def _redis(self):
+        try:
+            return getattr(current_app, 'redis_client', None)
+        except RuntimeError:
+            return None
+    
+    def subscribe(self, channel):
+        subscription = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscription)
+        self._ensure_listener()
+        return subscription
+    
+    def unsubscribe(self, channel, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(channel)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[channel]
+    
+    def wants(self, channel):
+        """Whether any worker has a stream subscribed to `channel`"""
+        redis_client = self._redis()
+        if redis_client is not None:
+            try:
+                return any(count for _, count in redis_client.pubsub_numsub(redis_channel(channel)))
+            except Exception as e:
+                current_app.logger.warning(f"⚠️ Redis NUMSUB failed, publishing anyway: {str(e)}")
+                return True
+        with self._lock:
+            return bool(self._subscribers.get(channel))
+    
+    def deliver(self, channel, event):
+        """Hand an event to this process's subscribers"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.put_nowait(event)
+            except queue.Full:
+                # Slow consumer: drop its backlog and ask it to refetch instead
+                with subscription.mutex:
+                    subscription.queue.clear()
+                subscription.put_nowait({'type': 'resync'})
+    
+    def publish(self, channel, event):
+        redis_client = self._redis()
+        if redis_client is not None:
+            try:
+                redis_client.publish(redis_channel(channel), json.dumps(event))
+                return
+            except Exception as e:
+                current_app.logger.warning(f"⚠️ Redis publish failed, delivering locally: {str(e)}")
+        self.deliver(channel, event)
+    
+    def _ensure_listener(self):
+        redis_client = self._redis()
+        if redis_client is None or (self._listener and self._listener.is_alive()):
+            return
+        with self._lock:
+            if self._listener and self._listener.is_alive():
+                return
+            self._listener = threading.Thread(
+                target=self._listen, args=(redis_client, current_app.logger),
+                name='leaderboard-events', daemon=True
+            )
+            self._listener.start()
+    
+    def _listen(self, redis_client, logger):
+        """
+        Relay Redis pub/sub messages to local subscribers, reconnecting on errors.
+        
+        The Redis subscriptions follow the boards that have local subscribers;
+        all pubsub calls stay on this thread, so they are synced between polls.
+        Redis drops a dead worker's subscriptions with its connection, which
+        keeps NUMSUB honest without any counters to clean up.
+        """
+        while True:
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            subscribed = set()
+            try:
+                while True:
+                    with self._lock:
+                        wanted = {redis_channel(channel) for channel in self._subscribers}
+                    if wanted - subscribed:
+                        pubsub.subscribe(*(wanted - subscribed))
+                    if subscribed - wanted:
+                        pubsub.unsubscribe(*(subscribed - wanted))
+                    subscribed = wanted
+                    
+                    if not subscribed:
+                        time.sleep(LISTEN_POLL_SECONDS)
+                        continue
+                    message = pubsub.get_message(timeout=LISTEN_POLL_SECONDS)
+                    if not message or message.get('type') != 'message':
+                        continue
+                    name = message['channel']
+                    name = name.decode() if isinstance(name, bytes) else name
+                    self.deliver(name[len(REDIS_CHANNEL_PREFIX):], json.loads(message['data']))
+            except Exception as e:
+                logger.warning(f"⚠️ Leaderboard event listener error, reconnecting: {str(e)}")
+                time.sleep(1)
+            finally:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+
+
+broker = LeaderboardBroker()
+
+
+class StreamSlots:
+    """Count of open streams in this worker process"""
+    
+    def __init__(self):
+        self.open = 0
+        self._lock = threading.Lock()
+    
+    def acquire(self, limit):
+        """Take a slot if fewer than `limit` streams are open; returns whether it did"""
+        with self._lock:
+            if self.open >= limit:
+                return False
+            self.open += 1
+            return True
+    
+    def release(self):
+        with self._lock:
+            self.open = max(0, self.open - 1)
+
+
+stream_slots = StreamSlots()
+
+
+def max_streams_per_worker():
+    """LEADERBOARD_STREAM_MAX_PER_WORKER, or the worker's threads less the API headroom"""
+    configured = current_app.config.get('LEADERBOARD_STREAM_MAX_PER_WORKER')
+    if configured is not None:
+        return configured
+    threads = server_thread_count() or DEFAULT_STREAM_THREADS
+    headroom = current_app.config.get('LEADERBOARD_STREAM_THREAD_HEADROOM', DEFAULT_STREAM_THREAD_HEADROOM)
+    return max(threads - headroom, 0)
+
+
+def stream_lifetime():
+    return current_app.config.get('LEADERBOARD_STREAM_LIFETIME', DEFAULT_STREAM_LIFETIME)
+
+
+def stream_token_ttl():
+    """Seconds a stream token is accepted; by default one stream lifetime plus the reconnect window"""
+    return current_app.config.get('LEADERBOARD_STREAM_TOKEN_TTL') or stream_lifetime() + STREAM_RECONNECT_WINDOW
+
+
+def _stream_serializer():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt=STREAM_TOKEN_SALT)
+
+
+def issue_stream_token(identity):
+    """Signed token that only opens a leaderboard stream for `identity`"""
+    return _stream_serializer().dumps({'identity': identity})
+
+
+def read_stream_token(token):
+    """Identity of a stream token, or None when it is invalid or expired"""
+    try:
+        return _stream_serializer().loads(token, max_age=stream_token_ttl())['identity']
+    except (BadSignature, KeyError, TypeError):
+        return None
+
+
+def _challenge_rank(challenge_id, score, submitted_at, user_id, exclude_user=False):
+    """Rank a (score, submitted_at, user_id) key would hold on a challenge board"""
+    query = QuizResult.query.filter(QuizResult.challenge_id == challenge_id)
+    if exclude_user:
+        query = query.filter(QuizResult.user_id != user_id)
+    board = RankedBoard(query, QuizResult.score, [QuizResult.submitted_at, QuizResult.user_id])
+    ahead = query.filter(board.ahead_of((score, submitted_at, user_id))).order_by(None)
+    return ahead.count() + 1
+
+
+def publish_challenge_result(result, old_score=None, old_submitted_at=None):
+    """Announce a committed challenge result with its new and previous rank"""
+    channel = challenge_channel(result.challenge_id)
+    if not broker.wants(channel):
+        return
+    
+    try:
+        user = db.session.get(User, result.user_id)
+        previous_rank = None
+        if old_score is not None:
+            # Other rows did not change, so rank the old key without the user's new row
+            previous_rank = _challenge_rank(
+                result.challenge_id, old_score, old_submitted_at, result.user_id, exclude_user=True
+            )
+        broker.publish(channel, {
+            'type': 'challenge_result',
+            'challenge_id': result.challenge_id,
+            'user_id': result.user_id,
+            'username': user.username if user else None,
+            'score': result.score,
+            'previous_score': old_score,
+            'correct_answers': result.correct_answers,
+            'wrong_answers': result.wrong_answers,
+            'submitted_at': result.submitted_at.isoformat() if result.submitted_at else None,
+            'rank': _challenge_rank(result.challenge_id, result.score, result.submitted_at, result.user_id),
+            'previous_rank': previous_rank
+        })
+    except Exception as e:
+        current_app.logger.warning(f"⚠️ Failed to publish challenge result event: {str(e)}")
+
+
+def publish_global_score(user_id, month, year, score_delta):
+    """Announce a user's new monthly total on the global board"""
+    channel = global_channel(month, year)
+    if not score_delta or not broker.wants(channel):
+        return
+    
+    try:
+        row = db.session.query(
+            Leaderboard.total_score, Leaderboard.challenges_completed, Leaderboard.last_updated, User.username
+        ).join(User, User.id == Leaderboard.user_id).filter(
+            Leaderboard.user_id == user_id,
+            Leaderboard.month == month,
+            Leaderboard.year == year
+        ).first()
+        if row is None:
+            return
+        broker.publish(channel, {
+            'type': 'global_score',
+            'period': f"{year:04d}-{month:02d}",
+            'user_id': user_id,
+            'username': row.username,
+            'total_score': row.total_score,
+            'challenges_completed': row.challenges_completed,
+            'last_updated': row.last_updated.isoformat() if row.last_updated else None,
+            'score_delta': score_delta
+        })
+    except Exception as e:
+        current_app.logger.warning(f"⚠️ Failed to publish global score event: {str(e)}")
+
+
+def publish_submission(result, old_score=None, old_submitted_at=None):
+    """Publish the challenge and global board events for a committed challenge submit"""
+    publish_challenge_result(result, old_score, old_submitted_at)
+    
+    month, year = result.submitted_at.month, result.submitted_at.year
+    same_month = old_submitted_at is not None and (old_submitted_at.month, old_submitted_at.year) == (month, year)
+    publish_global_score(result.user_id, month, year, result.score - old_score if same_month else result.score)
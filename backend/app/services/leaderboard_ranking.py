@@ -0,0 +1,251 @@
+"""
+Ranked, cursor-paginated leaderboard reads
+
+Boards are ordered by score descending with ascending tie-breaker columns.
+Pages are fetched with keyset predicates on that ordering, so every request
+touches at most a page worth of rows no matter how large the board grows.
+"""
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import and_, or_, func, DateTime
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+MAX_AROUND = 25
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def encode_cursor_payload(payload):
+    data = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def decode_cursor_payload(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode()))
+
+
+class RankedBoard:
+    """
+    A leaderboard query with a total order: score desc, then tie columns asc.
+    
+    `query` must select every column in `score_column` and `tie_columns`
+    (labelled with their column names) plus whatever the caller formats.
+    `user_column` identifies a user's row for rank lookups.
+    
+    Pages cost a page of rows, but rank_of counts every row ahead, so it is
+    O(rank) even on the index. Boards a LeaderboardStore holds are served by
+    SortedSetBoard instead, whose rank lookup is the store's O(log n) rank;
+    this class ranks the boards the store does not keep.
+    """
+    
+    def __init__(self, query, score_column, tie_columns, user_column=None):
+        self.query = query
+        self.score_column = score_column
+        self.tie_columns = list(tie_columns)
+        self.key_columns = [score_column] + self.tie_columns
+        self.user_column = user_column
+    
+    def key_for(self, row):
+        return tuple(getattr(row, column.key) for column in self.key_columns)
+    
+    def encode_cursor(self, row, rank):
+        values = [value.isoformat() if isinstance(value, datetime) else value for value in self.key_for(row)]
+        return encode_cursor_payload({'k': values, 'r': rank})
+    
+    def decode_cursor(self, cursor):
+        try:
+            payload = decode_cursor_payload(cursor)
+            values = payload['k']
+            rank = int(payload['r'])
+            if len(values) != len(self.key_columns):
+                raise ValueError('cursor does not match board')
+            key = tuple(
+                datetime.fromisoformat(value) if isinstance(column.type, DateTime) and value is not None else value
+                for column, value in zip(self.key_columns, values)
+            )
+        except (ValueError, KeyError, TypeError) as e:
+            raise InvalidCursor(f'Invalid cursor: {e}')
+        return key, rank
+    
+    def _ties_before(self, ties):
+        """Rows whose tie columns sort strictly before `ties` (all ascending)"""
+        column, value = self.tie_columns[0], ties[0]
+        if len(self.tie_columns) == 1:
+            return column < value
+        rest = RankedBoard(self.query, self.score_column, self.tie_columns[1:])
+        return or_(column < value, and_(column == value, rest._ties_before(ties[1:])))
+    
+    def _ties_after(self, ties):
+        column, value = self.tie_columns[0], ties[0]
+        if len(self.tie_columns) == 1:
+            return column > value
+        rest = RankedBoard(self.query, self.score_column, self.tie_columns[1:])
+        return or_(column > value, and_(column == value, rest._ties_after(ties[1:])))
+    
+    def ahead_of(self, key):
+        score, ties = key[0], key[1:]
+        return or_(self.score_column > score, and_(self.score_column == score, self._ties_before(ties)))
+    
+    def behind(self, key):
+        score, ties = key[0], key[1:]
+        return or_(self.score_column < score, and_(self.score_column == score, self._ties_after(ties)))
+    
+    def _ordered(self, query, reverse=False):
+        if reverse:
+            return query.order_by(self.score_column.asc(), *[column.desc() for column in self.tie_columns])
+        return query.order_by(self.score_column.desc(), *[column.asc() for column in self.tie_columns])
+    
+    def page(self, limit, cursor=None):
+        """Return ([(rank, row)], next_cursor) starting after `cursor`"""
+        query = self.query
+        start_rank = 0
+        if cursor:
+            key, start_rank = self.decode_cursor(cursor)
+            query = query.filter(self.behind(key))
+        
+        rows = self._ordered(query).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        ranked = [(start_rank + i, row) for i, row in enumerate(rows, 1)]
+        next_cursor = self.encode_cursor(rows[-1], ranked[-1][0]) if has_more and rows else None
+        return ranked, next_cursor
+    
+    def rank_of(self, row):
+        """1-based rank of `row`: one count over the rows ordered ahead of it, O(rank)"""
+        ahead = self.query.filter(self.ahead_of(self.key_for(row))).order_by(None)
+        return ahead.with_entities(func.count()).scalar() + 1
+    
+    def entry_for(self, user_id):
+        """Return (rank, row) for a user, or None when they are not on the board"""
+        row = self.query.filter(self.user_column == user_id).first()
+        return (self.rank_of(row), row) if row else None
+    
+    def around(self, row, rank, size):
+        """Return up to `size` neighbours on each side of `row` as [(rank, row)]"""
+        key = self.key_for(row)
+        above = self._ordered(self.query.filter(self.ahead_of(key)), reverse=True).limit(size).all()
+        below = self._ordered(self.query.filter(self.behind(key))).limit(size).all()
+        
+        window = [(rank - i, neighbour) for i, neighbour in enumerate(above, 1)]
+        window.reverse()
+        window.append((rank, row))
+        window.extend((rank + i, neighbour) for i, neighbour in enumerate(below, 1))
+        return window
+
+
+class SortedSetBoard:
+    """
+    A board ranked by a LeaderboardStore; rows are loaded from SQL per page.
+    
+    Rank lookups and page slices are O(log n) in the store. Cursors carry the
+    next offset, so a page boundary can shift by a row when scores change
+    between requests.
+    """
+    
+    def __init__(self, store, board, load_rows):
+        self.store = store
+        self.board = board
+        self.load_rows = load_rows
+    
+    def encode_cursor(self, offset):
+        return encode_cursor_payload({'o': offset})
+    
+    def decode_cursor(self, cursor):
+        try:
+            offset = int(decode_cursor_payload(cursor)['o'])
+            if offset < 0:
+                raise ValueError('negative offset')
+        except (ValueError, KeyError, TypeError) as e:
+            raise InvalidCursor(f'Invalid cursor: {e}')
+        return offset
+    
+    def _hydrate(self, members, first_rank):
+        """Pair store members with their SQL rows; members without a row are skipped"""
+        rows = self.load_rows([user_id for user_id, _ in members]) if members else {}
+        return [
+            (first_rank + i, rows[user_id])
+            for i, (user_id, _) in enumerate(members)
+            if user_id in rows
+        ]
+    
+    def page(self, limit, cursor=None):
+        offset = self.decode_cursor(cursor) if cursor else 0
+        members = self.store.range(self.board, offset, offset + limit)
+        has_more = len(members) > limit
+        ranked = self._hydrate(members[:limit], offset + 1)
+        return ranked, self.encode_cursor(offset + limit) if has_more else None
+    
+    def entry_for(self, user_id):
+        position = self.store.rank(self.board, user_id)
+        if position is None:
+            return None
+        ranked = self._hydrate([(user_id, None)], position + 1)
+        return ranked[0] if ranked else None
+    
+    def around(self, row, rank, size):
+        start = max(rank - 1 - size, 0)
+        return self._hydrate(self.store.range(self.board, start, rank - 1 + size), start + 1)
+
+
+class SnapshotBoard:
+    """
+    A frozen board whose rows carry their final rank.
+    
+    Pages, rank lookups and neighbours are all range reads on the indexed
+    (period, rank) key, so no ranking work happens at read time.
+    """
+    
+    def __init__(self, query, rank_column, user_column):
+        self.query = query
+        self.rank_column = rank_column
+        self.user_column = user_column
+    
+    def decode_cursor(self, cursor):
+        try:
+            return int(decode_cursor_payload(cursor)['r'])
+        except (ValueError, KeyError, TypeError) as e:
+            raise InvalidCursor(f'Invalid cursor: {e}')
+    
+    def page(self, limit, cursor=None):
+        after = self.decode_cursor(cursor) if cursor else 0
+        rows = self.query.filter(self.rank_column > after).order_by(self.rank_column).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        ranked = [(row.rank, row) for row in rows[:limit]]
+        return ranked, encode_cursor_payload({'r': ranked[-1][0]}) if has_more else None
+    
+    def entry_for(self, user_id):
+        row = self.query.filter(self.user_column == user_id).first()
+        return (row.rank, row) if row else None
+    
+    def around(self, row, rank, size):
+        rows = self.query.filter(
+            self.rank_column.between(rank - size, rank + size)
+        ).order_by(self.rank_column).all()
+        return [(neighbour.rank, neighbour) for neighbour in rows]
+
+
+def parse_page_args(args):
+    """Read limit/cursor/me/around query arguments; returns (options, error)"""
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+        around = int(args.get('around', 0))
+    except (TypeError, ValueError):
+        return None, 'limit and around must be integers'
+    
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        return None, f'limit must be between 1 and {MAX_PAGE_SIZE}'
+    if not 0 <= around <= MAX_AROUND:
+        return None, f'around must be between 0 and {MAX_AROUND}'
+    
+    return {
+        'limit': limit,
+        'cursor': args.get('cursor') or None,
+        'me': args.get('me', 'false').lower() == 'true' or around > 0,
+        'around': around
+    }, None
@@ -0,0 +1,442 @@
+"""
+Leaderboard maintenance helpers
+
+Monthly leaderboard rows are maintained on the write path (challenge and
+practice submits) by applying score deltas, so reads never rebuild them.
+When a sorted-set store is configured the same deltas are mirrored into it
+once the transaction commits.
+"""
+from datetime import datetime
+from flask import current_app
+from app import db
+from app.models import Leaderboard, LeaderboardSnapshot, QuizResult, SegmentLeaderboard
+from app.models.segment_leaderboard import ALL_DIFFICULTIES
+from sqlalchemy import and_, bindparam, delete, event, func, null, select, union_all, update
+from sqlalchemy.orm import Session
+from app.services.leaderboard_cache import invalidate_boards
+from app.services.leaderboard_store import get_leaderboard_store
+from app.utils.db_utils import upsert
+
+_PENDING_STORE_DELTAS = 'leaderboard_store_deltas'
+LEADERBOARD_KEY_COLUMNS = ['user_id', 'month', 'year']
+SEGMENT_KEY_COLUMNS = ['exam_type', 'difficulty', 'period', 'user_id']
+
+
+def leaderboard_period(when=None):
+    """
+    Return the (month, year) leaderboard bucket for a UTC timestamp.
+    
+    Months are UTC calendar months, matching the UTC submitted_at and
+    QuizResult.period they are built from. The original rebuild took the
+    current month from the server's local clock instead; the two agree on
+    the UTC hosts we deploy to (Docker, Render). Rows built on a server with
+    another timezone are realigned by `flask reconcile-leaderboards --apply`.
+    """
+    when = when or datetime.utcnow()
+    return when.month, when.year
+
+
+def month_period_filter(month, year):
+    """
+    Sargable predicate selecting QuizResult rows for a calendar month.
+    
+    Compares the indexed yyyymm period key instead of extracting parts of
+    submitted_at, so monthly queries are index range scans.
+    """
+    return QuizResult.period == year * 100 + month
+
+
+def is_period_archived(month, year):
+    """True once a month has been frozen into LeaderboardSnapshot"""
+    return db.session.query(LeaderboardSnapshot.id).filter(
+        LeaderboardSnapshot.period == year * 100 + month
+    ).first() is not None
+
+
+def store_board_name(month, year):
+    """Sorted-set board holding a month's global totals"""
+    return f"global:{year * 100 + month}"
+
+
+def rebuild_store_board(month, year, store=None):
+    """Reload a month's sorted-set board from the durable Leaderboard table"""
+    store = store or get_leaderboard_store()
+    if store is None:
+        return 0
+    
+    rows = db.session.query(Leaderboard.user_id, Leaderboard.total_score).filter(
+        Leaderboard.month == month,
+        Leaderboard.year == year
+    ).all()
+    scores = {}
+    for user_id, total_score in rows:
+        scores[user_id] = scores.get(user_id, 0) + (total_score or 0)
+    
+    store.rebuild(store_board_name(month, year), scores)
+    current_app.logger.info(f"🏗️ Rebuilt {store.name} leaderboard for {month}/{year}: {len(scores)} users")
+    return len(scores)
+
+
+def ensure_store_board(month, year):
+    """Return the configured store with the month's board loaded, or None for SQL reads"""
+    store = get_leaderboard_store()
+    if store is not None and not store.is_loaded(store_board_name(month, year)):
+        rebuild_store_board(month, year, store)
+    return store
+
+
+def _queue_store_delta(user_id, score_delta, month, year):
+    if score_delta and get_leaderboard_store() is not None:
+        db.session.info.setdefault(_PENDING_STORE_DELTAS, []).append((store_board_name(month, year), user_id, score_delta))
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_store_deltas(session):
+    """Mirror committed leaderboard deltas into the sorted-set store"""
+    deltas = session.info.pop(_PENDING_STORE_DELTAS, None)
+    if not deltas:
+        return
+    
+    store = get_leaderboard_store()
+    for board, user_id, score_delta in deltas:
+        try:
+            store.increment(board, user_id, score_delta)
+        except Exception as e:
+            # Drop the board so the next read rebuilds it from SQL
+            current_app.logger.warning(f"⚠️ Leaderboard store update failed for {board}, dropping it: {str(e)}")
+            try:
+                store.drop(board)
+            except Exception:
+                pass
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_store_deltas(session):
+    session.info.pop(_PENDING_STORE_DELTAS, None)
+
+
+def apply_leaderboard_delta(user_id, score_delta, completed_delta, when=None):
+    """
+    Add a score/completion delta to a user's monthly leaderboard row.
+    
+    The row is created or incremented by a single atomic upsert against the
+    (user_id, month, year) unique constraint, so concurrent submits by the
+    same user cannot duplicate the row or lose an increment. The statement
+    runs in the caller's transaction; callers commit it together with the
+    QuizResult write.
+    """
+    if not score_delta and not completed_delta:
+        return
+    
+    month, year = leaderboard_period(when)
+    
+    # Archived months are frozen; replacing an old result only moves its
+    # score into the current month
+    if (month, year) != leaderboard_period() and is_period_archived(month, year):
+        current_app.logger.info(f"🗄️ Skipping leaderboard delta for archived period {month}/{year} (user {user_id})")
+        return
+    
+    upsert(
+        Leaderboard,
+        [{
+            'user_id': user_id,
+            'month': month,
+            'year': year,
+            'total_score': score_delta,
+            'challenges_completed': completed_delta,
+            'last_updated': datetime.utcnow()
+        }],
+        LEADERBOARD_KEY_COLUMNS,
+        increment_columns=['total_score', 'challenges_completed'],
+        replace_columns=['last_updated']
+    )
+    
+    _queue_store_delta(user_id, score_delta, month, year)
+    
+    current_app.logger.debug(
+        f"🏆 Leaderboard delta for user {user_id} ({month}/{year}): score {score_delta:+d}, completed {completed_delta:+d}"
+    )
+
+
+def segment_keys(exam_type, difficulty):
+    """Segments a challenge result counts towards: its difficulty and the exam-wide board"""
+    return [(exam_type, difficulty), (exam_type, ALL_DIFFICULTIES)]
+
+
+def apply_segment_delta(user_id, segment, score_delta, completed_delta, when=None):
+    """
+    Add a delta to a user's per-exam-type segment rows for a month.
+    
+    `segment` is the challenge's (exam_type, difficulty); both that board and
+    the exam-wide board are updated by one upsert in the caller's transaction.
+    """
+    if not score_delta and not completed_delta:
+        return
+    
+    month, year = leaderboard_period(when)
+    
+    # Segment boards freeze with the month, as in apply_leaderboard_delta
+    if (month, year) != leaderboard_period() and is_period_archived(month, year):
+        current_app.logger.info(f"🗄️ Skipping segment delta for archived period {month}/{year} (user {user_id})")
+        return
+    
+    now = datetime.utcnow()
+    upsert(
+        SegmentLeaderboard,
+        [
+            {
+                'user_id': user_id,
+                'exam_type': exam_type,
+                'difficulty': difficulty,
+                'period': year * 100 + month,
+                'total_score': score_delta,
+                'challenges_completed': completed_delta,
+                'last_updated': now
+            }
+            for exam_type, difficulty in segment_keys(*segment)
+        ],
+        SEGMENT_KEY_COLUMNS,
+        increment_columns=['total_score', 'challenges_completed'],
+        replace_columns=['last_updated']
+    )
+
+
+def record_result_change(user_id, new_score, new_submitted_at, old_score=None, old_submitted_at=None, segment=None):
+    """
+    Apply the leaderboard deltas for a new or replaced QuizResult.
+    
+    A replaced result is removed from the month it was originally counted in
+    and added to the month of the new submission. Challenge results pass
+    their (exam_type, difficulty) as `segment` to also update the segmented
+    boards.
+    """
+    for score_delta, completed_delta, when in _result_deltas(new_score, new_submitted_at, old_score, old_submitted_at):
+        apply_leaderboard_delta(user_id, score_delta, completed_delta, when)
+        if segment:
+            apply_segment_delta(user_id, segment, score_delta, completed_delta, when)
+
+
+def record_result_changes(changes):
+    """
+    Apply the leaderboard deltas for a batch of results with one upsert per table.
+    
+    `changes` holds (user_id, new_score, new_submitted_at, old_score,
+    old_submitted_at, segment) tuples, as record_result_change takes them.
+    Deltas landing on the same row are summed first, so a burst of submits
+    costs two statements instead of two per submit.
+    """
+    current_period = leaderboard_period()
+    archived = {}
+    board_rows = {}
+    segment_rows = {}
+    now = datetime.utcnow()
+    
+    for user_id, new_score, new_submitted_at, old_score, old_submitted_at, segment in changes:
+        for score_delta, completed_delta, when in _result_deltas(new_score, new_submitted_at, old_score, old_submitted_at):
+            if not score_delta and not completed_delta:
+                continue
+            month, year = leaderboard_period(when)
+            
+            # Archived months are frozen for both boards, as in apply_leaderboard_delta
+            if (month, year) != current_period:
+                if (month, year) not in archived:
+                    archived[(month, year)] = is_period_archived(month, year)
+                if archived[(month, year)]:
+                    current_app.logger.info(f"🗄️ Skipping leaderboard delta for archived period {month}/{year} (user {user_id})")
+                    continue
+            
+            if segment:
+                for exam_type, difficulty in segment_keys(*segment):
+                    key = (exam_type, difficulty, year * 100 + month, user_id)
+                    row = segment_rows.setdefault(key, {
+                        'user_id': user_id,
+                        'exam_type': exam_type,
+                        'difficulty': difficulty,
+                        'period': year * 100 + month,
+                        'total_score': 0,
+                        'challenges_completed': 0,
+                        'last_updated': now
+                    })
+                    row['total_score'] += score_delta
+                    row['challenges_completed'] += completed_delta
+            
+            row = board_rows.setdefault((user_id, month, year), {
+                'user_id': user_id,
+                'month': month,
+                'year': year,
+                'total_score': 0,
+                'challenges_completed': 0,
+                'last_updated': now
+            })
+            row['total_score'] += score_delta
+            row['challenges_completed'] += completed_delta
+    
+    upsert(
+        Leaderboard,
+        list(board_rows.values()),
+        LEADERBOARD_KEY_COLUMNS,
+        increment_columns=['total_score', 'challenges_completed'],
+        replace_columns=['last_updated']
+    )
+    for row in board_rows.values():
+        _queue_store_delta(row['user_id'], row['total_score'], row['month'], row['year'])
+    
+    upsert(
+        SegmentLeaderboard,
+        list(segment_rows.values()),
+        SEGMENT_KEY_COLUMNS,
+        increment_columns=['total_score', 'challenges_completed'],
+        replace_columns=['last_updated']
+    )
+    
+    current_app.logger.debug(
+        f"🏆 Batched leaderboard deltas: {len(changes)} results, {len(board_rows)} monthly rows, {len(segment_rows)} segment rows"
+    )
+
+
+def _result_deltas(new_score, new_submitted_at, old_score=None, old_submitted_at=None):
+    """(score_delta, completed_delta, when) changes for a new or replaced result"""
+    if old_score is None:
+        return [(new_score, 1, new_submitted_at)]
+    if leaderboard_period(old_submitted_at) == leaderboard_period(new_submitted_at):
+        return [(new_score - old_score, 0, new_submitted_at)]
+    return [(-old_score, -1, old_submitted_at), (new_score, 1, new_submitted_at)]
+
+
+def _reconcile_rows(month, year):
+    """
+    Stored Leaderboard rows for a month beside their QuizResult totals.
+    
+    One UNION ALL statement, so stored values and totals come from the same
+    snapshot: a submit commits both its result and its delta, or neither is
+    seen. Returns (user_id, entry_id, stored_score, stored_completed,
+    calculated_score, calculated_completed); entry_id is None for users with
+    results but no row.
+    """
+    totals = db.session.query(
+        QuizResult.user_id.label('user_id'),
+        func.coalesce(func.sum(QuizResult.score), 0).label('score'),
+        func.count(QuizResult.id).label('completed')
+    ).filter(month_period_filter(month, year)).group_by(QuizResult.user_id).subquery()
+    
+    in_month = and_(Leaderboard.month == month, Leaderboard.year == year)
+    stored = select(
+        Leaderboard.user_id, Leaderboard.id, Leaderboard.total_score, Leaderboard.challenges_completed,
+        func.coalesce(totals.c.score, 0), func.coalesce(totals.c.completed, 0)
+    ).outerjoin(totals, totals.c.user_id == Leaderboard.user_id).where(in_month)
+    missing = select(
+        totals.c.user_id, null(), null(), null(), totals.c.score, totals.c.completed
+    ).where(~select(Leaderboard.id).where(in_month, Leaderboard.user_id == totals.c.user_id).exists())
+    return db.session.execute(union_all(stored, missing)).all()
+
+
+def reconcile_leaderboard(month, year, apply=False):
+    """
+    Diff stored Leaderboard rows for a month against QuizResult totals.
+    
+    Stored rows and expected totals are read in one statement (see
+    _reconcile_rows), so the cost no longer scales with one query per user.
+    With apply=True the differences are written back in one short
+    transaction as increments (total_score = total_score + diff), never as
+    absolute totals: a submit that commits after the read keeps its delta.
+    Rows without results are zeroed the same way and deleted only if
+    nothing has landed on them since.
+    """
+    rows = sorted(_reconcile_rows(month, year), key=lambda row: (row[1] is None, row[1] or 0))
+    
+    seen = set()
+    duplicate_ids = []
+    inconsistencies = []
+    updates = []
+    inserts = []
+    stale_ids = []
+    now = datetime.utcnow()
+    
+    for user_id, entry_id, stored_score, stored_completed, calculated_score, calculated_completed in rows:
+        if user_id in seen:
+            duplicate_ids.append(entry_id)
+            continue
+        seen.add(user_id)
+        calculated_score, calculated_completed = int(calculated_score), int(calculated_completed)
+        
+        if stored_score == calculated_score and stored_completed == calculated_completed:
+            continue
+        
+        inconsistencies.append({
+            'user_id': user_id,
+            'stored_score': stored_score,
+            'calculated_score': calculated_score,
+            'stored_completed': stored_completed,
+            'calculated_completed': calculated_completed
+        })
+        
+        if entry_id is None:
+            inserts.append({
+                'user_id': user_id,
+                'month': month,
+                'year': year,
+                'total_score': calculated_score,
+                'challenges_completed': calculated_completed,
+                'last_updated': now
+            })
+        else:
+            if not calculated_completed:
+                stale_ids.append(entry_id)
+            updates.append({
+                'row_id': entry_id,
+                'score_diff': calculated_score - (stored_score or 0),
+                'completed_diff': calculated_completed - (stored_completed or 0),
+                'now': now
+            })
+    
+    summary = {
+        'month': month,
+        'year': year,
+        'users_checked': len(seen),
+        'inconsistencies': inconsistencies,
+        'duplicate_entries': len(duplicate_ids),
+        'fixed_entries': 0,
+        'created_entries': 0,
+        'removed_entries': 0,
+        'archived': is_period_archived(month, year)
+    }
+    
+    # Live rows of an archived month were removed on purpose; never recreate them
+    if not apply or summary['archived']:
+        return summary
+    
+    table = Leaderboard.__table__
+    if updates:
+        db.session.execute(update(table).where(table.c.id == bindparam('row_id')).values(
+            total_score=func.coalesce(table.c.total_score, 0) + bindparam('score_diff'),
+            challenges_completed=func.coalesce(table.c.challenges_completed, 0) + bindparam('completed_diff'),
+            last_updated=bindparam('now')
+        ), updates)
+    removed = 0
+    if stale_ids:
+        # Rows without results were just zeroed; one that gained a submit since the read is kept
+        removed += db.session.execute(delete(table).where(
+            table.c.id.in_(stale_ids),
+            table.c.total_score == 0,
+            table.c.challenges_completed == 0
+        )).rowcount
+    if duplicate_ids:
+        removed += Leaderboard.query.filter(Leaderboard.id.in_(duplicate_ids)).delete(synchronize_session=False)
+    if inserts:
+        # A submit may have created the row since it was read; add the missing totals to it
+        upsert(Leaderboard, inserts, LEADERBOARD_KEY_COLUMNS,
+               increment_columns=['total_score', 'challenges_completed'], replace_columns=['last_updated'])
+    db.session.commit()
+    
+    summary['fixed_entries'] = len(updates) - len(stale_ids)
+    summary['created_entries'] = len(inserts)
+    summary['removed_entries'] = removed
+    
+    invalidate_boards(periods=[(month, year)])
+    rebuild_store_board(month, year)
+    
+    current_app.logger.info(
+        f"✅ Leaderboard reconciled for {month}/{year}: {len(updates)} fixed, {len(inserts)} created, "
+        f"{removed} removed"
+    )
+    return summary
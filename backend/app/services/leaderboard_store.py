@@ -0,0 +1,438 @@
+"""
+Sorted-set leaderboard storage
+
+Boards are ordered by score descending, with the lower user id first on
+ties. Two interchangeable backends are provided:
+
+- RedisLeaderboardStore: Redis sorted sets (ZINCRBY / ZREVRANGE / ZREVRANK)
+- MemoryLeaderboardStore: an indexable skip list, for tests and
+  single-process deployments
+
+Both give O(log n) rank lookups. The SQL Leaderboard table remains the
+durable source of truth; a board that is not loaded yet is rebuilt from it.
+
+A delta that commits while a board is being rebuilt from SQL can miss
+both the SQL read and the reloaded board, so boards in either backend
+expire and are rebuilt from SQL after a TTL, which bounds that drift.
+
+The memory store only sees the writes of its own process. It is used only
+when LEADERBOARD_MEMORY_SINGLE_PROCESS is set and the server is known to
+run a single worker; otherwise boards are read from SQL.
+"""
+import os
+import random
+import shlex
+import sys
+import threading
+import time
+import uuid
+from flask import current_app
+
+# Redis orders equal scores by member, and ZREVRANGE walks members in
+# descending byte order. Storing the complement of the user id as a fixed
+# width string makes lower user ids come first, matching the SQL boards.
+_MEMBER_CEILING = 10 ** 12 - 1
+
+DEFAULT_MEMORY_TTL_SECONDS = 30
+DEFAULT_REDIS_TTL_SECONDS = 300
+
+
+def _encode_member(user_id):
+    return f"{_MEMBER_CEILING - int(user_id):012d}"
+
+
+def _decode_member(member):
+    if isinstance(member, bytes):
+        member = member.decode()
+    return _MEMBER_CEILING - int(member)
+
+
+class LeaderboardStore:
+    """Interface shared by the sorted-set backends; ranks are 0-based"""
+    
+    name = 'base'
+    
+    def is_loaded(self, board):
+        raise NotImplementedError
+    
+    def rebuild(self, board, scores):
+        """Replace a board with {user_id: score} and mark it loaded"""
+        raise NotImplementedError
+    
+    def increment(self, board, user_id, delta):
+        """Add `delta` to a member's score; ignored while the board is not loaded"""
+        raise NotImplementedError
+    
+    def rank(self, board, user_id):
+        raise NotImplementedError
+    
+    def score(self, board, user_id):
+        raise NotImplementedError
+    
+    def range(self, board, start, stop):
+        """Return [(user_id, score)] for ranks start..stop inclusive"""
+        raise NotImplementedError
+    
+    def size(self, board):
+        raise NotImplementedError
+    
+    def drop(self, board):
+        raise NotImplementedError
+
+
+class _SkipNode:
+    __slots__ = ('key', 'forward', 'span')
+    
+    def __init__(self, key, level):
+        self.key = key
+        self.forward = [None] * level
+        self.span = [0] * level
+
+
+class IndexableSkipList:
+    """
+    Skip list with per-link spans so both rank-of-key and key-at-rank are
+    O(log n). Keys are any totally ordered values; ranks are 1-based.
+    """
+    
+    MAX_LEVEL = 32
+    P = 0.25
+    
+    def __init__(self):
+        self.head = _SkipNode(None, self.MAX_LEVEL)
+        self.level = 1
+        self.length = 0
+    
+    def __len__(self):
+        return self.length
+    
+    def _random_level(self):
+        level = 1
+        while level < self.MAX_LEVEL and random.random() < self.P:
+            level += 1
+        return level
+    
+    def insert(self, key):
+        update = [None] * self.MAX_LEVEL
+        rank = [0] * self.MAX_LEVEL
+        node = self.head
+        for i in reversed(range(self.level)):
+            rank[i] = 0 if i == self.level - 1 else rank[i + 1]
+            while node.forward[i] is not None and node.forward[i].key < key:
+                rank[i] += node.span[i]
+                node = node.forward[i]
+            update[i] = node
+        
+        level = self._random_level()
+        if level > self.level:
+            for i in range(self.level, level):
+                rank[i] = 0
+                update[i] = self.head
+                self.head.span[i] = self.length
+            self.level = level
+        
+        new_node = _SkipNode(key, level)
+        for i in range(level):
+            new_node.forward[i] = update[i].forward[i]
+            update[i].forward[i] = new_node
+            new_node.span[i] = update[i].span[i] - (rank[0] - rank[i])
+            update[i].span[i] = (rank[0] - rank[i]) + 1
+        
+        for i in range(level, self.level):
+            update[i].span[i] += 1
+        
+        self.length += 1
+    
+    def remove(self, key):
+        update = [None] * self.MAX_LEVEL
+        node = self.head
+        for i in reversed(range(self.level)):
+            while node.forward[i] is not None and node.forward[i].key < key:
+                node = node.forward[i]
+            update[i] = node
+        
+        node = node.forward[0]
+        if node is None or node.key != key:
+            return False
+        
+        for i in range(self.level):
+            if update[i].forward[i] is node:
+                update[i].span[i] += node.span[i] - 1
+                update[i].forward[i] = node.forward[i]
+            else:
+                update[i].span[i] -= 1
+        
+        while self.level > 1 and self.head.forward[self.level - 1] is None:
+            self.level -= 1
+        self.length -= 1
+        return True
+    
+    def rank(self, key):
+        """1-based rank of `key`, or None when absent"""
+        traversed = 0
+        node = self.head
+        for i in reversed(range(self.level)):
+            while node.forward[i] is not None and node.forward[i].key <= key:
+                traversed += node.span[i]
+                node = node.forward[i]
+            if node is not self.head and node.key == key:
+                return traversed
+        return None
+    
+    def slice(self, start, stop):
+        """Keys at 1-based ranks start..stop inclusive"""
+        if start < 1 or start > self.length or stop < start:
+            return []
+        
+        traversed = 0
+        node = self.head
+        for i in reversed(range(self.level)):
+            while node.forward[i] is not None and traversed + node.span[i] <= start:
+                traversed += node.span[i]
+                node = node.forward[i]
+            if traversed == start:
+                break
+        
+        keys = []
+        while node is not None and len(keys) <= stop - start:
+            keys.append(node.key)
+            node = node.forward[0]
+        return keys
+
+
+class MemoryLeaderboardStore(LeaderboardStore):
+    """
+    Per-process boards held in skip lists keyed by (-score, user_id).
+    
+    A board loaded more than `ttl` seconds ago reports itself unloaded, so
+    the next read rebuilds it from SQL and picks up writes made elsewhere.
+    """
+    
+    name = 'memory'
+    
+    def __init__(self, ttl=DEFAULT_MEMORY_TTL_SECONDS):
+        self.ttl = ttl
+        self._boards = {}
+        self._loaded_at = {}
+        self._lock = threading.Lock()
+    
+    def is_loaded(self, board):
+        with self._lock:
+            loaded_at = self._loaded_at.get(board)
+            return loaded_at is not None and (not self.ttl or time.monotonic() - loaded_at < self.ttl)
+    
+    def rebuild(self, board, scores):
+        ordered = IndexableSkipList()
+        for user_id, score in scores.items():
+            ordered.insert((-score, user_id))
+        with self._lock:
+            self._boards[board] = (ordered, dict(scores))
+            self._loaded_at[board] = time.monotonic()
+    
+    def increment(self, board, user_id, delta):
+        with self._lock:
+            if board not in self._boards:
+                return None
+            ordered, scores = self._boards[board]
+            old_score = scores.get(user_id)
+            if old_score is not None:
+                ordered.remove((-old_score, user_id))
+            new_score = (old_score or 0) + delta
+            scores[user_id] = new_score
+            ordered.insert((-new_score, user_id))
+            return new_score
+    
+    def rank(self, board, user_id):
+        with self._lock:
+            if board not in self._boards:
+                return None
+            ordered, scores = self._boards[board]
+            if user_id not in scores:
+                return None
+            return ordered.rank((-scores[user_id], user_id)) - 1
+    
+    def score(self, board, user_id):
+        with self._lock:
+            entry = self._boards.get(board)
+            return entry[1].get(user_id) if entry else None
+    
+    def range(self, board, start, stop):
+        with self._lock:
+            if board not in self._boards:
+                return []
+            ordered, _ = self._boards[board]
+            return [(user_id, -negative_score) for negative_score, user_id in ordered.slice(start + 1, stop + 1)]
+    
+    def size(self, board):
+        with self._lock:
+            entry = self._boards.get(board)
+            return len(entry[0]) if entry else 0
+    
+    def drop(self, board):
+        with self._lock:
+            self._boards.pop(board, None)
+            self._loaded_at.pop(board, None)
+
+
+class RedisLeaderboardStore(LeaderboardStore):
+    """
+    Boards stored as Redis sorted sets shared by every worker and node.
+    
+    A rebuild fills a temporary key and RENAMEs it over the board in one
+    transaction, so readers never see a half-loaded board. The loaded
+    marker expires after `ttl` seconds so the board is rebuilt from SQL
+    periodically.
+    """
+    
+    name = 'redis'
+    
+    # Only increment boards that have been loaded from SQL, atomically
+    _INCREMENT_IF_LOADED = """
+    if redis.call('EXISTS', KEYS[2]) == 1 then
+        return redis.call('ZINCRBY', KEYS[1], ARGV[1], ARGV[2])
+    end
+    return false
+    """
+    
+    def __init__(self, redis_client, prefix='leaderboard', ttl=DEFAULT_REDIS_TTL_SECONDS):
+        self.redis = redis_client
+        self.prefix = prefix
+        self.ttl = ttl
+        self._increment_script = redis_client.register_script(self._INCREMENT_IF_LOADED)
+    
+    def _key(self, board):
+        return f"{self.prefix}:{board}"
+    
+    def _loaded_key(self, board):
+        return f"{self.prefix}:{board}:loaded"
+    
+    def is_loaded(self, board):
+        return bool(self.redis.exists(self._loaded_key(board)))
+    
+    def rebuild(self, board, scores):
+        pipe = self.redis.pipeline(transaction=True)
+        if scores:
+            staging_key = f"{self._key(board)}:rebuild:{uuid.uuid4().hex}"
+            pipe.zadd(staging_key, {_encode_member(user_id): score for user_id, score in scores.items()})
+            pipe.rename(staging_key, self._key(board))
+        else:
+            pipe.delete(self._key(board))
+        pipe.set(self._loaded_key(board), 1, ex=int(self.ttl) if self.ttl else None)
+        pipe.execute()
+    
+    def increment(self, board, user_id, delta):
+        result = self._increment_script(
+            keys=[self._key(board), self._loaded_key(board)],
+            args=[delta, _encode_member(user_id)]
+        )
+        return None if result is None else float(result)
+    
+    def rank(self, board, user_id):
+        return self.redis.zrevrank(self._key(board), _encode_member(user_id))
+    
+    def score(self, board, user_id):
+        value = self.redis.zscore(self._key(board), _encode_member(user_id))
+        return None if value is None else int(value)
+    
+    def range(self, board, start, stop):
+        members = self.redis.zrevrange(self._key(board), start, stop, withscores=True)
+        return [(_decode_member(member), int(score)) for member, score in members]
+    
+    def size(self, board):
+        return self.redis.zcard(self._key(board))
+    
+    def drop(self, board):
+        self.redis.delete(self._key(board), self._loaded_key(board))
+
+
+def _under_gunicorn():
+    return 'gunicorn' in os.environ.get('SERVER_SOFTWARE', '').lower() or \
+        os.path.basename(sys.argv[0] if sys.argv else '').startswith('gunicorn')
+
+
+def _server_option(short, long):
+    """
+    Value of a gunicorn option from the command line or GUNICORN_CMD_ARGS.
+    
+    Returns (value or None, known); `known` is False under gunicorn with
+    -c/--config, since a config file may set the option elsewhere.
+    """
+    args = shlex.split(os.environ.get('GUNICORN_CMD_ARGS', '')) + sys.argv[1:]
+    under_gunicorn = _under_gunicorn()
+    
+    value = None
+    for i, arg in enumerate(args):
+        if arg in (short, long) and i + 1 < len(args):
+            value = args[i + 1]
+        elif arg.startswith(f"{long}="):
+            value = arg.split('=', 1)[1]
+        elif arg.startswith(short) and arg[len(short):].isdigit():
+            value = arg[len(short):]
+        elif under_gunicorn and (arg in ('-c', '--config') or arg.startswith('--config=')):
+            return None, False
+    return value, True
+
+
+def server_worker_count():
+    """
+    Worker processes the server was started with, or None when unknown.
+    
+    Under gunicorn the count is read from -w/--workers in the command line
+    or GUNICORN_CMD_ARGS, then WEB_CONCURRENCY (gunicorn's own default); a
+    config file may set it elsewhere, so with -c/--config it is unknown.
+    """
+    workers, known = _server_option('-w', '--workers')
+    if not known:
+        return None
+    if workers is None:
+        workers = os.environ.get('WEB_CONCURRENCY', 1)
+    try:
+        return int(workers)
+    except ValueError:
+        return None
+
+
+def server_thread_count():
+    """Threads per gunicorn worker from --threads (default 1), or None when unknown or not under gunicorn"""
+    threads, known = _server_option('--threads', '--threads')
+    if not known or not _under_gunicorn():
+        return None
+    try:
+        return int(threads) if threads is not None else 1
+    except ValueError:
+        return None
+
+
+def get_leaderboard_store():
+    """
+    Return the configured store, or None when boards are read from SQL.
+    
+    LEADERBOARD_BACKEND selects 'redis', 'memory' or 'sql'; by default Redis
+    is used when the app has a Redis client and SQL otherwise. 'memory' is
+    per-process: it is refused unless LEADERBOARD_MEMORY_SINGLE_PROCESS is
+    set and the server runs exactly one worker.
+    """
+    app = current_app._get_current_object()
+    if 'leaderboard_store' in app.extensions:
+        return app.extensions['leaderboard_store']
+    
+    backend = app.config.get('LEADERBOARD_BACKEND') or ('redis' if getattr(app, 'redis_client', None) else 'sql')
+    store = None
+    try:
+        if backend == 'redis' and getattr(app, 'redis_client', None) is not None:
+            store = RedisLeaderboardStore(app.redis_client, ttl=app.config.get('REDIS_LEADERBOARD_TTL', DEFAULT_REDIS_TTL_SECONDS))
+        elif backend == 'memory':
+            workers = server_worker_count()
+            if not app.config.get('LEADERBOARD_MEMORY_SINGLE_PROCESS'):
+                app.logger.warning("⚠️ Memory leaderboard store needs LEADERBOARD_MEMORY_SINGLE_PROCESS=true, using SQL")
+            elif workers != 1:
+                app.logger.warning(f"⚠️ Memory leaderboard store needs a single worker ({workers or 'unknown'} configured), using SQL")
+            else:
+                store = MemoryLeaderboardStore(app.config.get('MEMORY_LEADERBOARD_TTL', DEFAULT_MEMORY_TTL_SECONDS))
+    except Exception as e:
+        app.logger.warning(f"⚠️ Could not initialise {backend} leaderboard store, using SQL: {str(e)}")
+        store = None
+    
+    app.extensions['leaderboard_store'] = store
+    app.logger.info(f"🏆 Leaderboard backend: {store.name if store else 'sql'}")
+    return store
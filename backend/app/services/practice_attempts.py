@@ -0,0 +1,110 @@
+"""
+Practice attempts
+
+Every sampled practice session served to a user is recorded with its
+compact answer key, the same way a challenge play is. Checks and submits
+name the attempt and are scored against that record only, so the client
+cannot choose which questions get scored. Checks return totals only; the
+submit claims the attempt, which makes it single-use, and the answer key
+is returned only then. Browsing the pool page by page records nothing.
+
+Each user keeps at most PRACTICE_OPEN_ATTEMPTS unsubmitted sessions; serving
+another drops the oldest. `flask prune-practice-attempts` deletes old rows.
+
+Questions on the roster of a challenge that can still be played or submitted
+are not served for practice, so a practice session cannot reveal an open
+challenge's answers. Challenges close after CHALLENGE_OPEN_DAYS, so the set
+left out stays bounded.
+"""
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import update
+from app import db
+from app.models import Challenge, ChallengeAttempt, ChallengeQuestion, PracticeAttempt
+from app.services.challenge_attempts import AttemptError
+from app.services.challenge_roster import submittable_since
+from app.services.scoring import parse_answers, score_answers
+
+
+def roster_question_ids(question_ids):
+    """The ids among question_ids that are on the roster of a challenge still open for play or submit"""
+    if not question_ids:
+        return set()
+    return {
+        question_id for (question_id,) in db.session.query(ChallengeQuestion.question_id).join(
+            Challenge, Challenge.id == ChallengeQuestion.challenge_id
+        ).filter(
+            ChallengeQuestion.question_id.in_(question_ids),
+            Challenge.is_active == True,
+            Challenge.created_at >= submittable_since()
+        ).distinct()
+    }
+
+
+def practice_questions(questions):
+    """The active questions that may be served for practice, in the order given"""
+    on_roster = roster_question_ids([question.id for question in questions])
+    return [question for question in questions if question.is_active and question.id not in on_roster]
+
+
+def create_practice_attempt(user_id, questions):
+    """Persist a served practice set and its answer key, dropping the user's oldest open sessions"""
+    keep = max(current_app.config['PRACTICE_OPEN_ATTEMPTS'] - 1, 0)
+    stale_ids = [attempt_id for (attempt_id,) in db.session.query(PracticeAttempt.id).filter(
+        PracticeAttempt.user_id == user_id,
+        PracticeAttempt.submitted_at.is_(None)
+    ).order_by(PracticeAttempt.created_at.desc(), PracticeAttempt.id.desc()).offset(keep)]
+    if stale_ids:
+        PracticeAttempt.query.filter(PracticeAttempt.id.in_(stale_ids)).delete(synchronize_session=False)
+    
+    attempt = PracticeAttempt(
+        user_id=user_id,
+        question_ids=[question.id for question in questions],
+        answer_key=ChallengeAttempt.encode_answer_key([question.answer for question in questions])
+    )
+    db.session.add(attempt)
+    db.session.commit()
+    return attempt
+
+
+def prune_practice_attempts(before):
+    """Delete practice attempts created before `before`, submitted or not; returns the count"""
+    deleted = PracticeAttempt.query.filter(PracticeAttempt.created_at < before).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
+
+
+def resolve_practice_attempt(user_id, attempt_id):
+    """The user's unsubmitted practice attempt; raises AttemptError otherwise"""
+    attempt = db.session.get(PracticeAttempt, attempt_id)
+    if attempt is None:
+        raise AttemptError('Practice session not found', 404)
+    if attempt.user_id != user_id:
+        raise AttemptError('Practice session belongs to another user', 403)
+    if attempt.submitted_at is not None:
+        raise AttemptError('This practice session has already been submitted', 409)
+    return attempt
+
+
+def claim_practice_attempt(attempt):
+    """
+    Claim a practice attempt in the caller's transaction.
+    
+    A conditional UPDATE makes each attempt single-use even when two
+    requests race; returns False if it was already claimed.
+    """
+    claimed = db.session.execute(
+        update(PracticeAttempt).where(
+            PracticeAttempt.id == attempt.id,
+            PracticeAttempt.submitted_at.is_(None)
+        ).values(submitted_at=datetime.utcnow()).execution_options(synchronize_session=False)
+    )
+    return claimed.rowcount == 1
+
+
+def score_practice_attempt(attempt, answers):
+    """(ScoreCard, {question_id: answer}) for submitted answers against the attempt's key"""
+    answer_key = ChallengeAttempt.decode_answer_key(attempt.answer_key)
+    question_ids = list(attempt.question_ids)
+    scorecard = score_answers(question_ids, answer_key, parse_answers(answers))
+    return scorecard, dict(zip(question_ids, answer_key))
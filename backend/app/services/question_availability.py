@@ -0,0 +1,85 @@
+"""
+Question availability matrix
+
+A small cached count of active questions per (exam_type, difficulty). The
+selection fallback chain (exact match, same exam type, similar exam types,
+anything) is resolved against it in memory, so only the chosen tier is
+queried. It shares the question cache version, which admin question writes
+bump; a short TTL covers rows changed outside the API (seed scripts,
+manual SQL).
+"""
+import threading
+import time
+from sqlalchemy import func
+from app import db
+from app.models import QuizQuestion
+from app.services.question_pool import questions_version
+
+MATRIX_TTL_SECONDS = 300
+
+_matrix_lock = threading.Lock()
+_matrix = {'version': None, 'loaded_at': 0.0, 'counts': {}}
+
+
+def availability_matrix():
+    """{(exam_type, difficulty): active question count}"""
+    version = questions_version()
+    now = time.monotonic()
+    with _matrix_lock:
+        if _matrix['version'] == version and now - _matrix['loaded_at'] < MATRIX_TTL_SECONDS:
+            return _matrix['counts']
+    
+    rows = db.session.query(
+        QuizQuestion.exam_type, QuizQuestion.difficulty, func.count(QuizQuestion.id)
+    ).filter(
+        QuizQuestion.is_active == True
+    ).group_by(QuizQuestion.exam_type, QuizQuestion.difficulty).all()
+    counts = {(exam_type, difficulty): count for exam_type, difficulty, count in rows}
+    
+    with _matrix_lock:
+        _matrix.update(version=version, loaded_at=now, counts=counts)
+    return counts
+
+
+def available_questions(exam_type=None, difficulty=None):
+    """Active questions matching exam_type (a name or a list of names) and difficulty"""
+    exam_types = None
+    if exam_type is not None:
+        exam_types = set(exam_type) if isinstance(exam_type, (list, tuple, set)) else {exam_type}
+    return sum(
+        count for (row_exam_type, row_difficulty), count in availability_matrix().items()
+        if (exam_types is None or row_exam_type in exam_types)
+        and (difficulty is None or row_difficulty == difficulty)
+    )
+
+
+def similar_exam_types(exam_type):
+    if 'CBSE' in exam_type:
+        return ['CBSE 11', 'CBSE 12']
+    if 'JEE' in exam_type:
+        return ['JEE Main', 'JEE Advanced']
+    return ['General', 'Science', 'Math']
+
+
+def challenge_tiers(exam_type, difficulty):
+    """The challenge fallback chain, narrowest first, as (name, criteria) pairs"""
+    return [
+        ('exact', {'exam_type': exam_type, 'difficulty': difficulty}),
+        ('exam_type', {'exam_type': exam_type}),
+        ('similar', {'exam_type': similar_exam_types(exam_type)}),
+        ('any', {})
+    ]
+
+
+def resolve_tier(tiers, needed=1):
+    """
+    First tier with at least `needed` active questions.
+    
+    Returns (name, criteria, available), or None when no tier can supply
+    `needed` questions.
+    """
+    for name, criteria in tiers:
+        available = available_questions(**criteria)
+        if available >= needed:
+            return name, criteria, available
+    return None
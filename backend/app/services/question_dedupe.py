@@ -0,0 +1,214 @@
+"""
+Near-duplicate question detection
+
+Re-uploaded and overlapping papers produce questions that differ only in
+spacing, punctuation or a word here and there. Each question gets a MinHash
+signature of the character shingles of its text and options, stored on the
+row; the signature is split into LSH bands whose buckets live in
+question_lsh_band. Two questions share a bucket with high probability only
+when they are similar, so a new question is compared against the few rows
+in its buckets instead of the whole bank, and candidates are confirmed by
+estimated Jaccard similarity against a tunable threshold.
+
+Signatures and bands follow every ORM insert and text/option edit through
+a Session hook. Rows written around the ORM (bulk seeding, raw SQL) are
+picked up by the dedupe-questions CLI, which also finds duplicates already
+in the bank.
+"""
+import base64
+import hashlib
+import random
+import re
+import struct
+from sqlalchemy import event, inspect, select, tuple_
+from sqlalchemy.orm import Session
+from app import db
+from app.models import QuestionLSHBand, QuizQuestion
+
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+SHINGLE_SIZE = 5
+DEFAULT_THRESHOLD = 0.8
+
+_SIGNATURE_FORMAT = f'>{NUM_PERMUTATIONS}I'
+
+# Each permutation XORs the shingle hashes with a random mask, which keeps
+# the per-shingle work in C (min over map). Fixed seed: stored signatures
+# must stay comparable across processes and deploys.
+_seeded = random.Random(0x51A7)
+_PERMUTATION_MASKS = [_seeded.getrandbits(32) for _ in range(NUM_PERMUTATIONS)]
+
+
+def _hash(data, size):
+    return int.from_bytes(hashlib.blake2b(data, digest_size=size).digest(), 'big')
+
+
+def normalise_question(text, options=()):
+    """Lower-cased text and options with punctuation and spacing collapsed"""
+    combined = ' '.join([text or ''] + [str(option) for option in (options or [])])
+    return re.sub(r'\W+', ' ', combined.lower()).strip()
+
+
+def question_shingles(text, options=()):
+    normalised = normalise_question(text, options)
+    if len(normalised) <= SHINGLE_SIZE:
+        return {normalised}
+    return {normalised[i:i + SHINGLE_SIZE] for i in range(len(normalised) - SHINGLE_SIZE + 1)}
+
+
+def minhash_signature(text, options=()):
+    """MinHash signature (NUM_PERMUTATIONS 32-bit ints) of a question's shingles"""
+    hashes = [_hash(shingle.encode(), 4) for shingle in question_shingles(text, options)]
+    return [min(map(mask.__xor__, hashes)) for mask in _PERMUTATION_MASKS]
+
+
+def encode_signature(signature):
+    return base64.b64encode(struct.pack(_SIGNATURE_FORMAT, *signature)).decode()
+
+
+def decode_signature(encoded):
+    return list(struct.unpack(_SIGNATURE_FORMAT, base64.b64decode(encoded)))
+
+
+def band_buckets(signature):
+    """(band, bucket) pairs; bucket is a 63-bit hash of the band's rows"""
+    return [
+        (band, _hash(struct.pack(f'>{LSH_ROWS}I', *signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]), 8) >> 1)
+        for band in range(LSH_BANDS)
+    ]
+
+
+def estimated_similarity(signature, other):
+    """Estimated Jaccard similarity: the fraction of matching signature slots"""
+    return sum(1 for a, b in zip(signature, other) if a == b) / NUM_PERMUTATIONS
+
+
+def index_question(question, signature=None):
+    """Store a question's signature and replace its LSH bands (caller commits)"""
+    signature = signature or minhash_signature(question.text, question.options)
+    question.minhash = encode_signature(signature)
+    question.lsh_bands = [QuestionLSHBand(band=band, bucket=bucket) for band, bucket in band_buckets(signature)]
+    return signature
+
+
+class NearDuplicate:
+    """A match for a candidate question; question_id resolves once a batch match is flushed"""
+    
+    __slots__ = ('_question', 'similarity')
+    
+    def __init__(self, question, similarity):
+        self._question = question
+        self.similarity = similarity
+    
+    @property
+    def question_id(self):
+        return getattr(self._question, 'id', self._question)
+
+
+class DuplicateDetector:
+    """
+    Flags near-duplicates of incoming questions against the active bank and
+    against questions accepted earlier in the same batch. Deactivated
+    questions are not served, so a question resembling one is accepted, as
+    find_duplicate_groups leaves them out by default.
+    """
+    
+    def __init__(self, threshold=DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self._pending = {}
+    
+    def find(self, text, options=()):
+        """Return (signature, NearDuplicate or None) for a candidate question"""
+        signature = minhash_signature(text, options)
+        buckets = band_buckets(signature)
+        best = None
+        
+        # One probe of the (band, bucket) index for every band at once
+        rows = db.session.execute(
+            select(QuizQuestion.id, QuizQuestion.minhash).join(
+                QuestionLSHBand, QuestionLSHBand.question_id == QuizQuestion.id
+            ).where(
+                tuple_(QuestionLSHBand.band, QuestionLSHBand.bucket).in_(buckets),
+                QuizQuestion.is_active == True
+            ).distinct()
+        ).all()
+        candidates = [(question_id, decode_signature(encoded)) for question_id, encoded in rows if encoded]
+        for key in buckets:
+            candidates.extend(self._pending.get(key, ()))
+        
+        for question, other in candidates:
+            similarity = estimated_similarity(signature, other)
+            if similarity >= self.threshold and (best is None or similarity > best.similarity):
+                best = NearDuplicate(question, similarity)
+        return signature, best
+    
+    def add(self, question, signature):
+        """Index an accepted question for the rest of the batch and store its signature"""
+        index_question(question, signature)
+        for key in band_buckets(signature):
+            self._pending.setdefault(key, []).append((question, signature))
+
+
+def find_duplicate_groups(threshold=DEFAULT_THRESHOLD, include_inactive=False):
+    """
+    {kept question id: [(duplicate id, similarity), ...]} across the bank.
+    
+    Questions are visited oldest first and only kept questions are indexed,
+    so each duplicate maps to the oldest question it resembles. Questions
+    without a signature are skipped; run backfill_signatures first.
+    """
+    query = select(QuizQuestion.id, QuizQuestion.minhash).where(QuizQuestion.minhash.isnot(None))
+    if not include_inactive:
+        query = query.where(QuizQuestion.is_active == True)
+    
+    buckets = {}
+    groups = {}
+    for question_id, encoded in db.session.execute(query.order_by(QuizQuestion.id)):
+        signature = decode_signature(encoded)
+        keys = band_buckets(signature)
+        best = None
+        seen = set()
+        for key in keys:
+            for kept_id, kept_signature in buckets.get(key, ()):
+                if kept_id in seen:
+                    continue
+                seen.add(kept_id)
+                similarity = estimated_similarity(signature, kept_signature)
+                if similarity >= threshold and (best is None or similarity > best[1]):
+                    best = (kept_id, similarity)
+        if best is not None:
+            groups.setdefault(best[0], []).append((question_id, best[1]))
+            continue
+        for key in keys:
+            buckets.setdefault(key, []).append((question_id, signature))
+    return groups
+
+
+def backfill_signatures(batch_size=1000):
+    """Sign and band every question that has no signature yet; returns the count"""
+    total = 0
+    while True:
+        questions = QuizQuestion.query.filter(QuizQuestion.minhash.is_(None)).order_by(
+            QuizQuestion.id
+        ).limit(batch_size).all()
+        if not questions:
+            return total
+        for question in questions:
+            index_question(question)
+        db.session.commit()
+        total += len(questions)
+
+
+@event.listens_for(Session, 'before_flush')
+def _sign_questions(session, flush_context, instances):
+    """Keep signatures and bands in step with inserted and edited questions"""
+    for instance in session.new:
+        if isinstance(instance, QuizQuestion) and instance.minhash is None:
+            index_question(instance)
+    for instance in session.dirty:
+        if not isinstance(instance, QuizQuestion):
+            continue
+        state = inspect(instance)
+        if state.attrs.text.history.has_changes() or state.attrs.options.history.has_changes():
+            index_question(instance)
@@ -0,0 +1,152 @@
+"""
+Versioned question pool cache
+
+Questions barely change between admin uploads, so play and practice read
+them from an in-process LRU instead of the database. Pools are keyed by
+(exam_type, difficulty, active) and held as compact __slots__ records;
+single records are cached by id for roster lookups. Every admin write to
+questions bumps one version stamp, shared through Redis or the
+cache_version table, which retires every cached pool and record in all
+workers.
+
+Each question's public JSON (everything but the answer) is also encoded
+once per version, so responses splice cached bytes instead of rebuilding
+and re-encoding dicts.
+"""
+from app.models import QuizQuestion
+from app.utils.cache import LRUCache, VersionRegistry
+from app.utils.json_utils import encode_json, json_array
+
+QUESTIONS_VERSION_KEY = 'bank'
+
+question_versions = VersionRegistry('questions', persist=True)
+_pools = LRUCache(max_entries=64)
+_pool_ids = LRUCache(max_entries=64)
+_records = LRUCache(max_entries=20000)
+_fragments = LRUCache(max_entries=40000)
+
+
+class QuestionRecord:
+    """Read-only copy of a QuizQuestion row"""
+    
+    __slots__ = ('id', 'text', 'options', 'answer', 'difficulty', 'exam_type', 'hint', 'is_active', 'created_at')
+    
+    def __init__(self, question):
+        for name in self.__slots__:
+            setattr(self, name, getattr(question, name))
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'text': self.text,
+            'options': self.options,
+            'answer': self.answer,
+            'difficulty': self.difficulty,
+            'exam_type': self.exam_type,
+            'hint': self.hint,
+            'is_active': self.is_active,
+            'created_at': self.created_at.isoformat()
+        }
+
+
+def questions_version():
+    return question_versions.get(QUESTIONS_VERSION_KEY)
+
+
+def invalidate_question_caches():
+    """Call after committing any change to questions"""
+    return question_versions.bump(QUESTIONS_VERSION_KEY)
+
+
+def _pool_key(exam_type, difficulty, active):
+    exam_key = tuple(sorted(exam_type)) if isinstance(exam_type, (list, tuple, set)) else exam_type
+    return (questions_version(), exam_key, difficulty, active)
+
+
+def question_pool(exam_type=None, difficulty=None, active=True):
+    """
+    Cached questions matching the filters, ordered by id.
+    
+    None leaves a filter open; exam_type may also be a list of names.
+    """
+    cache_key = _pool_key(exam_type, difficulty, active)
+    version, exam_key = cache_key[:2]
+    
+    pool = _pools.get(cache_key)
+    if pool is None:
+        query = QuizQuestion.query
+        if isinstance(exam_key, tuple):
+            query = query.filter(QuizQuestion.exam_type.in_(exam_key))
+        elif exam_type is not None:
+            query = query.filter(QuizQuestion.exam_type == exam_type)
+        if difficulty is not None:
+            query = query.filter(QuizQuestion.difficulty == difficulty)
+        if active is not None:
+            query = query.filter(QuizQuestion.is_active == active)
+        
+        pool = tuple(QuestionRecord(question) for question in query.order_by(QuizQuestion.id))
+        _pools.set(cache_key, pool)
+        for record in pool:
+            _records.set((version, record.id), record)
+    return pool
+
+
+def question_pool_ids(exam_type=None, difficulty=None, active=True):
+    """Ids of question_pool() with the same filters, in the same order, for bisecting by id"""
+    cache_key = _pool_key(exam_type, difficulty, active)
+    ids = _pool_ids.get(cache_key)
+    if ids is None:
+        ids = tuple(record.id for record in question_pool(exam_type, difficulty, active))
+        _pool_ids.set(cache_key, ids)
+    return ids
+
+
+def question_records(question_ids):
+    """Cached records for the given ids, in the same order; unknown ids are skipped"""
+    version = questions_version()
+    found = {}
+    missing = []
+    for question_id in question_ids:
+        record = _records.get((version, question_id))
+        if record is None:
+            missing.append(question_id)
+        else:
+            found[question_id] = record
+    
+    if missing:
+        for question in QuizQuestion.query.filter(QuizQuestion.id.in_(missing)):
+            record = QuestionRecord(question)
+            _records.set((version, record.id), record)
+            found[record.id] = record
+    return [found[question_id] for question_id in question_ids if question_id in found]
+
+
+def questions_json(questions, include_answer=False):
+    """
+    Pre-encoded JSON array of questions (records or QuizQuestion rows).
+    
+    The answer is left out unless include_answer is set.
+    """
+    version = questions_version()
+    fragments = []
+    for question in questions:
+        key = (version, question.id, include_answer)
+        fragment = _fragments.get(key)
+        if fragment is None:
+            payload = question.to_dict()
+            if not include_answer:
+                payload.pop('answer', None)
+            fragment = encode_json(payload)
+            _fragments.set(key, fragment)
+        fragments.append(fragment)
+    return json_array(fragments)
+
+
+def pool_cache_stats():
+    return {
+        'version': questions_version(),
+        'pools': _pools.stats(),
+        'pool_ids': _pool_ids.stats(),
+        'records': _records.stats(),
+        'fragments': _fragments.stats()
+    }
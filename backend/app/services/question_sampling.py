@@ -0,0 +1,78 @@
+"""
+In-database question sampling
+
+Picks N random question ids inside the database and hydrates only those
+rows, instead of loading a whole exam_type pool as ORM objects and
+shuffling it in Python. Only ids are selected, and the criteria are the
+columns of the partial ix_quiz_question_active_exam_difficulty index, so
+the pool is read as an index-only list of ids and ordered by random() with
+a top-N sort. Table pages are never scanned: TABLESAMPLE would read every
+page of quiz_question, and random-start-id probes over-pick questions that
+follow id gaps, which batch PDF uploads leave between exam types.
+"""
+import random
+from sqlalchemy import func, select
+from app import db
+from app.models import QuizQuestion
+
+
+def _criteria(table, criteria):
+    """WHERE clauses for {column: value}; list/tuple values become IN"""
+    clauses = []
+    for name, value in criteria.items():
+        column = table.c[name]
+        if isinstance(value, (list, tuple, set)):
+            clauses.append(column.in_(list(value)))
+        else:
+            clauses.append(column == value)
+    return clauses
+
+
+def count_questions(**criteria):
+    """Number of questions matching the criteria (active ones unless is_active is given)"""
+    criteria.setdefault('is_active', True)
+    table = QuizQuestion.__table__
+    return db.session.execute(
+        select(func.count(table.c.id)).where(*_criteria(table, criteria))
+    ).scalar() or 0
+
+
+def sample_question_ids(count, population=None, **criteria):
+    """
+    Up to `count` distinct random question ids matching the criteria.
+    
+    Active questions only unless is_active is given explicitly. Callers that
+    already know the pool size (e.g. from the availability matrix) pass it
+    as `population` to skip the count query.
+    """
+    criteria.setdefault('is_active', True)
+    if count <= 0:
+        return []
+    
+    table = QuizQuestion.__table__
+    if population is None:
+        population = count_questions(**criteria)
+    if population == 0:
+        return []
+    
+    if population <= count:
+        ids = list(db.session.execute(select(table.c.id).where(*_criteria(table, criteria))).scalars())
+        random.shuffle(ids)
+        return ids[:count]
+    
+    return list(db.session.execute(
+        select(table.c.id).where(*_criteria(table, criteria)).order_by(func.random()).limit(count)
+    ).scalars())
+
+
+def load_questions(question_ids):
+    """Hydrate questions by id, preserving the order of question_ids"""
+    if not question_ids:
+        return []
+    by_id = {question.id: question for question in QuizQuestion.query.filter(QuizQuestion.id.in_(question_ids))}
+    return [by_id[question_id] for question_id in question_ids if question_id in by_id]
+
+
+def sample_questions(count, population=None, **criteria):
+    """Up to `count` random QuizQuestion rows matching the criteria"""
+    return load_questions(sample_question_ids(count, population, **criteria))
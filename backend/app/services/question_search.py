@@ -0,0 +1,136 @@
+"""
+Full-text question search
+
+Admins search the question bank by words in the question text and hint.
+PostgreSQL matches a tsvector expression backed by a GIN index; SQLite
+uses an FTS5 external-content table that triggers keep in step with every
+insert, update and delete on quiz_question, including bulk PDF uploads.
+Every search term is matched as a prefix, results are ranked (ts_rank /
+bm25) and can be filtered by exam_type, difficulty and active state. A
+database without the index (an older SQLite build without FTS5, or a
+schema the migration has not reached) falls back to LIKE matching. The
+plain newest-first listing lives here too, so the query-plan check runs
+the same query the admin route does.
+"""
+import re
+from flask import current_app
+from sqlalchemy import DDL, and_, bindparam, column, event, func, literal_column, or_, select, table
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from app import db
+from app.models import QuizQuestion
+from app.services.question_sampling import load_questions
+
+MAX_SEARCH_TERMS = 8
+
+_fts = table('quiz_question_fts', column('rowid'))
+
+# Must match the indexed expression exactly for PostgreSQL to use the index.
+# No stemming on either dialect: stemmers also rewrite prefix terms
+# ('enzy' becomes 'enzi'), which breaks prefix matching.
+SEARCH_DOCUMENT_SQL = "to_tsvector('simple', coalesce(text, '') || ' ' || coalesce(hint, ''))"
+
+SEARCH_DDL = {
+    'postgresql': [
+        f"CREATE INDEX IF NOT EXISTS ix_quiz_question_search ON quiz_question USING GIN ({SEARCH_DOCUMENT_SQL})",
+    ],
+    'sqlite': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS quiz_question_fts USING fts5("
+        "text, hint, content='quiz_question', content_rowid='id', tokenize='unicode61')",
+        "CREATE TRIGGER IF NOT EXISTS quiz_question_fts_insert AFTER INSERT ON quiz_question BEGIN "
+        "INSERT INTO quiz_question_fts(rowid, text, hint) VALUES (new.id, new.text, new.hint); END",
+        "CREATE TRIGGER IF NOT EXISTS quiz_question_fts_delete AFTER DELETE ON quiz_question BEGIN "
+        "INSERT INTO quiz_question_fts(quiz_question_fts, rowid, text, hint) VALUES ('delete', old.id, old.text, old.hint); END",
+        "CREATE TRIGGER IF NOT EXISTS quiz_question_fts_update AFTER UPDATE OF text, hint ON quiz_question BEGIN "
+        "INSERT INTO quiz_question_fts(quiz_question_fts, rowid, text, hint) VALUES ('delete', old.id, old.text, old.hint); "
+        "INSERT INTO quiz_question_fts(rowid, text, hint) VALUES (new.id, new.text, new.hint); END",
+    ],
+}
+
+# Fresh databases built with create_all get the index with the table
+for _dialect, _statements in SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(QuizQuestion.__table__, 'after_create', DDL(_statement).execute_if(dialect=_dialect))
+
+
+def search_terms(query):
+    """Lower-cased word terms of a search string, at most MAX_SEARCH_TERMS"""
+    return re.findall(r'\w+', (query or '').lower())[:MAX_SEARCH_TERMS]
+
+
+def _filters(exam_type=None, difficulty=None, include_inactive=False):
+    clauses = []
+    if exam_type:
+        clauses.append(QuizQuestion.exam_type == exam_type)
+    if difficulty:
+        clauses.append(QuizQuestion.difficulty == difficulty)
+    if not include_inactive:
+        clauses.append(QuizQuestion.is_active == True)
+    return clauses
+
+
+def _postgresql_ids(terms, filters, limit, offset):
+    document = literal_column(SEARCH_DOCUMENT_SQL)
+    tsquery = func.to_tsquery(literal_column("'simple'"), bindparam('search_query'))
+    statement = select(QuizQuestion.id).where(
+        document.op('@@')(tsquery), *filters
+    ).order_by(func.ts_rank(document, tsquery).desc(), QuizQuestion.id).limit(limit).offset(offset)
+    # Every term must match, each as a prefix
+    return db.session.execute(statement, {'search_query': ' & '.join(f"{term}:*" for term in terms)}).scalars().all()
+
+
+def _sqlite_ids(terms, filters, limit, offset):
+    statement = select(QuizQuestion.id).join_from(
+        QuizQuestion, _fts, _fts.c.rowid == QuizQuestion.id
+    ).where(
+        literal_column('quiz_question_fts').op('MATCH')(bindparam('search_query')), *filters
+    ).order_by(literal_column('bm25(quiz_question_fts)'), QuizQuestion.id).limit(limit).offset(offset)
+    # Quoted terms are matched literally; the trailing * makes each a prefix
+    return db.session.execute(statement, {'search_query': ' '.join(f'"{term}"*' for term in terms)}).scalars().all()
+
+
+def _like_ids(terms, filters, limit, offset):
+    matches = [
+        or_(QuizQuestion.text.ilike(f"%{term}%"), QuizQuestion.hint.ilike(f"%{term}%"))
+        for term in terms
+    ]
+    statement = select(QuizQuestion.id).where(and_(*matches), *filters).order_by(
+        QuizQuestion.id.desc()
+    ).limit(limit).offset(offset)
+    return db.session.execute(statement).scalars().all()
+
+
+def question_listing(include_inactive=False):
+    """
+    The admin question listing, newest first.
+    
+    Returns the query unexecuted so callers can page it; ordered to walk
+    ix_quiz_question_created_at rather than sort the table.
+    """
+    query = QuizQuestion.query
+    if not include_inactive:
+        query = query.filter_by(is_active=True)
+    return query.order_by(QuizQuestion.created_at.desc(), QuizQuestion.id.desc())
+
+
+def search_questions(query, exam_type=None, difficulty=None, include_inactive=False, limit=50, offset=0):
+    """
+    Questions matching every word of `query` as a prefix, best match first.
+    
+    Returns a list of QuizQuestion rows; an empty query matches nothing.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+    
+    filters = _filters(exam_type, difficulty, include_inactive)
+    dialect = db.session.get_bind().dialect.name
+    search = {'postgresql': _postgresql_ids, 'sqlite': _sqlite_ids}.get(dialect, _like_ids)
+    try:
+        ids = search(terms, filters, limit, offset)
+    except (OperationalError, ProgrammingError) as e:
+        if search is _like_ids:
+            raise
+        current_app.logger.warning(f"⚠️ Full-text search unavailable on {dialect}, using LIKE: {str(e)}")
+        db.session.rollback()
+        ids = _like_ids(terms, filters, limit, offset)
+    return load_questions(ids)
@@ -0,0 +1,46 @@
+"""
+Answer scoring
+
+Challenge submits, practice checks and practice submits all score the same
+way: +4 for a correct answer, -1 for a wrong one, nothing for a question
+left unanswered, floored at zero. Answers are compared against the answer
+key recorded with the attempt as two aligned sequences in one pass.
+"""
+from collections import namedtuple
+from operator import eq
+
+CORRECT_POINTS = 4
+WRONG_PENALTY = 1
+MAX_SCORED_QUESTIONS = 100
+
+ScoreCard = namedtuple('ScoreCard', ['total_questions', 'correct_answers', 'wrong_answers', 'unanswered', 'score'])
+
+
+class ScoringError(ValueError):
+    """Raised when submitted questions or answers cannot be scored"""
+
+
+def parse_answers(answers):
+    """{question_id: option index} as ints; unanswered (None) entries are dropped"""
+    try:
+        return {int(question_id): int(answer) for question_id, answer in (answers or {}).items() if answer is not None}
+    except (TypeError, ValueError, AttributeError):
+        raise ScoringError('answers must map question ids to option indexes')
+
+
+def score_answers(question_ids, answer_key, answers):
+    """
+    ScoreCard for `answers` ({question_id: option}) against `answer_key`,
+    the correct options aligned with `question_ids`.
+    """
+    given = [answers.get(question_id) for question_id in question_ids]
+    answered = len(given) - given.count(None)
+    correct = sum(map(eq, given, answer_key))
+    wrong = answered - correct
+    return ScoreCard(
+        len(question_ids),
+        correct,
+        wrong,
+        len(question_ids) - answered,
+        max(0, correct * CORRECT_POINTS - wrong * WRONG_PENALTY)
+    )
@@ -0,0 +1,237 @@
+"""
+Group-commit submission pipeline
+
+When a challenge deadline passes every player's timer auto-submits within
+the same second, and each submit pays for its own transaction: an attempt
+claim, a result read and write, two leaderboard upserts and a commit. With
+SUBMIT_GROUP_COMMIT_MS set, submits arriving within that window are written
+together instead: one attempt claim, one result read, one QuizResult
+upsert, one upsert per leaderboard table and a single commit. Each request
+still waits for and returns its own result.
+
+The first submit of a burst leads: it waits out the window, writes the
+queued batch in its own session and hands over to the next queued submit.
+A batch that fails is rolled back and each of its submits is retried on
+its own. A queued submit waits at most SUBMIT_GROUP_COMMIT_TIMEOUT for a
+batch to pick it up (a stalled leader cannot hold the queue); then it
+leaves the queue and commits on its own. Attempt claims are single-use, so
+a submit that gives up on a batch already writing it cannot be counted
+twice.
+"""
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import tuple_
+from app import db
+from app.models import QuizResult
+from app.models.quiz_result import period_key
+from app.services.challenge_attempts import claim_attempts
+from app.services.leaderboard_cache import invalidate_boards
+from app.services.leaderboard_events import publish_submission
+from app.services.leaderboard_service import leaderboard_period, record_result_changes, segment_keys
+from app.utils.db_utils import upsert
+
+DEFAULT_MAX_BATCH = 200
+DEFAULT_WAIT_TIMEOUT = 10
+
+RESULT_KEY_COLUMNS = ['user_id', 'challenge_id']
+RESULT_VALUE_COLUMNS = ['score', 'total_questions', 'correct_answers', 'wrong_answers',
+                        'time_taken', 'submitted_at', 'updated_at', 'period']
+
+SubmissionOutcome = namedtuple('SubmissionOutcome', ['claimed', 'result', 'message'])
+
+
+class Submission:
+    """A scored challenge submit waiting to be written"""
+    
+    __slots__ = ('attempt', 'challenge', 'score', 'correct_answers', 'wrong_answers', 'time_taken',
+                 'outcome', 'failed', 'lead', 'ready')
+    
+    def __init__(self, attempt, challenge, score, correct_answers, wrong_answers, time_taken):
+        self.attempt = attempt
+        self.challenge = challenge
+        self.score = score
+        self.correct_answers = correct_answers
+        self.wrong_answers = wrong_answers
+        self.time_taken = time_taken
+        self.outcome = None
+        self.failed = False
+        self.lead = False
+        self.ready = threading.Event()
+    
+    @property
+    def result_key(self):
+        return self.attempt.user_id, self.challenge.id
+
+
+def write_submissions(submissions):
+    """
+    Write scored submits in the current session with a single commit.
+    
+    A (user, challenge) pair may appear at most once per call. Returns a
+    SubmissionOutcome per submission, in order; attempts that were already
+    submitted come back with claimed=False and are not written.
+    """
+    claimed_ids = claim_attempts([submission.attempt for submission in submissions])
+    claimed = [submission for submission in submissions if submission.attempt.id in claimed_ids]
+    if not claimed:
+        db.session.rollback()
+        return [SubmissionOutcome(False, None, None) for _ in submissions]
+    
+    result_keys = [submission.result_key for submission in claimed]
+    result_filter = tuple_(QuizResult.user_id, QuizResult.challenge_id).in_(result_keys)
+    previous = {
+        (user_id, challenge_id): (score, submitted_at)
+        for user_id, challenge_id, score, submitted_at in db.session.query(
+            QuizResult.user_id, QuizResult.challenge_id, QuizResult.score, QuizResult.submitted_at
+        ).filter(result_filter).with_for_update()
+    }
+    
+    submitted_at = datetime.utcnow()
+    upsert(
+        QuizResult,
+        [{
+            'user_id': submission.attempt.user_id,
+            'challenge_id': submission.challenge.id,
+            'score': submission.score,
+            'total_questions': len(submission.attempt.question_ids),
+            'correct_answers': submission.correct_answers,
+            'wrong_answers': submission.wrong_answers,
+            'time_taken': submission.time_taken,
+            'submitted_at': submitted_at,
+            'updated_at': submitted_at,
+            'period': period_key(submitted_at)
+        } for submission in claimed],
+        RESULT_KEY_COLUMNS,
+        replace_columns=RESULT_VALUE_COLUMNS
+    )
+    
+    # Leaderboard deltas commit in the same transaction as the results
+    record_result_changes([
+        (submission.attempt.user_id, submission.score, submitted_at)
+        + previous.get(submission.result_key, (None, None))
+        + ((submission.challenge.exam_type, submission.challenge.difficulty),)
+        for submission in claimed
+    ])
+    
+    db.session.commit()
+    current_app.logger.info(f"💾 Wrote {len(claimed)} challenge submissions in one transaction")
+    
+    touched = {}
+    for submission in claimed:
+        periods, segments = touched.setdefault(submission.challenge.id, (set(), set()))
+        periods.add(leaderboard_period(submitted_at))
+        old_submitted_at = previous.get(submission.result_key, (None, None))[1]
+        if old_submitted_at:
+            periods.add(leaderboard_period(old_submitted_at))
+        segments.update(segment_keys(submission.challenge.exam_type, submission.challenge.difficulty))
+    for challenge_id, (periods, segments) in touched.items():
+        invalidate_boards(challenge_id=challenge_id, periods=periods, segments=segments)
+    
+    results = {(result.user_id, result.challenge_id): result for result in QuizResult.query.filter(result_filter)}
+    outcomes = {}
+    for submission in claimed:
+        result = results[submission.result_key]
+        old_score, old_submitted_at = previous.get(submission.result_key, (None, None))
+        publish_submission(result, old_score, old_submitted_at)
+        if old_score is None:
+            message = 'Challenge submitted successfully'
+        else:
+            message = 'Challenge updated successfully - your latest attempt has been recorded'
+        outcomes[submission.attempt.id] = SubmissionOutcome(True, result.to_dict(), message)
+    
+    return [
+        outcomes.get(submission.attempt.id) or SubmissionOutcome(False, None, None)
+        for submission in submissions
+    ]
+
+
+class SubmissionPipeline:
+    """Per-process queue that coalesces concurrent submits into batches"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue = []
+        self._leading = False
+    
+    def submit(self, submission, window, max_batch, timeout=DEFAULT_WAIT_TIMEOUT):
+        with self._lock:
+            self._queue.append(submission)
+            if not self._leading:
+                self._leading = submission.lead = True
+        
+        # Nothing is pending in this session; free its connection while queued
+        db.session.close()
+        
+        if not submission.lead and not submission.ready.wait(timeout):
+            with self._lock:
+                # Still queued and not handed the lead: no batch took it in time
+                if not submission.lead and submission in self._queue:
+                    self._queue.remove(submission)
+                    submission.failed = True
+            if not submission.failed and not submission.lead and not submission.ready.wait(timeout):
+                # Its batch is still writing; the attempt claim keeps a retry from counting twice
+                submission.failed = True
+            if submission.failed:
+                current_app.logger.warning(f"⚠️ Submission for attempt {submission.attempt.id} timed out in the group-commit queue, writing it alone")
+        if submission.outcome is None and not submission.failed:
+            self._flush(window, max_batch)
+        
+        if submission.failed:
+            return write_submissions([submission])[0]
+        return submission.outcome
+    
+    def _flush(self, window, max_batch):
+        with self._lock:
+            queued = len(self._queue)
+        if queued < max_batch:
+            time.sleep(window)
+        
+        with self._lock:
+            batch, rest, keys = [], [], set()
+            for submission in self._queue:
+                # A user's repeat submit waits for the next batch
+                if len(batch) < max_batch and submission.result_key not in keys:
+                    batch.append(submission)
+                    keys.add(submission.result_key)
+                else:
+                    rest.append(submission)
+            self._queue = rest
+        
+        try:
+            for submission, outcome in zip(batch, write_submissions(batch)):
+                submission.outcome = outcome
+        except Exception as e:
+            current_app.logger.error(f"❌ Group commit of {len(batch)} submissions failed, retrying individually: {str(e)}")
+            db.session.rollback()
+            for submission in batch:
+                submission.failed = True
+        finally:
+            with self._lock:
+                successor = self._queue[0] if self._queue else None
+                if successor is not None:
+                    successor.lead = True
+                else:
+                    self._leading = False
+            for submission in batch:
+                submission.ready.set()
+            if successor is not None:
+                successor.ready.set()
+
+
+_pipeline = SubmissionPipeline()
+
+
+def record_submission(submission):
+    """Write one scored submit, through the group-commit queue when it is enabled"""
+    window_ms = current_app.config.get('SUBMIT_GROUP_COMMIT_MS') or 0
+    if window_ms <= 0:
+        return write_submissions([submission])[0]
+    return _pipeline.submit(
+        submission,
+        window_ms / 1000.0,
+        current_app.config.get('SUBMIT_GROUP_COMMIT_MAX_BATCH') or DEFAULT_MAX_BATCH,
+        current_app.config.get('SUBMIT_GROUP_COMMIT_TIMEOUT') or DEFAULT_WAIT_TIMEOUT
+    )
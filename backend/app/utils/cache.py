@@ -0,0 +1,160 @@
+"""
+In-process caching primitives shared by the read-heavy endpoints
+"""
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with an optional per-entry time-to-live.
+    
+    Args:
+        max_entries (int): Entries kept before the least recently used is evicted
+        ttl (float): Seconds an entry stays valid, or None to keep it until evicted
+    """
+    
+    def __init__(self, max_entries=512, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None:
+                value, expires_at = item
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+    
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def pop(self, key):
+        with self._lock:
+            item = self._entries.pop(key, None)
+        return item[0] if item else None
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self):
+        with self._lock:
+            size = len(self._entries)
+        lookups = self.hits + self.misses
+        return {
+            'entries': size,
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits / lookups * 100) if lookups else 0
+        }
+
+
+class VersionRegistry:
+    """
+    Monotonic version counters used to invalidate cached data.
+    
+    Counters live in Redis when the app has a Redis client, so a bump in one
+    gunicorn worker is seen by every worker and node; reads are memoised for
+    `refresh_interval` seconds to keep Redis off the hot path. Without Redis
+    the counters are per process, unless `persist` is set, in which case they
+    are kept in the cache_version table instead (same memoisation).
+    """
+    
+    def __init__(self, namespace, refresh_interval=1.0, persist=False):
+        self.namespace = namespace
+        self.refresh_interval = refresh_interval
+        self.persist = persist
+        self._local = {}
+        self._memo = {}
+        self._lock = threading.Lock()
+    
+    def _redis(self):
+        try:
+            return getattr(current_app, 'redis_client', None)
+        except RuntimeError:
+            return None
+    
+    def _redis_key(self, key):
+        return f"{self.namespace}:version:{':'.join(str(part) for part in key) if isinstance(key, tuple) else key}"
+    
+    def _read_shared(self, redis_client, key):
+        if redis_client is not None:
+            return int(redis_client.get(self._redis_key(key)) or 0)
+        
+        # Own connection, so a failed read cannot abort the request's transaction
+        from sqlalchemy import select
+        from app import db
+        from app.models import CacheVersion
+        with db.engine.connect() as connection:
+            return connection.execute(
+                select(CacheVersion.version).where(CacheVersion.name == self._redis_key(key))
+            ).scalar() or 0
+    
+    def _bump_shared(self, redis_client, key):
+        if redis_client is not None:
+            return int(redis_client.incr(self._redis_key(key)))
+        
+        from sqlalchemy import select
+        from app import db
+        from app.models import CacheVersion
+        from app.utils.db_utils import upsert
+        name = self._redis_key(key)
+        # Own connection and transaction, so a bump never commits the caller's session
+        with db.engine.begin() as connection:
+            upsert(CacheVersion, [{'name': name, 'version': 1}], ['name'], increment_columns=['version'],
+                   connection=connection)
+            return connection.execute(
+                select(CacheVersion.version).where(CacheVersion.name == name)
+            ).scalar() or 0
+    
+    def get(self, key):
+        redis_client = self._redis()
+        if redis_client is None and not self.persist:
+            with self._lock:
+                return self._local.get(key, 0)
+        
+        memo = self._memo.get(key)
+        now = time.monotonic()
+        if memo and now - memo[1] < self.refresh_interval:
+            return memo[0]
+        try:
+            version = self._read_shared(redis_client, key)
+        except Exception as e:
+            current_app.logger.warning(f"⚠️ Version lookup failed for {self.namespace}: {str(e)}")
+            with self._lock:
+                return self._local.get(key, 0)
+        self._memo[key] = (version, now)
+        return version
+    
+    def bump(self, key):
+        with self._lock:
+            version = self._local.get(key, 0) + 1
+            self._local[key] = version
+        
+        redis_client = self._redis()
+        if redis_client is not None or self.persist:
+            try:
+                version = self._bump_shared(redis_client, key)
+            except Exception as e:
+                current_app.logger.warning(f"⚠️ Version bump failed for {self.namespace}: {str(e)}")
+            self._memo[key] = (version, time.monotonic())
+        return version
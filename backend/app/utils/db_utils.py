@@ -5,6 +5,7 @@ import functools
 import time
 from flask import current_app
 from app import db
+from sqlalchemy import func
 from sqlalchemy.exc import DisconnectionError, OperationalError, TimeoutError
 
 
@@ -111,4 +112,65 @@ def get_db_stats():
         }
     except Exception as e:
         current_app.logger.error(f"❌ Failed to get DB stats: {str(e)}")
-        return None
\ No newline at end of file
+        return None
+
+
+def upsert(model, rows, conflict_columns, increment_columns=(), replace_columns=(), connection=None):
+    """
+    Insert rows, resolving conflicts on a unique key in the same statement
+    
+    Args:
+        model: Mapped model whose table has a unique constraint on `conflict_columns`
+        rows (list): Dicts of column values to insert
+        conflict_columns (list): Columns of the unique constraint
+        increment_columns (list): Columns added to the existing value on conflict
+        replace_columns (list): Columns overwritten with the new value on conflict
+        connection: Connection to run on instead of the session, for writes
+            that must commit apart from the caller's transaction
+    
+    Uses INSERT ... ON CONFLICT DO UPDATE on PostgreSQL and SQLite, so
+    concurrent writers neither lose increments nor create duplicate rows.
+    Other dialects fall back to a locked read-modify-write. Runs inside the
+    current session (or connection) transaction; the caller commits.
+    """
+    if not rows:
+        return
+    
+    table = model.__table__
+    executor = connection if connection is not None else db.session
+    dialect = (connection if connection is not None else db.session.get_bind()).dialect.name
+    
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        
+        statement = insert(table).values(rows)
+        on_conflict = {
+            column: func.coalesce(table.c[column], 0) + statement.excluded[column]
+            for column in increment_columns
+        }
+        on_conflict.update({column: statement.excluded[column] for column in replace_columns})
+        executor.execute(statement.on_conflict_do_update(index_elements=list(conflict_columns), set_=on_conflict))
+        return
+    
+    if connection is not None:
+        for row in rows:
+            keys = [table.c[column] == row[column] for column in conflict_columns]
+            values = {column: func.coalesce(table.c[column], 0) + row[column] for column in increment_columns}
+            values.update({column: row[column] for column in replace_columns})
+            if not connection.execute(table.update().where(*keys).values(values)).rowcount:
+                connection.execute(table.insert().values(row))
+        return
+    
+    for row in rows:
+        keys = {column: row[column] for column in conflict_columns}
+        existing = db.session.query(model).filter_by(**keys).with_for_update().first()
+        if existing is None:
+            db.session.add(model(**row))
+            continue
+        for column in increment_columns:
+            setattr(existing, column, (getattr(existing, column) or 0) + row[column])
+        for column in replace_columns:
+            setattr(existing, column, row[column])
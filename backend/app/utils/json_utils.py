@@ -0,0 +1,31 @@
+"""
+Responses assembled from pre-encoded JSON fragments
+"""
+import json
+from flask import current_app
+
+
+class RawJSON(bytes):
+    """Bytes that already hold valid JSON; spliced into responses as-is"""
+
+
+def encode_json(value):
+    return json.dumps(value, separators=(',', ':')).encode()
+
+
+def json_array(fragments):
+    """Join pre-encoded JSON values into a JSON array"""
+    return RawJSON(b'[' + b','.join(fragments) + b']')
+
+
+def spliced_json_response(fields, status=200):
+    """
+    JSON object response whose RawJSON values are copied without re-encoding.
+    
+    Other values are encoded normally.
+    """
+    body = b'{' + b','.join(
+        encode_json(key) + b':' + (value if isinstance(value, RawJSON) else encode_json(value))
+        for key, value in fields.items()
+    ) + b'}'
+    return current_app.response_class(body, status=status, mimetype='application/json')
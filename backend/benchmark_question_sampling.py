@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Question Sampling Benchmark
+Compares loading a whole exam_type pool and shuffling it in Python against
+sampling ids in the database and hydrating only the chosen rows.
+
+Usage:
+    python benchmark_question_sampling.py [--questions 30000] [--count 10] [--runs 20]
+
+Uses DATABASE_URL if set, otherwise a throwaway SQLite file.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///benchmark_sampling.db')
+os.environ.setdefault('JWT_SECRET', 'benchmark-secret-key')
+os.environ.setdefault('FLASK_ENV', 'development')
+
+from app import create_app, db
+from app.models import QuizQuestion
+from app.services.question_sampling import sample_questions
+
+EXAM_TYPE = 'JEE Main'
+DIFFICULTY = 'medium'
+BENCH_MARKER = '[benchmark]'
+
+
+def seed(total):
+    existing = QuizQuestion.query.filter(QuizQuestion.text.startswith(BENCH_MARKER)).count()
+    if existing >= total:
+        return existing
+
+    print(f"🌱 Seeding {total - existing} benchmark questions...")
+    batch = []
+    for i in range(existing, total):
+        batch.append({
+            'text': f"{BENCH_MARKER} Question {i}: " + 'A projectile is launched at an angle. ' * 8,
+            'options': [f"Option {n} for question {i}" for n in range(4)],
+            'answer': random.randrange(4),
+            'difficulty': random.choice(['easy', 'medium', 'tough']),
+            'exam_type': EXAM_TYPE,
+            'hint': 'Resolve the velocity into components.',
+            'is_active': True
+        })
+        if len(batch) == 1000:
+            db.session.bulk_insert_mappings(QuizQuestion, batch)
+            db.session.commit()
+            batch = []
+    if batch:
+        db.session.bulk_insert_mappings(QuizQuestion, batch)
+        db.session.commit()
+    return total
+
+
+def legacy_select(count):
+    questions = QuizQuestion.query.filter_by(exam_type=EXAM_TYPE, difficulty=DIFFICULTY, is_active=True).all()
+    random.shuffle(questions)
+    return questions[:count], len(questions)
+
+
+def sampled_select(count):
+    questions = sample_questions(count, exam_type=EXAM_TYPE, difficulty=DIFFICULTY)
+    return questions, len(questions)
+
+
+def bench(name, fn, count, runs):
+    timings = []
+    hydrated = 0
+    for _ in range(runs):
+        db.session.expunge_all()
+        start = time.perf_counter()
+        selected, hydrated = fn(count)
+        timings.append((time.perf_counter() - start) * 1000)
+        assert len(selected) == count, f"{name} returned {len(selected)} questions"
+    timings.sort()
+    print(f"  {name:<10} median {statistics.median(timings):8.2f} ms   "
+          f"p95 {timings[int(len(timings) * 0.95) - 1]:8.2f} ms   rows hydrated {hydrated}")
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark question selection strategies')
+    parser.add_argument('--questions', type=int, default=30000, help='benchmark questions to seed')
+    parser.add_argument('--count', type=int, default=10, help='questions per selection')
+    parser.add_argument('--runs', type=int, default=20, help='selections per strategy')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        total = seed(args.questions)
+        dialect = db.session.get_bind().dialect.name
+        print(f"🚀 {dialect}: {total} benchmark questions, selecting {args.count}, {args.runs} runs")
+
+        legacy = bench('legacy', legacy_select, args.count, args.runs)
+        sampled = bench('sampled', sampled_select, args.count, args.runs)
+        print(f"📊 Speedup: {legacy / sampled:.1f}x")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Challenge Submission Load Test
+Fires a burst of simultaneous challenge submits, as at a challenge deadline,
+once with every submit in its own transaction and once through the
+group-commit pipeline, and compares the latency percentiles.
+
+Usage:
+    python load_test_submissions.py [--users 500] [--window-ms 5] [--rounds 1]
+
+Uses DATABASE_URL if set, otherwise a throwaway SQLite file. PostgreSQL
+gives the representative numbers; SQLite serialises all writers.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///load_test_submissions.db')
+os.environ.setdefault('JWT_SECRET', 'load-test-secret-key')
+os.environ.setdefault('FLASK_ENV', 'development')
+
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.models import Challenge, QuizQuestion, User
+from app.services.challenge_attempts import create_attempt
+from app.services.challenge_roster import build_roster, questions_for_user
+from app.services.leaderboard_service import leaderboard_period, reconcile_leaderboard
+
+LOAD_MARKER = 'loadtest'
+QUESTIONS_PER_CHALLENGE = 10
+
+
+def seed_users(total):
+    existing = User.query.filter(User.username.startswith(LOAD_MARKER)).count()
+    if existing < total:
+        print(f"🌱 Seeding {total - existing} load test users...")
+        template = User()
+        template.set_password('load-test-password')
+        for i in range(existing, total):
+            db.session.add(User(
+                username=f"{LOAD_MARKER}{i}",
+                email=f"{LOAD_MARKER}{i}@example.com",
+                password_hash=template.password_hash
+            ))
+        db.session.commit()
+    return User.query.filter(User.username.startswith(LOAD_MARKER)).order_by(User.id).limit(total).all()
+
+
+def seed_questions():
+    if QuizQuestion.query.filter_by(is_active=True).count() >= QUESTIONS_PER_CHALLENGE:
+        return
+    for i in range(QUESTIONS_PER_CHALLENGE):
+        db.session.add(QuizQuestion(
+            text=f"[{LOAD_MARKER}] Question {i}",
+            options=[f"Option {n}" for n in range(4)],
+            answer=random.randrange(4),
+            difficulty='medium',
+            exam_type='JEE Main',
+            is_active=True
+        ))
+    db.session.commit()
+
+
+def prepare_round(users, label):
+    """A fresh challenge with one played attempt per user"""
+    challenge = Challenge(
+        name=f"{LOAD_MARKER} {label} {time.time():.0f}",
+        code=''.join(random.choices('ABCDEFGHJKLMNPQRSTUVWXYZ23456789', k=6)),
+        exam_type='JEE Main',
+        difficulty='medium',
+        question_count=QUESTIONS_PER_CHALLENGE,
+        time_limit=10,
+        created_by=users[0].id
+    )
+    db.session.add(challenge)
+    db.session.flush()
+    build_roster(challenge)
+    db.session.commit()
+    
+    requests = []
+    for user in users:
+        questions = questions_for_user(challenge, user.id)
+        attempt = create_attempt(challenge.id, user.id, questions)
+        answers = {
+            str(question.id): question.answer if random.random() < 0.7 else (question.answer + 1) % 4
+            for question in questions
+        }
+        token = create_access_token(identity=str(user.id))
+        requests.append((token, {'attempt_id': attempt.id, 'answers': answers, 'time_taken': random.randint(60, 600)}))
+    return challenge.id, requests
+
+
+def fire(app, challenge_id, requests):
+    """Release every submit at once; returns (latencies in ms, status counts)"""
+    barrier = threading.Barrier(len(requests))
+    latencies = [None] * len(requests)
+    statuses = [None] * len(requests)
+    
+    def worker(index, token, payload):
+        client = app.test_client()
+        barrier.wait()
+        start = time.perf_counter()
+        response = client.post(
+            f'/api/challenges/{challenge_id}/submit',
+            json=payload,
+            headers={'Authorization': f'Bearer {token}'}
+        )
+        latencies[index] = (time.perf_counter() - start) * 1000
+        statuses[index] = response.status_code
+    
+    threads = [
+        threading.Thread(target=worker, args=(index, token, payload))
+        for index, (token, payload) in enumerate(requests)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    counts = {}
+    for status in statuses:
+        counts[status] = counts.get(status, 0) + 1
+    return latencies, counts
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run(app, users, label, window_ms, rounds):
+    app.config['SUBMIT_GROUP_COMMIT_MS'] = window_ms
+    latencies = []
+    counts = {}
+    elapsed = 0.0
+    for _ in range(rounds):
+        with app.app_context():
+            challenge_id, requests = prepare_round(users, label)
+            db.session.remove()
+        start = time.perf_counter()
+        round_latencies, round_counts = fire(app, challenge_id, requests)
+        elapsed += time.perf_counter() - start
+        latencies.extend(round_latencies)
+        for status, count in round_counts.items():
+            counts[status] = counts.get(status, 0) + count
+    
+    print(f"  {label:<14} p50 {percentile(latencies, 0.50):8.1f} ms   p95 {percentile(latencies, 0.95):8.1f} ms   "
+          f"p99 {percentile(latencies, 0.99):8.1f} ms   mean {statistics.mean(latencies):8.1f} ms   "
+          f"{len(latencies) / elapsed:7.1f} submits/s   statuses {counts}")
+    return percentile(latencies, 0.99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test simultaneous challenge submits')
+    parser.add_argument('--users', type=int, default=500, help='simultaneous submits per round')
+    parser.add_argument('--window-ms', type=float, default=5, help='group-commit window')
+    parser.add_argument('--rounds', type=int, default=1, help='bursts per mode')
+    args = parser.parse_args()
+    
+    app = create_app()
+    with app.app_context():
+        users = seed_users(args.users)
+        seed_questions()
+        dialect = db.session.get_bind().dialect.name
+        db.session.remove()
+    print(f"🚀 {dialect}: {args.users} simultaneous submits, {args.rounds} round(s) per mode")
+    
+    individual = run(app, users, 'individual', 0, args.rounds)
+    grouped = run(app, users, f'group {args.window_ms:g}ms', args.window_ms, args.rounds)
+    print(f"📊 p99 improvement: {individual / grouped:.1f}x")
+    
+    with app.app_context():
+        month, year = leaderboard_period()
+        report = reconcile_leaderboard(month, year)
+        print(f"🔍 Leaderboard drift after load test: {report}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
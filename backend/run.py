@@ -1,5 +1,6 @@
 import os
 import sys
+import click
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -19,10 +20,10 @@ app = create_app()
 
 # Import models after app creation to avoid circular imports
 try:
-    from app.models import User, QuizQuestion, Challenge, QuizResult, Leaderboard, Admin
+    from app.models import User, QuizQuestion, Challenge, QuizResult, Leaderboard, LeaderboardSnapshot, Admin
 except ImportError as e:
     print(f"⚠️  Warning: Could not import models: {e}")
-    User = QuizQuestion = Challenge = QuizResult = Leaderboard = Admin = None
+    User = QuizQuestion = Challenge = QuizResult = Leaderboard = LeaderboardSnapshot = Admin = None
 
 @app.shell_context_processor
 def make_shell_context():
@@ -33,6 +34,7 @@ def make_shell_context():
         'Challenge': Challenge,
         'QuizResult': QuizResult,
         'Leaderboard': Leaderboard,
+        'LeaderboardSnapshot': LeaderboardSnapshot,
         'Admin': Admin
     }
 
@@ -96,6 +98,88 @@ def init_db():
         db.session.commit()
         print("Sample questions created")
 
+@app.cli.command('rollover-leaderboards')
+def rollover_leaderboards_command():
+    """Archive finished months into leaderboard snapshots (run daily or on the 1st)"""
+    from app.services.leaderboard_archive import rollover_leaderboards
+    
+    results = rollover_leaderboards()
+    if not results:
+        print("ℹ️ No finished months to archive")
+    for result in results:
+        if result['archived']:
+            print(f"🗄️ Archived {result['period']}: {result['entries']} entries")
+        else:
+            print(f"ℹ️ Skipped {result['period']}: {result.get('reason', 'nothing to archive')}")
+
+@app.cli.command('reconcile-leaderboards')
+@click.option('--months', type=int, default=2, help='Months to check, counting back from the current one')
+@click.option('--apply', 'apply_changes', is_flag=True, help='Write the corrections instead of only reporting them')
+def reconcile_leaderboards_command(months, apply_changes):
+    """Check monthly leaderboard rows against the UTC-month QuizResult totals"""
+    from app.services.leaderboard_service import leaderboard_period, reconcile_leaderboard
+    
+    month, year = leaderboard_period()
+    for _ in range(months):
+        summary = reconcile_leaderboard(month, year, apply=apply_changes)
+        period = f"{year:04d}-{month:02d}"
+        if summary['archived']:
+            print(f"🗄️ {period}: archived, left as is")
+        elif apply_changes:
+            print(f"✅ {period}: {summary['fixed_entries']} fixed, {summary['created_entries']} created, "
+                  f"{summary['removed_entries']} removed")
+        else:
+            print(f"🔍 {period}: {len(summary['inconsistencies'])} inconsistent of {summary['users_checked']} users")
+        month, year = (month - 1, year) if month > 1 else (12, year - 1)
+    if not apply_changes:
+        print("ℹ️ Dry run, re-run with --apply to write the corrections")
+
+@app.cli.command('dedupe-questions')
+@click.option('--threshold', type=float, default=None,
+              help='Estimated similarity (0-1) to count as a duplicate; defaults to QUESTION_DUPLICATE_THRESHOLD')
+@click.option('--apply', 'apply_changes', is_flag=True, help='Deactivate the newer duplicates instead of only reporting them')
+def dedupe_questions_command(threshold, apply_changes):
+    """Find near-duplicate questions in the bank, keeping the oldest of each group"""
+    from app.models import QuizQuestion
+    from app.services.question_dedupe import backfill_signatures, find_duplicate_groups
+    from app.services.question_pool import invalidate_question_caches
+    
+    threshold = app.config['QUESTION_DUPLICATE_THRESHOLD'] if threshold is None else threshold
+    signed = backfill_signatures()
+    if signed:
+        print(f"🧬 Signed {signed} questions without a MinHash")
+    
+    groups = find_duplicate_groups(threshold)
+    duplicate_ids = [question_id for duplicates in groups.values() for question_id, _ in duplicates]
+    if not duplicate_ids:
+        print(f"✅ No near-duplicates at similarity >= {threshold:g}")
+        return
+    
+    for kept_id, duplicates in sorted(groups.items()):
+        matches = ', '.join(f"{question_id} ({similarity:.2f})" for question_id, similarity in duplicates)
+        print(f"🔁 Question {kept_id}: {matches}")
+    print(f"📊 {len(duplicate_ids)} near-duplicates of {len(groups)} questions at similarity >= {threshold:g}")
+    
+    if not apply_changes:
+        print("ℹ️ Dry run, re-run with --apply to deactivate the duplicates")
+        return
+    QuizQuestion.query.filter(QuizQuestion.id.in_(duplicate_ids)).update(
+        {QuizQuestion.is_active: False}, synchronize_session=False
+    )
+    db.session.commit()
+    invalidate_question_caches()
+    print(f"🗑️ Deactivated {len(duplicate_ids)} duplicate questions")
+
+@app.cli.command('prune-practice-attempts')
+@click.option('--days', type=float, default=7, help='Delete practice sessions served more than this many days ago')
+def prune_practice_attempts_command(days):
+    """Delete old practice sessions, submitted or abandoned (run daily)"""
+    from datetime import datetime, timedelta
+    from app.services.practice_attempts import prune_practice_attempts
+    
+    deleted = prune_practice_attempts(datetime.utcnow() - timedelta(days=days))
+    print(f"🧹 Deleted {deleted} practice sessions older than {days:g} days")
+
 if __name__ == '__main__':
     # Get port from environment (Render provides PORT variable)
     port = int(os.environ.get('PORT', 5000))
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Idempotent Submit Test
+Replays challenge and practice submits with the same Idempotency-Key and
+checks that the replay returns the first response unchanged while the
+result and the leaderboard are written only once.
+
+Usage:
+    python test_idempotent_submit.py
+
+Uses DATABASE_URL if set, otherwise a throwaway SQLite file.
+"""
+
+import os
+import sys
+import time
+import uuid
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///idempotent_submit.db')
+os.environ.setdefault('JWT_SECRET', 'idempotent-submit-secret-key')
+os.environ.setdefault('FLASK_ENV', 'development')
+
+from flask_jwt_extended import create_access_token
+from app import create_app, db, limiter
+from app.models import Leaderboard, QuizQuestion, QuizResult, User
+from app.services.leaderboard_service import leaderboard_period
+
+IDEMPOTENT_MARKER = 'idempotent'
+
+
+def seed_user(name):
+    user = User.query.filter_by(username=name).first()
+    if user is None:
+        user = User(username=name, email=f"{name}@example.com")
+        user.set_password('idempotent-submit-password')
+        db.session.add(user)
+        db.session.commit()
+    return user
+
+
+def auth(user, key=None):
+    headers = {'Authorization': f"Bearer {create_access_token(identity=str(user.id))}"}
+    if key:
+        headers['Idempotency-Key'] = key
+    return headers
+
+
+def correct_answers(questions):
+    answers = dict(db.session.query(QuizQuestion.id, QuizQuestion.answer).filter(
+        QuizQuestion.id.in_([question['id'] for question in questions])
+    ))
+    return {str(question_id): answer for question_id, answer in answers.items()}
+
+
+def board_totals(user):
+    db.session.expire_all()
+    month, year = leaderboard_period()
+    row = Leaderboard.query.filter_by(user_id=user.id, month=month, year=year).first()
+    return (row.total_score, row.challenges_completed) if row else (0, 0)
+
+
+def check(name, passed, detail=''):
+    print(f"  {'✅' if passed else '❌'} {name}{f': {detail}' if detail else ''}")
+    return passed
+
+
+def replay_checks(label, client, url, body, user, other_user, count_results):
+    """Submit twice with one key, then once as another user with the same key"""
+    results = []
+    key = str(uuid.uuid4())
+    before = board_totals(user)
+
+    first = client.post(url, json=body, headers=auth(user, key))
+    second = client.post(url, json=body, headers=auth(user, key))
+    results.append(check(f"{label}: first submit succeeds", first.status_code == 200,
+                         f"{first.status_code} {first.get_data(as_text=True)[:120]}"))
+    results.append(check(f"{label}: replay returns the same response",
+                         second.status_code == first.status_code and second.get_json() == first.get_json()
+                         and second.headers.get('Idempotent-Replayed') == 'true'))
+
+    score = (first.get_json().get('result') or {}).get('score') if first.status_code == 200 else None
+    after = board_totals(user)
+    results.append(check(f"{label}: result written once", count_results() == 1, str(count_results())))
+    results.append(check(f"{label}: leaderboard credited once",
+                         after == (before[0] + (score or 0), before[1] + 1), f"{before} -> {after}"))
+
+    # The key is scoped to its user; someone else's submit with it is not a replay
+    other = client.post(url, json=body, headers=auth(other_user, key))
+    results.append(check(f"{label}: another user's submit is not replayed",
+                         other.headers.get('Idempotent-Replayed') is None, str(other.status_code)))
+
+    # Without the key a repeat is a second submit of a used attempt
+    repeat = client.post(url, json=body, headers=auth(user))
+    results.append(check(f"{label}: a repeat without the key is refused", repeat.status_code == 409,
+                         str(repeat.status_code)))
+    return results
+
+
+def main():
+    app = create_app()
+    app.config['RATELIMIT_ENABLED'] = False
+    limiter.enabled = False
+    client = app.test_client()
+    results = []
+
+    with app.app_context():
+        player = seed_user(f"{IDEMPOTENT_MARKER}_player")
+        other = seed_user(f"{IDEMPOTENT_MARKER}_other")
+        tier = db.session.query(QuizQuestion.exam_type, QuizQuestion.difficulty).filter_by(is_active=True).first()
+
+        response = client.post('/api/challenges/create', headers=auth(player), json={
+            'name': f"{IDEMPOTENT_MARKER} {int(time.time())}",
+            'exam_type': tier.exam_type,
+            'difficulty': tier.difficulty,
+            'question_count': 3
+        })
+        assert response.status_code == 201, response.get_data(as_text=True)
+        challenge_id = response.get_json()['challenge']['id']
+        client.post(f'/api/challenges/{challenge_id}/join', headers=auth(player))
+        play = client.get(f'/api/challenges/{challenge_id}/play', headers=auth(player)).get_json()
+
+        print(f"🔍 Challenge {challenge_id}: replaying a submit of {len(play['questions'])} questions")
+        results += replay_checks(
+            'challenge', client, f'/api/challenges/{challenge_id}/submit',
+            {'attempt_id': play['attempt_id'], 'answers': correct_answers(play['questions']), 'time_taken': 30},
+            player, other,
+            lambda: QuizResult.query.filter_by(user_id=player.id, challenge_id=challenge_id).count()
+        )
+
+        practice = client.get('/api/quizzes/questions?sample=5', headers=auth(player)).get_json()
+        practice_before = QuizResult.query.filter_by(user_id=player.id, challenge_id=None).count()
+        print(f"🔍 Practice session {practice['attempt_id']}: replaying a submit of {len(practice['questions'])} questions")
+        results += replay_checks(
+            'practice', client, '/api/quizzes/practice/submit',
+            {'attempt_id': practice['attempt_id'], 'answers': correct_answers(practice['questions']), 'time_taken': 20},
+            player, other,
+            lambda: QuizResult.query.filter_by(user_id=player.id, challenge_id=None).count() - practice_before
+        )
+
+    if all(results):
+        print("🎉 Idempotent submit checks passed")
+        return 0
+    print(f"❌ {results.count(False)} of {len(results)} idempotent submit checks failed")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Leaderboard Reconcile Test
+Drifts a month's Leaderboard rows away from the QuizResult totals, lets a
+submit commit between reconcile's read and its write, and checks that the
+repaired rows still include that submit's delta.
+
+Usage:
+    python test_leaderboard_reconcile.py
+
+Uses DATABASE_URL if set, otherwise a throwaway SQLite file.
+"""
+
+import os
+import sys
+from datetime import datetime
+from unittest import mock
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///leaderboard_reconcile.db')
+os.environ.setdefault('JWT_SECRET', 'leaderboard-reconcile-secret-key')
+os.environ.setdefault('FLASK_ENV', 'development')
+
+from app import create_app, db
+from app.models import Leaderboard, QuizResult, User
+from app.services import leaderboard_service
+from app.services.leaderboard_service import leaderboard_period, record_result_change, reconcile_leaderboard
+
+RECONCILE_MARKER = 'reconcile'
+
+
+def seed_user(name):
+    user = User.query.filter_by(username=name).first()
+    if user is None:
+        user = User(username=name, email=f"{name}@example.com")
+        user.set_password('leaderboard-reconcile-password')
+        db.session.add(user)
+        db.session.commit()
+    # Start every run from an empty month for this user
+    QuizResult.query.filter_by(user_id=user.id).delete()
+    Leaderboard.query.filter_by(user_id=user.id).delete()
+    db.session.commit()
+    return user.id
+
+
+def submit(user_id, score, record=True):
+    """A practice submit: its result and, unless drifted, its leaderboard delta in one transaction"""
+    now = datetime.utcnow()
+    db.session.add(QuizResult(
+        user_id=user_id, challenge_id=None, score=score, total_questions=5,
+        correct_answers=0, wrong_answers=0, time_taken=0, submitted_at=now
+    ))
+    if record:
+        record_result_change(user_id, score, now)
+    db.session.commit()
+
+
+def board_row(user_id, month, year):
+    db.session.expire_all()
+    return Leaderboard.query.filter_by(user_id=user_id, month=month, year=year).first()
+
+
+def check(name, passed, detail=''):
+    print(f"  {'✅' if passed else '❌'} {name}{f': {detail}' if detail else ''}")
+    return passed
+
+
+def main():
+    app = create_app()
+    results = []
+
+    with app.app_context():
+        month, year = leaderboard_period()
+        drifted = seed_user(f"{RECONCILE_MARKER}_drifted")
+        emptied = seed_user(f"{RECONCILE_MARKER}_emptied")
+        unrecorded = seed_user(f"{RECONCILE_MARKER}_unrecorded")
+
+        # drifted: a row 7 points too high; emptied: a row without results;
+        # unrecorded: results that never reached the board
+        submit(drifted, 12)
+        Leaderboard.query.filter_by(user_id=drifted, month=month, year=year).update(
+            {Leaderboard.total_score: Leaderboard.total_score + 7}
+        )
+        submit(emptied, 5)
+        QuizResult.query.filter_by(user_id=emptied).delete()
+        submit(unrecorded, 9, record=False)
+        db.session.commit()
+
+        # Each of them submits again after reconcile has read the month
+        read_rows = leaderboard_service._reconcile_rows
+
+        def read_then_submit(*args):
+            rows = read_rows(*args)
+            for user_id in (drifted, emptied, unrecorded):
+                submit(user_id, 4)
+            return rows
+
+        with mock.patch.object(leaderboard_service, '_reconcile_rows', read_then_submit):
+            summary = reconcile_leaderboard(month, year, apply=True)
+        print(f"🔍 Reconcile: {summary['fixed_entries']} fixed, {summary['created_entries']} created, "
+              f"{summary['removed_entries']} removed")
+
+        expected = {drifted: (16, 2), emptied: (4, 1), unrecorded: (13, 2)}
+        for user_id, name in ((drifted, 'drifted row'), (emptied, 'row without results'),
+                              (unrecorded, 'missing row')):
+            row = board_row(user_id, month, year)
+            stored = (row.total_score, row.challenges_completed) if row else None
+            results.append(check(f"{name} keeps the concurrent submit", stored == expected[user_id],
+                                 f"{stored} (expected {expected[user_id]})"))
+
+        summary = reconcile_leaderboard(month, year)
+        ours = [entry for entry in summary['inconsistencies'] if entry['user_id'] in expected]
+        results.append(check('a second reconcile finds nothing to fix', not ours, str(ours)))
+
+    if all(results):
+        print("🎉 Leaderboard reconcile checks passed")
+        return 0
+    print(f"❌ {results.count(False)} of {len(results)} leaderboard reconcile checks failed")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
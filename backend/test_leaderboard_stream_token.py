@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Leaderboard Stream Token Test
+Opens a live leaderboard stream, lets the server recycle it, and checks
+that EventSource's reconnect with the same stream token is still accepted,
+while a token older than its TTL is refused so the client fetches a new one.
+
+Usage:
+    python test_leaderboard_stream_token.py [--lifetime 2]
+
+Uses DATABASE_URL if set, otherwise a throwaway SQLite file.
+"""
+
+import argparse
+import os
+import sys
+import time
+from unittest import mock
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///leaderboard_stream_token.db')
+os.environ.setdefault('JWT_SECRET', 'leaderboard-stream-token-secret-key')
+os.environ.setdefault('FLASK_ENV', 'development')
+
+from flask_jwt_extended import create_access_token
+from app import create_app, db, limiter
+from app.models import User
+from app.services.leaderboard_events import STREAM_RECONNECT_WINDOW, issue_stream_token, stream_slots
+
+STREAM_MARKER = 'streamtoken'
+DEFAULT_LIFETIME = 300
+
+
+def seed_user(name):
+    user = User.query.filter_by(username=name).first()
+    if user is None:
+        user = User(username=name, email=f"{name}@example.com")
+        user.set_password('stream-token-password')
+        db.session.add(user)
+        db.session.commit()
+    return user
+
+
+def aged_token(identity, age):
+    """A stream token as if issued `age` seconds ago"""
+    with mock.patch('itsdangerous.timed.time.time', return_value=time.time() - age):
+        return issue_stream_token(identity)
+
+
+def read_stream(client, token):
+    """Status and body of a stream read to its end (the server closes it after its lifetime)"""
+    response = client.get(f'/api/leaderboard/stream?token={token}')
+    body = response.get_data(as_text=True)
+    # The WSGI server closes the response, which releases the stream slot
+    response.close()
+    return response.status_code, body
+
+
+def check(name, passed, detail=''):
+    print(f"  {'✅' if passed else '❌'} {name}{f': {detail}' if detail else ''}")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check stream tokens across a stream recycle')
+    parser.add_argument('--lifetime', type=int, default=2, help='stream lifetime in seconds for the live part')
+    args = parser.parse_args()
+
+    app = create_app()
+    app.config['RATELIMIT_ENABLED'] = False
+    limiter.enabled = False
+    client = app.test_client()
+    results = []
+
+    with app.app_context():
+        user = seed_user(f"{STREAM_MARKER}_viewer")
+        identity = str(user.id)
+        headers = {'Authorization': f"Bearer {create_access_token(identity=identity)}"}
+
+        # Live: a stream with a short lifetime closes, and the same token reopens it
+        app.config['LEADERBOARD_STREAM_LIFETIME'] = args.lifetime
+        app.config['LEADERBOARD_STREAM_KEEPALIVE'] = 1
+        issued = client.post('/api/leaderboard/stream-token', headers=headers).get_json()
+        results.append(check('token outlives a stream plus the reconnect window',
+                             issued['expires_in'] >= args.lifetime + STREAM_RECONNECT_WINDOW,
+                             f"expires_in={issued['expires_in']}s, lifetime={args.lifetime}s"))
+
+        started = time.monotonic()
+        status, body = read_stream(client, issued['token'])
+        elapsed = time.monotonic() - started
+        results.append(check('stream is recycled after its lifetime',
+                             status == 200 and body.startswith('retry:') and elapsed >= args.lifetime,
+                             f"{status} after {elapsed:.1f}s"))
+        status, _ = read_stream(client, issued['token'])
+        results.append(check('reconnect with the same token is accepted', status == 200, str(status)))
+        results.append(check('recycled streams release their slots', stream_slots.open == 0, str(stream_slots.open)))
+
+        # Default lifetime: the reconnect after a full-length stream still falls inside the TTL
+        app.config['LEADERBOARD_STREAM_LIFETIME'] = DEFAULT_LIFETIME
+        app.config['LEADERBOARD_STREAM_KEEPALIVE'] = 15
+        ttl = client.post('/api/leaderboard/stream-token', headers=headers).get_json()['expires_in']
+        reconnect = client.get(f"/api/leaderboard/stream?token={aged_token(identity, DEFAULT_LIFETIME + 5)}",
+                               buffered=False)
+        results.append(check(f"token {DEFAULT_LIFETIME + 5}s old opens a {DEFAULT_LIFETIME}s stream's reconnect",
+                             reconnect.status_code == 200, str(reconnect.status_code)))
+        reconnect.close()
+        status, _ = read_stream(client, aged_token(identity, ttl + 5))
+        results.append(check('token past its TTL is refused', status == 401, str(status)))
+
+    if all(results):
+        print("🎉 Stream token checks passed")
+        return 0
+    print(f"❌ {results.count(False)} of {len(results)} stream token checks failed")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Practice Pool Test
+Creates challenges until their rosters cover the whole question bank and
+checks that practice leaves out open challenges' rosters, serves the full
+bank again once those challenges close, and keeps a bounded number of
+practice sessions per user.
+
+Usage:
+    python test_practice_pool.py [--challenges 12]
+
+Uses DATABASE_URL if set, otherwise a throwaway SQLite file.
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import timedelta
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///practice_pool.db')
+os.environ.setdefault('JWT_SECRET', 'practice-pool-secret-key')
+os.environ.setdefault('FLASK_ENV', 'development')
+
+from flask_jwt_extended import create_access_token
+from app import create_app, db, limiter
+from app.models import Challenge, ChallengeQuestion, PracticeAttempt, QuizQuestion, User
+from app.services.challenge_roster import submittable_since
+
+POOL_MARKER = 'poolcheck'
+
+
+def seed_user(name):
+    user = User.query.filter_by(username=name).first()
+    if user is None:
+        user = User(username=name, email=f"{name}@example.com")
+        user.set_password('practice-pool-password')
+        db.session.add(user)
+        db.session.commit()
+    return user
+
+
+def auth(user):
+    return {'Authorization': f"Bearer {create_access_token(identity=str(user.id))}"}
+
+
+def served_ids(client, headers, sample=100):
+    response = client.get(f'/api/quizzes/questions?sample={sample}', headers=headers)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    data = response.get_json()
+    return {question['id'] for question in data['questions']}, data['attempt_id']
+
+
+def check(name, passed, detail=''):
+    print(f"  {'✅' if passed else '❌'} {name}{f': {detail}' if detail else ''}")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the practice pool after many challenges')
+    parser.add_argument('--challenges', type=int, default=12, help='challenges to create')
+    args = parser.parse_args()
+
+    app = create_app()
+    app.config['RATELIMIT_ENABLED'] = False
+    limiter.enabled = False
+    client = app.test_client()
+    results = []
+
+    with app.app_context():
+        creator = seed_user(f"{POOL_MARKER}_creator")
+        player = seed_user(f"{POOL_MARKER}_player")
+        bank = {question_id for (question_id,) in db.session.query(QuizQuestion.id).filter_by(is_active=True)}
+        per_challenge = max(len(bank) // args.challenges + 1, 1)
+        # Spread the challenges over the bank's exam types so their rosters cover it
+        tiers = db.session.query(QuizQuestion.exam_type, QuizQuestion.difficulty).filter_by(
+            is_active=True
+        ).distinct().order_by(QuizQuestion.exam_type, QuizQuestion.difficulty).all()
+        print(f"🔍 {len(bank)} active questions, {args.challenges} challenges of {per_challenge}")
+
+        run = int(time.time())
+        challenge_ids = []
+        for i in range(args.challenges):
+            exam_type, difficulty = tiers[i % len(tiers)]
+            response = client.post('/api/challenges/create', headers=auth(creator), json={
+                'name': f"{POOL_MARKER} {run} #{i}",
+                'exam_type': exam_type,
+                'difficulty': difficulty,
+                'question_count': per_challenge
+            })
+            assert response.status_code == 201, response.get_data(as_text=True)
+            challenge_ids.append(response.get_json()['challenge']['id'])
+
+        roster = {question_id for (question_id,) in db.session.query(ChallengeQuestion.question_id).filter(
+            ChallengeQuestion.challenge_id.in_(challenge_ids)
+        )}
+        served, _ = served_ids(client, auth(player))
+        results.append(check('open rosters are left out of practice', not served & roster,
+                             f"{len(served)} served, {len(roster)} on rosters"))
+
+        # Close the challenges by moving them past the submit window
+        closed_at = submittable_since() - timedelta(minutes=1)
+        Challenge.query.filter(Challenge.id.in_(challenge_ids)).update(
+            {Challenge.created_at: closed_at}, synchronize_session=False
+        )
+        db.session.commit()
+
+        served, _ = served_ids(client, auth(player))
+        expected = min(len(bank), 100)
+        results.append(check(f"practice serves the bank after {args.challenges} challenges close",
+                             len(served) == expected, f"{len(served)} of {expected}"))
+        response = client.get(f'/api/challenges/{challenge_ids[0]}/play', headers=auth(player))
+        results.append(check('closed challenges cannot be played', response.status_code == 410,
+                             str(response.status_code)))
+
+        # Sampled sessions are capped per user; browsing pages records nothing
+        for _ in range(app.config['PRACTICE_OPEN_ATTEMPTS'] + 3):
+            served_ids(client, auth(player), sample=5)
+        client.get('/api/quizzes/questions?limit=10', headers=auth(player))
+        open_sessions = PracticeAttempt.query.filter_by(user_id=player.id, submitted_at=None).count()
+        results.append(check('open practice sessions stay bounded',
+                             open_sessions == app.config['PRACTICE_OPEN_ATTEMPTS'], str(open_sessions)))
+
+    if all(results):
+        print("🎉 Practice pool checks passed")
+        return 0
+    print(f"❌ {results.count(False)} of {len(results)} practice pool checks failed")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
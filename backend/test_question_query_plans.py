@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Question Query Plan Test
+Seeds a 100k-question bank, runs the question selection hot paths used by
+challenges.py and quizzes.py plus the admin listing, captures the SQL they
+actually send, and asserts the database plans each one through the
+quiz_question indexes instead of scanning the table.
+
+Usage:
+    python test_question_query_plans.py [--questions 100000]
+
+Uses DATABASE_URL if set, otherwise a throwaway SQLite file.
+"""
+
+import argparse
+import os
+import random
+import sys
+from contextlib import contextmanager
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///query_plans.db')
+os.environ.setdefault('JWT_SECRET', 'query-plan-secret-key')
+os.environ.setdefault('FLASK_ENV', 'development')
+
+from sqlalchemy import event, text
+from app import create_app, db
+from app.models import QuizQuestion
+from app.services.question_availability import availability_matrix
+from app.services.question_pool import invalidate_question_caches, question_pool
+from app.services.question_sampling import sample_question_ids
+from app.services.question_search import question_listing
+
+SELECTION_INDEX = 'ix_quiz_question_active_exam_difficulty'
+LISTING_INDEX = 'ix_quiz_question_created_at'
+PLAN_MARKER = '[query-plan]'
+EXAM_TYPES = ['CBSE 11', 'CBSE 12', 'JEE Main', 'JEE Advanced', 'NEET', 'General', 'Science', 'Math']
+DIFFICULTIES = ['easy', 'medium', 'tough']
+
+
+def seed(total):
+    existing = QuizQuestion.query.filter(QuizQuestion.text.startswith(PLAN_MARKER)).count()
+    if existing >= total:
+        return existing
+
+    print(f"🌱 Seeding {total - existing} questions...")
+    batch = []
+    for i in range(existing, total):
+        batch.append({
+            'text': f"{PLAN_MARKER} Question {i}",
+            'options': [f"Option {n}" for n in range(4)],
+            'answer': random.randrange(4),
+            'difficulty': random.choice(DIFFICULTIES),
+            'exam_type': random.choice(EXAM_TYPES),
+            'is_active': random.random() > 0.1
+        })
+        if len(batch) == 5000:
+            db.session.bulk_insert_mappings(QuizQuestion, batch)
+            db.session.commit()
+            batch = []
+    if batch:
+        db.session.bulk_insert_mappings(QuizQuestion, batch)
+        db.session.commit()
+
+    # Give the planner fresh statistics for the new rows
+    db.session.execute(text('ANALYZE'))
+    db.session.commit()
+    return total
+
+
+@contextmanager
+def captured_statements():
+    """Collect the quiz_question queries issued inside the block"""
+    statements = []
+    engine = db.engine
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if 'FROM quiz_question' in statement and statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', capture)
+
+
+def explain(statement, parameters):
+    dialect = db.engine.dialect.name
+    prefix = 'EXPLAIN QUERY PLAN ' if dialect == 'sqlite' else 'EXPLAIN '
+    rows = db.session.connection().exec_driver_sql(prefix + statement, parameters).fetchall()
+    return '\n'.join(str(row[-1]) for row in rows)
+
+
+def is_table_scan(plan):
+    for line in plan.splitlines():
+        if 'Seq Scan on quiz_question' in line:
+            return True
+        if 'SCAN quiz_question' in line and 'INDEX' not in line:
+            return True
+    return False
+
+
+def check(name, expected_index, run):
+    # Bump the question version so the cached pools and matrix reload from SQL
+    invalidate_question_caches()
+    with captured_statements() as statements:
+        run()
+
+    assert statements, f"{name}: no quiz_question query was issued"
+    failures = []
+    for statement, parameters in statements:
+        plan = explain(statement, parameters)
+        if expected_index not in plan or is_table_scan(plan):
+            failures.append(f"{' '.join(statement.split())}\n{plan}")
+
+    status = '✅' if not failures else '❌'
+    print(f"  {status} {name}: {len(statements)} quiz_question quer{'y' if len(statements) == 1 else 'ies'} via {expected_index}")
+    for failure in failures:
+        print(f"     {failure}")
+    return not failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Assert question hot paths use the quiz_question indexes')
+    parser.add_argument('--questions', type=int, default=100000, help='questions to seed')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        total = seed(args.questions)
+        print(f"🔍 {db.engine.dialect.name}: checking query plans over {total} seeded questions")
+
+        checks = [
+            # challenges.py create: availability matrix, then the chosen tier
+            ('availability matrix', SELECTION_INDEX, availability_matrix),
+            ('challenge sample (exact)', SELECTION_INDEX,
+             lambda: sample_question_ids(10, exam_type='JEE Main', difficulty='medium')),
+            ('challenge sample (exam type)', SELECTION_INDEX,
+             lambda: sample_question_ids(10, exam_type='JEE Main')),
+            ('challenge sample (similar)', SELECTION_INDEX,
+             lambda: sample_question_ids(10, exam_type=['JEE Main', 'JEE Advanced'])),
+            # quizzes.py practice questions
+            ('practice pool', SELECTION_INDEX,
+             lambda: question_pool(exam_type='CBSE 12', difficulty='tough')),
+            ('practice pool (exam type)', SELECTION_INDEX,
+             lambda: question_pool(exam_type='NEET')),
+            # admin.py question listing
+            ('admin listing', LISTING_INDEX, lambda: question_listing().limit(50).all()),
+            ('admin listing (inactive)', LISTING_INDEX, lambda: question_listing(include_inactive=True).limit(50).all()),
+        ]
+        passed = [check(name, index, run) for name, index, run in checks]
+
+    if all(passed):
+        print("🎉 All hot question queries use their indexes")
+        return 0
+    print(f"❌ {passed.count(False)} of {len(passed)} checks fell back to a table scan or another index")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
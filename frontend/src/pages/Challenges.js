@@ -6,6 +6,8 @@ import toast from 'react-hot-toast';
 const Challenges = () => {
   const { isAuthenticated, isUser } = useAuth();
   const [challenges, setChallenges] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [completedChallenges, setCompletedChallenges] = useState([]);
   const [activeTab, setActiveTab] = useState('active');
   const [loading, setLoading] = useState(true);
@@ -38,6 +40,7 @@ const Challenges = () => {
       ]);
       
       setChallenges(activeChallengesRes.data.challenges);
+      setNextCursor(activeChallengesRes.data.next_cursor || null);
       setCompletedChallenges(completedChallengesRes.data.challenges);
     } catch (error) {
       toast.error('Failed to fetch challenges');
@@ -46,6 +49,20 @@ const Challenges = () => {
     }
   };
 
+  const loadMoreChallenges = async () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const response = await apiService.getChallenges({ cursor: nextCursor });
+      setChallenges(prev => [...prev, ...response.data.challenges]);
+      setNextCursor(response.data.next_cursor || null);
+    } catch (error) {
+      toast.error('Failed to load more challenges');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleCreateChallenge = async (e) => {
     e.preventDefault();
     if (isCreating) return; // Prevent duplicate requests
@@ -442,6 +459,17 @@ const Challenges = () => {
           ))}
               </div>
             )}
+            {nextCursor && (
+              <div className="text-center mt-6">
+                <button
+                  onClick={loadMoreChallenges}
+                  disabled={loadingMore}
+                  className="bg-gray-100 hover:bg-gray-200 disabled:opacity-50 text-gray-800 px-6 py-2 rounded-lg font-medium transition-colors"
+                >
+                  {loadingMore ? 'Loading...' : 'Load More'}
+                </button>
+              </div>
+            )}
           </div>
         )}
         
@@ -3,6 +3,13 @@ import { useAuth } from '../contexts/AuthContext';
 import { apiService } from '../services/apiService';
 import toast from 'react-hot-toast';
 
+// Matches the API's default page size
+const LIVE_BOARD_SIZE = 50;
+// Delay before reopening a closed stream with a fresh token: quick the first
+// time (token expired across a recycle), then backing off (server at its stream limit)
+const STREAM_REOPEN_MS = 1000;
+const STREAM_RETRY_MS = 30000;
+
 const Leaderboard = () => {
   const { isAuthenticated } = useAuth();
   const [leaderboard, setLeaderboard] = useState([]);
@@ -28,6 +35,106 @@ const Leaderboard = () => {
     }
   }, [viewType, selectedChallenge]);
 
+  // Live updates: apply pushed score changes to the board instead of polling
+  useEffect(() => {
+    if (!isAuthenticated || (viewType === 'challenge' && !selectedChallenge)) {
+      return undefined;
+    }
+
+    let stream = null;
+    let retryTimer = null;
+    let failures = 0;
+    let cancelled = false;
+
+    // Keep the board ordered like the server: score desc, then the board's tie-break
+    const applyUpdate = (entry, scoreField, tieBreak) => {
+      setLeaderboard(prev => {
+        const previous = prev.find(existing => existing.user_id === entry.user_id);
+        const updated = [...prev.filter(existing => existing.user_id !== entry.user_id), { ...previous, ...entry }];
+        updated.sort((a, b) => (b[scoreField] - a[scoreField]) || tieBreak(a, b));
+        return updated.slice(0, LIVE_BOARD_SIZE).map((item, index) => ({ ...item, rank: index + 1 }));
+      });
+    };
+
+    const reconnectLater = () => {
+      if (!cancelled) {
+        const delay = failures === 0 ? STREAM_REOPEN_MS : STREAM_RETRY_MS;
+        failures += 1;
+        retryTimer = setTimeout(() => {
+          // Updates sent while disconnected were missed
+          fetchLeaderboard(true);
+          connect();
+        }, delay);
+      }
+    };
+
+    const connect = async () => {
+      try {
+        stream = await apiService.openLeaderboardStream(viewType === 'challenge' ? selectedChallenge : null);
+      } catch (error) {
+        console.error('📡 Could not open leaderboard stream:', error);
+        reconnectLater();
+        return;
+      }
+      if (cancelled) {
+        stream.close();
+        return;
+      }
+      listen(stream);
+    };
+
+    const listen = (stream) => {
+      stream.onopen = () => {
+        failures = 0;
+      };
+
+      stream.addEventListener('challenge_result', (event) => {
+        const data = JSON.parse(event.data);
+        console.log('📡 Challenge result update:', data.username, data.score, `#${data.rank}`);
+        applyUpdate({
+          user_id: data.user_id,
+          username: data.username,
+          score: data.score,
+          correct_answers: data.correct_answers,
+          wrong_answers: data.wrong_answers,
+          submitted_at: data.submitted_at
+        }, 'score', (a, b) => (new Date(a.submitted_at) - new Date(b.submitted_at)) || (a.user_id - b.user_id));
+      });
+
+      stream.addEventListener('global_score', (event) => {
+        const data = JSON.parse(event.data);
+        console.log('📡 Global score update:', data.username, data.total_score);
+        applyUpdate({
+          user_id: data.user_id,
+          username: data.username,
+          total_score: data.total_score,
+          challenges_completed: data.challenges_completed,
+          last_updated: data.last_updated
+        }, 'total_score', (a, b) => a.user_id - b.user_id);
+      });
+
+      stream.addEventListener('resync', () => fetchLeaderboard(true));
+
+      // EventSource retries dropped connections itself, but gives up on an
+      // error status (expired token, 503); reopen with a fresh token instead
+      stream.onerror = () => {
+        if (stream.readyState === EventSource.CLOSED) {
+          reconnectLater();
+        }
+      };
+    };
+
+    connect();
+
+    return () => {
+      cancelled = true;
+      clearTimeout(retryTimer);
+      if (stream) {
+        stream.close();
+      }
+    };
+  }, [isAuthenticated, viewType, selectedChallenge]);
+
   const fetchLeaderboard = async (isRetry = false) => {
     try {
       if (isRetry) {
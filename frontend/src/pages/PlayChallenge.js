@@ -10,6 +10,7 @@ const PlayChallenge = () => {
   const { isAuthenticated } = useAuth();
   const [challenge, setChallenge] = useState(null);
   const [questions, setQuestions] = useState([]);
+  const [attemptId, setAttemptId] = useState(null);
   const [currentQuestion, setCurrentQuestion] = useState(0);
   const [answers, setAnswers] = useState({});
   const [skippedQuestions, setSkippedQuestions] = useState(new Set());
@@ -79,9 +80,12 @@ const PlayChallenge = () => {
       const timeTaken = (challenge.time_limit * 60) - timeLeft;
       const response = await apiService.submitChallenge(challengeId, {
         answers,
-        time_taken: timeTaken
-      });
+        time_taken: timeTaken,
+        attempt_id: attemptId
+      }, attemptId ? `attempt-${attemptId}` : null);
       const submissionResult = response.data.result;
+      // Questions are served without answers; the key arrives with the result
+      const answerKey = response.data.answer_key || {};
       
       // Calculate detailed results for display
       let correctAnswers = 0;
@@ -90,7 +94,8 @@ const PlayChallenge = () => {
 
       questions.forEach(question => {
         const userAnswer = answers[question.id];
-        const isCorrect = userAnswer !== undefined && userAnswer === question.answer;
+        const correctAnswer = answerKey[question.id];
+        const isCorrect = userAnswer !== undefined && userAnswer === correctAnswer;
         const isAnswered = userAnswer !== undefined;
         
         if (isAnswered) {
@@ -103,6 +108,7 @@ const PlayChallenge = () => {
 
         questionResults.push({
           ...question,
+          answer: correctAnswer,
           userAnswer,
           isCorrect,
           isAnswered
@@ -129,26 +135,13 @@ const PlayChallenge = () => {
       setQuizStarted(false);
       toast.success('Quiz submitted successfully!');
       
-      // Refresh leaderboards in background with retry logic
-      setTimeout(async () => {
-        try {
-          console.log('📊 Refreshing leaderboards after submission...');
-          await Promise.allSettled([
-            apiService.getLeaderboard('global'),
-            apiService.getLeaderboard('challenge', challengeId)
-          ]);
-          console.log('✅ Leaderboards refreshed successfully');
-        } catch (error) {
-          console.warn('⚠️ Failed to refresh leaderboards:', error);
-          // Don't show error to user as this is background operation
-        }
-      }, 1000); // Small delay to ensure backend has processed the result
+      // Leaderboard pages receive this result live over the leaderboard stream
     } catch (error) {
       toast.error('Failed to submit quiz');
     } finally {
       setSubmitting(false);
     }
-  }, [challengeId, answers, questions, challenge, timeLeft, submitting, skippedQuestions]);
+  }, [challengeId, answers, questions, challenge, timeLeft, submitting, skippedQuestions, attemptId]);
 
   // Auto-submit when time runs out
   const handleAutoSubmit = useCallback(() => {
@@ -209,7 +202,7 @@ const PlayChallenge = () => {
       const response = await apiService.getChallengeQuestions(challengeId);
       console.log('📊 API response:', response.data);
       
-      const { questions: loadedQuestions, challenge: challengeData } = response.data;
+      const { questions: loadedQuestions, challenge: challengeData, attempt_id: loadedAttemptId } = response.data;
       
       console.log('🎯 Challenge data:', challengeData);
       console.log('❓ Questions loaded:', loadedQuestions?.length || 0);
@@ -230,6 +223,7 @@ const PlayChallenge = () => {
       
       setChallenge(challengeData);
       setQuestions(loadedQuestions);
+      setAttemptId(loadedAttemptId ?? null);
       setTimeLeft(challengeData.time_limit * 60); // Convert minutes to seconds
       
       console.log('✅ Challenge data loaded successfully');
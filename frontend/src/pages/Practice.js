@@ -8,6 +8,8 @@ const Practice = () => {
   const [questions, setQuestions] = useState([]);
   const [currentQuestion, setCurrentQuestion] = useState(0);
   const [answers, setAnswers] = useState({});
+  const [attemptId, setAttemptId] = useState(null);
+  const [submissionKey, setSubmissionKey] = useState(null);
   const [timeLeft, setTimeLeft] = useState(0);
   const [quizStarted, setQuizStarted] = useState(false);
   const [quizCompleted, setQuizCompleted] = useState(false);
@@ -41,7 +43,10 @@ const Practice = () => {
         setTimeout(() => reject(new Error('Request timeout')), 30000); // 30 second timeout
       });
       
-      const apiPromise = apiService.getQuestions(filters.exam_type, filters.difficulty);
+      // The server samples the questions, so only this session's questions are sent
+      const apiPromise = apiService.getQuestions(filters.exam_type, filters.difficulty, {
+        sample: filters.question_count
+      });
       const response = await Promise.race([apiPromise, timeoutPromise]);
       
       console.log('📊 API response:', response.data);
@@ -59,13 +64,15 @@ const Practice = () => {
         return;
       }
       
-      // Shuffle and take required number of questions
-      const shuffled = [...allQuestions].sort(() => 0.5 - Math.random());
-      const selectedQuestions = shuffled.slice(0, Math.min(filters.question_count, allQuestions.length));
+      const selectedQuestions = allQuestions.slice(0, filters.question_count);
       
       console.log(`✅ Starting quiz with ${selectedQuestions.length} questions`);
       
       setQuestions(selectedQuestions);
+      // The server scores answers against the set it recorded for this session
+      setAttemptId(response.data.attempt_id);
+      // One key per session so a repeated submit replays instead of scoring twice
+      setSubmissionKey(`practice-${Date.now()}-${Math.random().toString(36).slice(2)}`);
       setTimeLeft(selectedQuestions.length * 60); // 1 minute per question
       setQuizStarted(true);
       setCurrentQuestion(0);
@@ -110,53 +117,42 @@ const Practice = () => {
   };
 
   const handleSubmitQuiz = async () => {
-    let correctAnswers = 0;
-    let wrongAnswers = 0;
-
-    questions.forEach(question => {
-      const userAnswer = answers[question.id];
-      if (userAnswer !== undefined) {
-        if (userAnswer === question.answer) {
-          correctAnswers++;
-        } else {
-          wrongAnswers++;
-        }
-      }
-    });
+    // Answers are not sent to the browser; the server scores the session it served.
+    // A session is scored once, so the submit that credits the leaderboard also returns the totals.
+    let submitted;
+    try {
+      const response = await apiService.post('/quizzes/practice/submit', {
+        attempt_id: attemptId,
+        answers: answers,
+        time_taken: (filters.question_count * 60) - timeLeft
+      }, submissionKey ? { headers: { 'Idempotency-Key': submissionKey } } : {});
+      submitted = response.data;
+    } catch (error) {
+      console.error('Failed to submit practice results:', error);
+      toast.error(error.response?.data?.error || 'Failed to submit your answers. Please try again.', { duration: 5000 });
+      return;
+    }
 
-    const totalScore = Math.max(0, (correctAnswers * 4) - (wrongAnswers * 1));
-    
     const result = {
-      correct: correctAnswers,
-      wrong: wrongAnswers,
-      unanswered: questions.length - (correctAnswers + wrongAnswers),
-      total: questions.length,
-      score: totalScore,
-      percentage: Math.round((correctAnswers / questions.length) * 100)
+      correct: submitted.correct_answers,
+      wrong: submitted.wrong_answers,
+      unanswered: submitted.unanswered,
+      total: submitted.total_questions,
+      score: submitted.score,
+      percentage: Math.round((submitted.correct_answers / submitted.total_questions) * 100)
     };
+    if (!submitted.credited) {
+      toast(submitted.message, { duration: 5000 });
+    }
     
     setScore(result);
     setQuizCompleted(true);
     setQuizStarted(false);
-
-    // Submit results to backend for leaderboard
-    try {
-      await apiService.post('/quizzes/practice/submit', {
-        questions: questions.map(q => ({ id: q.id, answer: q.answer })),
-        answers: answers,
-        score: totalScore,
-        correct_answers: correctAnswers,
-        wrong_answers: wrongAnswers,
-        time_taken: (filters.question_count * 60) - timeLeft
-      });
-    } catch (error) {
-      console.error('Failed to submit practice results:', error);
-      // Don't show error to user as this is just for leaderboard
-    }
   };
 
   const resetQuiz = () => {
     setQuestions([]);
+    setAttemptId(null);
     setCurrentQuestion(0);
     setAnswers({});
     setTimeLeft(0);
@@ -95,8 +95,8 @@ class ApiService {
   }
 
   // Challenge endpoints
-  async getChallenges() {
-    return this.get('/challenges/active');
+  async getChallenges(params = {}) {
+    return this.get('/challenges/active', { params });
   }
 
   async createChallenge(data) {
@@ -111,9 +111,11 @@ class ApiService {
     return this.get(`/challenges/${challengeId}/play`);
   }
 
-  async submitChallenge(challengeId, submissionData) {
-    // submissionData should contain { answers, time_taken }
-    return this.post(`/challenges/${challengeId}/submit`, submissionData);
+  async submitChallenge(challengeId, submissionData, idempotencyKey = null) {
+    // submissionData should contain { answers, time_taken, attempt_id }
+    // Repeats with the same idempotency key replay the first result
+    const config = idempotencyKey ? { headers: { 'Idempotency-Key': idempotencyKey } } : {};
+    return this.post(`/challenges/${challengeId}/submit`, submissionData, config);
   }
 
   async getChallengeResults(challengeId) {
@@ -125,13 +127,17 @@ class ApiService {
   }
 
   // Quiz endpoints
-  async getQuestions(examType = null, difficulty = null) {
-    const params = {};
+  async getQuestions(examType = null, difficulty = null, options = {}) {
+    const params = { ...options };
     if (examType) params.exam_type = examType;
     if (difficulty) params.difficulty = difficulty;
     return this.get('/quizzes/questions', { params });
   }
 
+  async checkPracticeAnswers(attemptId, answers) {
+    return this.post('/quizzes/practice/check', { attempt_id: attemptId, answers });
+  }
+
   // Admin endpoints
   async getAdminDashboard() {
     return this.get('/admin/dashboard');
@@ -189,6 +195,19 @@ class ApiService {
     
     return this.get('/leaderboard', { params });
   }
+
+  // Live leaderboard updates (Server-Sent Events). EventSource cannot send
+  // headers, so the stream is opened with a short-lived stream token rather
+  // than the JWT, which would otherwise end up in access logs.
+  async openLeaderboardStream(challengeId = null) {
+    const response = await this.post('/leaderboard/stream-token');
+    const params = new URLSearchParams({ token: response.data.token });
+    if (challengeId) {
+      params.set('challenge_id', challengeId);
+    }
+    console.log('📡 Opening leaderboard stream:', challengeId || 'global');
+    return new EventSource(`${API_BASE_URL}/leaderboard/stream?${params.toString()}`);
+  }
 }
 
 export const apiService = new ApiService();